@@ -1,11 +1,5 @@
+import importlib
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import json
-import hashlib
-from streamlit_option_menu import option_menu
 
 # Configuração da página
 st.set_page_config(
@@ -27,19 +21,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Import das páginas
-try:
-    from pages import overview, vendas, leads, financeiro, config, instagram_analytics
-except Exception as e:
-    st.error(f"Erro ao importar páginas: {e}")
-    st.stop()
 from utils.auth import check_authentication, login_page
-from utils.database import Database
 from utils.styles import apply_custom_css
+from utils.profiler import perfilar_pagina
+
+# Registro de páginas: cada módulo (e suas dependências pesadas como plotly,
+# numpy e reportlab) só é importado quando a página é aberta pela primeira vez
+PAGES = {
+    "📈 Overview": "pages.overview",
+    "💰 Vendas": "pages.vendas",
+    "🎯 Leads": "pages.leads",
+    "📱 Instagram Analytics": "pages.instagram_analytics",
+    "💳 Financeiro": "pages.financeiro",
+    "⚙️ Config": "pages.config",
+}
+
+def load_page(label):
+    """Importa o módulo da página sob demanda (o Python mantém o cache em sys.modules)"""
+    try:
+        return importlib.import_module(PAGES[label])
+    except Exception as e:
+        st.error(f"Erro ao importar página {label}: {e}")
+        st.stop()
 
 # Inicializar banco de dados
 @st.cache_resource
 def init_database():
+    from utils.database import Database
     return Database()
 
 def main():
@@ -149,8 +157,7 @@ def main():
         st.markdown(f"**Olá, {user_info.get('name', 'Usuário')}!** 👋")
         
         # Menu principal - versão simplificada
-        pages = ["📈 Overview", "💰 Vendas", "🎯 Leads", "📱 Instagram Analytics", "💳 Financeiro", "⚙️ Config"]
-        selected = st.selectbox("Navegar para:", pages, key="main_menu")
+        selected = st.selectbox("Navegar para:", list(PAGES), key="main_menu")
         
         # Tema do usuário
         theme_colors = {
@@ -167,19 +174,10 @@ def main():
                 del st.session_state[key]
             st.rerun()
     
-    # Renderizar página selecionada
-    if selected == "📈 Overview":
-        overview.show_page()
-    elif selected == "💰 Vendas":
-        vendas.show_page()
-    elif selected == "🎯 Leads":
-        leads.show_page()
-    elif selected == "📱 Instagram Analytics":
-        instagram_analytics.show_page()
-    elif selected == "💳 Financeiro":
-        financeiro.show_page()
-    elif selected == "⚙️ Config":
-        config.show_page()
+    # Renderizar página selecionada (com medição de tempo por fase)
+    page = load_page(selected)
+    with perfilar_pagina(selected):
+        page.show_page()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+📊 Benchmark de Export Excel
+Compara o export antigo (pd.ExcelWriter com openpyxl) com os writers em
+streaming de utils/exports.py (xlsxwriter constant_memory e openpyxl
+write_only) numa planilha de vendas sintética.
+
+Uso:
+    python benchmarks/excel_benchmark.py [--linhas 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.exports import escrever_xlsx  # noqa: E402
+
+
+def gerar_vendas(linhas, seed=42):
+    """DataFrame com o formato da tabela vendas"""
+    rng = np.random.default_rng(seed)
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D")
+
+    return pd.DataFrame({
+        'id': [f"venda-{i}" for i in range(linhas)],
+        'cliente_nome': rng.choice(["João Silva", "Maria Santos", "Pedro Costa", "Ana Oliveira"], linhas),
+        'produto': rng.choice(["Curso High Ticket", "Mentoria Individual", "Consultoria Premium"], linhas),
+        'valor': rng.choice([997.0, 1997.0, 2997.0, 4997.0], linhas),
+        'vendedor': rng.choice(["Ana", "Fernando"], linhas),
+        'data_venda': datas.strftime('%Y-%m-%d'),
+        'status': rng.choice(["confirmada", "pendente", "cancelada"], linhas, p=[0.8, 0.15, 0.05]),
+        'meio_pagamento': rng.choice(["PIX", "Cartão de Crédito", "Boleto"], linhas),
+        'created_at': datas,
+    })
+
+
+def export_pandas_openpyxl(df, destino):
+    """Comportamento anterior do export_to_excel"""
+    with pd.ExcelWriter(destino, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name='Vendas', index=False)
+
+
+def medir(nome, func, df, destino):
+    """Executa o export e retorna (tempo em s, pico de memória Python em MB, tamanho em MB)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    func(df, destino)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return tempo, pico / 1024 / 1024, os.path.getsize(destino) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos writers de Excel")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = gerar_vendas(args.linhas)
+    print(f"Planilha de vendas com {args.linhas:,} linhas\n")
+
+    engines = [
+        ("pd.ExcelWriter (openpyxl)", export_pandas_openpyxl),
+        ("xlsxwriter constant_memory", lambda d, p: escrever_xlsx({'Vendas': d}, p, engine='xlsxwriter')),
+        ("openpyxl write_only", lambda d, p: escrever_xlsx({'Vendas': d}, p, engine='openpyxl')),
+    ]
+
+    print(f"{'Engine':<30} {'Tempo (s)':>10} {'Pico (MB)':>10} {'Arquivo (MB)':>13}")
+    print("-" * 66)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        for i, (nome, func) in enumerate(engines):
+            destino = os.path.join(pasta, f"bench_{i}.xlsx")
+            try:
+                tempo, pico, tamanho = medir(nome, func, df, destino)
+                print(f"{nome:<30} {tempo:>10.2f} {pico:>10.1f} {tamanho:>13.1f}")
+            except ImportError as e:
+                print(f"{nome:<30} {'indisponível':>10}  ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+⏱️ Benchmark de Cold Start
+Mede o tempo de import de cada etapa do app em processos Python novos,
+simulando o primeiro rerun após o container escalar do zero.
+
+Uso:
+    python benchmarks/startup_benchmark.py [--repeticoes 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports feitos pelo app.py antes de qualquer página (tela de login)
+IMPORTS_LOGIN = ["streamlit", "utils.auth", "utils.styles", "utils.profiler"]
+
+# Módulos das páginas, carregados sob demanda pelo registro PAGES
+PAGINAS = [
+    "pages.overview",
+    "pages.vendas",
+    "pages.leads",
+    "pages.instagram_analytics",
+    "pages.financeiro",
+    "pages.config",
+]
+
+SCRIPT_FILHO = """
+import sys, time
+inicio = time.perf_counter()
+for modulo in sys.argv[1:]:
+    __import__(modulo)
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir_import(modulos, repeticoes):
+    """Retorna a mediana (s) do tempo de import dos módulos em processos limpos"""
+    tempos = []
+    for _ in range(repeticoes):
+        resultado = subprocess.run(
+            [sys.executable, "-c", SCRIPT_FILHO, *modulos],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True
+        )
+        if resultado.returncode != 0:
+            erro = resultado.stderr.strip().splitlines()[-1] if resultado.stderr else "erro desconhecido"
+            raise RuntimeError(f"Falha ao importar {modulos}: {erro}")
+        tempos.append(float(resultado.stdout.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de cold start do dashboard")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'Etapa':<45} {'Mediana (ms)':>12}")
+    print("-" * 58)
+
+    base = medir_import(IMPORTS_LOGIN, args.repeticoes)
+    print(f"{'Tela de login (app.py sem páginas)':<45} {base * 1000:>12.1f}")
+
+    for pagina in PAGINAS:
+        try:
+            tempo = medir_import(IMPORTS_LOGIN + [pagina], args.repeticoes)
+            print(f"{'+ ' + pagina:<45} {tempo * 1000:>12.1f}")
+        except RuntimeError as e:
+            print(f"{'+ ' + pagina:<45} {'erro':>12}  ({e})")
+
+    # Comparação com o comportamento antigo: todas as páginas no cold start
+    try:
+        todas = medir_import(IMPORTS_LOGIN + PAGINAS, args.repeticoes)
+        print("-" * 58)
+        print(f"{'Import eager (todas as páginas)':<45} {todas * 1000:>12.1f}")
+    except RuntimeError as e:
+        print(f"Import eager: erro ({e})")
+
+
+if __name__ == "__main__":
+    main()
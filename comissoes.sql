@@ -0,0 +1,47 @@
+-- Comissões calculadas pelo motor de regras (utils/comissoes.py)
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- O app calcula o percentual de cada venda e grava todos de uma vez em
+-- vendas.comissao_pct; comissao_valor é coluna gerada (valor * comissao_pct).
+-- A aba Comissões lê os totais já gravados, filtrando o mês por faixa de data.
+
+-- ========== ÍNDICES ==========
+
+-- Totais do mês por vendedor (WHERE status = 'confirmada' AND data_venda BETWEEN ...).
+-- Mesmo índice do ranking (relatorios.sql): um só índice de vendas confirmadas por data
+CREATE INDEX IF NOT EXISTS idx_vendas_confirmadas_data ON vendas(data_venda) INCLUDE (vendedor, valor)
+    WHERE status = 'confirmada';
+
+-- ========== GRAVAÇÃO EM LOTE ==========
+
+-- Atualiza comissao_pct de várias vendas numa única chamada (arrays paralelos).
+-- Só regrava as que mudaram; retorna quantas foram atualizadas.
+-- Roda com as permissões de quem chama: as policies de RLS continuam valendo.
+CREATE OR REPLACE FUNCTION aplicar_comissoes(p_ids UUID[], p_pcts NUMERIC[])
+RETURNS INTEGER AS $$
+    WITH atualizadas AS (
+        UPDATE vendas v
+        SET comissao_pct = u.pct
+        FROM unnest(p_ids, p_pcts) AS u(id, pct)
+        WHERE v.id = u.id
+          AND v.comissao_pct IS DISTINCT FROM u.pct
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INTEGER FROM atualizadas;
+$$ LANGUAGE sql VOLATILE;
+
+-- ========== TOTAIS DO PERÍODO ==========
+
+-- Faturamento, quantidade e comissão gravada das vendas confirmadas por vendedor
+CREATE OR REPLACE FUNCTION comissoes_periodo(p_inicio DATE, p_fim DATE)
+RETURNS TABLE (vendedor VARCHAR, total_vendas NUMERIC, quantidade BIGINT, comissao NUMERIC) AS $$
+    SELECT v.vendedor, SUM(v.valor), COUNT(*), COALESCE(SUM(v.comissao_valor), 0)
+    FROM vendas v
+    WHERE v.status = 'confirmada'
+      AND v.data_venda BETWEEN p_inicio AND p_fim
+    GROUP BY v.vendedor
+    ORDER BY v.vendedor;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION aplicar_comissoes(UUID[], NUMERIC[]) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION comissoes_periodo(DATE, DATE) TO anon, authenticated;
@@ -0,0 +1,63 @@
+-- Comparação com o período anterior para os cards de métricas
+-- Execute este script no SQL Editor do Supabase APÓS financeiro.sql
+--
+-- Uma única chamada devolve, para o período [p_inicio, p_fim] e para a
+-- janela anterior de mesmo tamanho, os agregados de vendas, leads e custos
+-- usados pelos cards. Cada tabela é lida uma vez cobrindo as duas janelas
+-- e separada com FILTER; as métricas derivadas (ticket médio, ROI, margem,
+-- conversão) são calculadas no app (utils/comparacoes.py).
+
+-- ========== COMPARAÇÃO ==========
+
+CREATE OR REPLACE FUNCTION comparar_periodos(p_inicio DATE, p_fim DATE, p_categorias TEXT[] DEFAULT NULL)
+RETURNS TABLE (metrica TEXT, atual NUMERIC, anterior NUMERIC) AS $$
+    WITH v AS (
+        SELECT
+            COUNT(*) FILTER (WHERE data_venda >= p_inicio) AS vendas,
+            COUNT(*) FILTER (WHERE data_venda < p_inicio) AS vendas_ant,
+            COALESCE(SUM(valor) FILTER (WHERE data_venda >= p_inicio), 0) AS faturamento,
+            COALESCE(SUM(valor) FILTER (WHERE data_venda < p_inicio), 0) AS faturamento_ant,
+            COALESCE(SUM(comissao_valor) FILTER (WHERE data_venda >= p_inicio), 0) AS comissao,
+            COALESCE(SUM(comissao_valor) FILTER (WHERE data_venda < p_inicio), 0) AS comissao_ant
+        FROM vendas
+        WHERE status = 'confirmada'
+          AND data_venda BETWEEN p_inicio - (p_fim - p_inicio + 1) AND p_fim
+    ),
+    l AS (
+        SELECT
+            COUNT(*) FILTER (WHERE created_at >= p_inicio) AS leads,
+            COUNT(*) FILTER (WHERE created_at < p_inicio) AS leads_ant,
+            COUNT(*) FILTER (WHERE created_at >= p_inicio AND status = 'novo') AS novos,
+            COUNT(*) FILTER (WHERE created_at < p_inicio AND status = 'novo') AS novos_ant,
+            COUNT(*) FILTER (WHERE created_at >= p_inicio AND status = 'contatado') AS contatados,
+            COUNT(*) FILTER (WHERE created_at < p_inicio AND status = 'contatado') AS contatados_ant,
+            COUNT(*) FILTER (WHERE created_at >= p_inicio AND status = 'interessado') AS interessados,
+            COUNT(*) FILTER (WHERE created_at < p_inicio AND status = 'interessado') AS interessados_ant,
+            COUNT(*) FILTER (WHERE created_at >= p_inicio AND status = 'fechado') AS fechados,
+            COUNT(*) FILTER (WHERE created_at < p_inicio AND status = 'fechado') AS fechados_ant
+        FROM leads
+        WHERE created_at >= p_inicio - (p_fim - p_inicio + 1)
+          AND created_at < p_fim + 1
+    ),
+    c AS (
+        SELECT
+            COALESCE(SUM(valor) FILTER (WHERE data_custo >= p_inicio), 0) AS custos,
+            COALESCE(SUM(valor) FILTER (WHERE data_custo < p_inicio), 0) AS custos_ant
+        FROM custos_periodo(p_inicio - (p_fim - p_inicio + 1), p_fim)
+        WHERE p_categorias IS NULL OR categoria = ANY(p_categorias)
+    )
+    SELECT x.metrica, x.atual, x.anterior
+    FROM v, l, c, LATERAL (VALUES
+        ('vendas', v.vendas::NUMERIC, v.vendas_ant::NUMERIC),
+        ('faturamento', v.faturamento, v.faturamento_ant),
+        ('comissao', v.comissao, v.comissao_ant),
+        ('leads', l.leads::NUMERIC, l.leads_ant::NUMERIC),
+        ('leads_novo', l.novos::NUMERIC, l.novos_ant::NUMERIC),
+        ('leads_contatado', l.contatados::NUMERIC, l.contatados_ant::NUMERIC),
+        ('leads_interessado', l.interessados::NUMERIC, l.interessados_ant::NUMERIC),
+        ('leads_fechado', l.fechados::NUMERIC, l.fechados_ant::NUMERIC),
+        ('custos', c.custos, c.custos_ant)
+    ) AS x(metrica, atual, anterior);
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION comparar_periodos(DATE, DATE, TEXT[]) TO anon, authenticated;
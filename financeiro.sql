@@ -0,0 +1,127 @@
+-- Custos reais no módulo Financeiro
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- Custos recorrentes são gravados uma única vez (data da primeira cobrança)
+-- e expandidos mês a mês só para o período consultado; a evolução do ROI
+-- vem agregada do banco (roi_diario).
+
+-- ========== TABELAS ==========
+
+-- Parcelas das vendas no cartão parcelado (fluxo de caixa)
+ALTER TABLE vendas ADD COLUMN IF NOT EXISTS parcelas SMALLINT DEFAULT 1 CHECK (parcelas BETWEEN 1 AND 12);
+
+-- Último mês de cobrança de um custo recorrente (NULL = sem fim)
+ALTER TABLE custos ADD COLUMN IF NOT EXISTS recorrente_fim DATE;
+
+-- Consultas por período, filtradas por categoria ou responsável
+CREATE INDEX IF NOT EXISTS idx_custos_data ON custos(data_custo);
+CREATE INDEX IF NOT EXISTS idx_custos_categoria_data ON custos(categoria, data_custo);
+CREATE INDEX IF NOT EXISTS idx_custos_responsavel_data ON custos(responsavel, data_custo);
+-- Poucos recorrentes: índice parcial percorrido em toda consulta de período
+CREATE INDEX IF NOT EXISTS idx_custos_recorrentes ON custos(data_custo, recorrente_fim) WHERE recorrente;
+
+-- ========== CUSTOS DO PERÍODO ==========
+
+-- Lançamentos do período com os recorrentes expandidos (uma linha por mês).
+-- A k-ésima cobrança é data_custo + k meses, calculada a partir da data
+-- original (31/01 -> 28/02 -> 31/03, sem acumular o ajuste de fim de mês)
+CREATE OR REPLACE FUNCTION custos_periodo(p_inicio DATE, p_fim DATE)
+RETURNS TABLE (
+    id UUID, descricao VARCHAR, categoria VARCHAR, valor NUMERIC,
+    data_custo DATE, responsavel VARCHAR, recorrente BOOLEAN
+) AS $$
+    SELECT c.id, c.descricao, c.categoria, c.valor, c.data_custo, c.responsavel, FALSE
+    FROM custos c
+    WHERE NOT c.recorrente
+      AND c.data_custo BETWEEN p_inicio AND p_fim
+
+    UNION ALL
+
+    SELECT c.id, c.descricao, c.categoria, c.valor, o.data, c.responsavel, TRUE
+    FROM custos c
+    CROSS JOIN LATERAL (
+        SELECT (c.data_custo + k * INTERVAL '1 month')::DATE AS data
+        FROM generate_series(
+            GREATEST(0, (EXTRACT(YEAR FROM p_inicio) * 12 + EXTRACT(MONTH FROM p_inicio))
+                      - (EXTRACT(YEAR FROM c.data_custo) * 12 + EXTRACT(MONTH FROM c.data_custo)))::INT,
+            ((EXTRACT(YEAR FROM p_fim) * 12 + EXTRACT(MONTH FROM p_fim))
+              - (EXTRACT(YEAR FROM c.data_custo) * 12 + EXTRACT(MONTH FROM c.data_custo)))::INT
+        ) AS k
+    ) o
+    WHERE c.recorrente
+      AND c.data_custo <= p_fim
+      AND (c.recorrente_fim IS NULL OR c.recorrente_fim >= p_inicio)
+      AND o.data BETWEEN p_inicio AND p_fim
+      AND (c.recorrente_fim IS NULL OR o.data <= c.recorrente_fim);
+$$ LANGUAGE sql STABLE;
+
+-- Totais por mês, categoria, responsável e tipo (recorrente ou não)
+CREATE OR REPLACE FUNCTION custos_resumo(p_inicio DATE, p_fim DATE)
+RETURNS TABLE (
+    mes DATE, categoria VARCHAR, responsavel VARCHAR, recorrente BOOLEAN,
+    total NUMERIC, quantidade BIGINT
+) AS $$
+    SELECT DATE_TRUNC('month', c.data_custo)::DATE, c.categoria, c.responsavel, c.recorrente,
+           SUM(c.valor), COUNT(*)
+    FROM custos_periodo(p_inicio, p_fim) c
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4;
+$$ LANGUAGE sql STABLE;
+
+-- ========== ROI POR PERÍODO ==========
+
+-- Receita, custo, acumulados e ROI acumulado por dia, semana ou mês.
+-- Agrega vendas e custos no banco e acumula com janelas: trafegam só
+-- O(períodos) linhas. Períodos sem movimento aparecem com zero.
+CREATE OR REPLACE FUNCTION roi_diario(
+    p_inicio DATE, p_fim DATE,
+    p_granularidade TEXT DEFAULT 'day',
+    p_categorias TEXT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    periodo DATE, receita NUMERIC, custo NUMERIC,
+    receita_acumulada NUMERIC, custo_acumulado NUMERIC, roi NUMERIC
+) AS $$
+    WITH params AS (
+        SELECT CASE WHEN p_granularidade IN ('day', 'week', 'month') THEN p_granularidade ELSE 'day' END AS g
+    ),
+    periodos AS (
+        SELECT DISTINCT DATE_TRUNC(params.g, d)::DATE AS periodo
+        FROM params, generate_series(p_inicio, p_fim, INTERVAL '1 day') AS d
+    ),
+    receitas AS (
+        SELECT DATE_TRUNC(params.g, v.data_venda)::DATE AS periodo, SUM(v.valor) AS receita
+        FROM vendas v, params
+        WHERE v.status = 'confirmada' AND v.data_venda BETWEEN p_inicio AND p_fim
+        GROUP BY 1
+    ),
+    gastos AS (
+        SELECT DATE_TRUNC(params.g, c.data_custo)::DATE AS periodo, SUM(c.valor) AS custo
+        FROM custos_periodo(p_inicio, p_fim) c, params
+        WHERE p_categorias IS NULL OR c.categoria = ANY(p_categorias)
+        GROUP BY 1
+    ),
+    serie AS (
+        SELECT
+            p.periodo,
+            COALESCE(r.receita, 0) AS receita,
+            COALESCE(g.custo, 0) AS custo,
+            SUM(COALESCE(r.receita, 0)) OVER w AS receita_acumulada,
+            SUM(COALESCE(g.custo, 0)) OVER w AS custo_acumulado
+        FROM periodos p
+        LEFT JOIN receitas r ON r.periodo = p.periodo
+        LEFT JOIN gastos g ON g.periodo = p.periodo
+        WINDOW w AS (ORDER BY p.periodo ROWS UNBOUNDED PRECEDING)
+    )
+    SELECT
+        s.periodo, s.receita, s.custo, s.receita_acumulada, s.custo_acumulado,
+        CASE WHEN s.custo_acumulado > 0
+             THEN ROUND((s.receita_acumulada - s.custo_acumulado) / s.custo_acumulado * 100, 2)
+        END
+    FROM serie s
+    ORDER BY s.periodo;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION custos_periodo(DATE, DATE) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION custos_resumo(DATE, DATE) TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION roi_diario(DATE, DATE, TEXT, TEXT[]) TO anon, authenticated;
@@ -0,0 +1,346 @@
+-- Particionamento mensal e retenção de activity_logs e webhooks
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql e webhook_schema.sql
+--
+-- O que o script faz:
+--   1. Converte activity_logs (por timestamp) e webhooks (por created_at) em
+--      tabelas particionadas por mês, copiando os dados existentes
+--   2. Cria índices compostos que batem com as consultas do app
+--   3. Cria funções de manutenção de partições usadas pelo job de retenção
+--      (utils/log_retention.py), que arquiva partições frias em Parquet
+--   4. Agenda a criação de partições futuras via pg_cron (se disponível)
+--
+-- As tabelas antigas ficam como activity_logs_legacy / webhooks_legacy.
+-- Depois de conferir as contagens, remova-as manualmente (ver final do script).
+
+-- ========== FUNÇÕES DE MANUTENÇÃO ==========
+
+-- Partições são tabelas comuns: sem isso ficariam expostas pela API REST
+-- (/rest/v1/activity_logs_p202406) fora do RLS da tabela pai. Com RLS ligado,
+-- sem policies e sem grants, só o acesso pela tabela pai funciona.
+CREATE OR REPLACE FUNCTION proteger_particao(p_particao TEXT)
+RETURNS VOID AS $$
+BEGIN
+    EXECUTE FORMAT('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', p_particao);
+    EXECUTE FORMAT('REVOKE ALL ON %I FROM PUBLIC, anon, authenticated', p_particao);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Cria uma partição mensal por mês entre p_inicio e p_fim (inclusive)
+CREATE OR REPLACE FUNCTION criar_particoes_mensais(p_tabela TEXT, p_inicio DATE, p_fim DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    mes DATE := DATE_TRUNC('month', p_inicio)::DATE;
+    particao TEXT;
+    criadas INTEGER := 0;
+BEGIN
+    IF p_tabela NOT IN ('activity_logs', 'webhooks') THEN
+        RAISE EXCEPTION 'Tabela % não é particionada por mês', p_tabela;
+    END IF;
+
+    WHILE mes <= p_fim LOOP
+        particao := FORMAT('%s_p%s', p_tabela, TO_CHAR(mes, 'YYYYMM'));
+
+        IF TO_REGCLASS(particao) IS NULL THEN
+            EXECUTE FORMAT(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                particao, p_tabela, mes, (mes + INTERVAL '1 month')::DATE
+            );
+            PERFORM proteger_particao(particao);
+            criadas := criadas + 1;
+        END IF;
+
+        mes := (mes + INTERVAL '1 month')::DATE;
+    END LOOP;
+
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Garante partições do mês atual até p_meses_frente meses à frente
+CREATE OR REPLACE FUNCTION manter_particoes_futuras(p_meses_frente INTEGER DEFAULT 3)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM criar_particoes_mensais('activity_logs', CURRENT_DATE, (CURRENT_DATE + (p_meses_frente || ' months')::INTERVAL)::DATE);
+    PERFORM criar_particoes_mensais('webhooks', CURRENT_DATE, (CURRENT_DATE + (p_meses_frente || ' months')::INTERVAL)::DATE);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Lista partições inteiramente mais antigas que a janela de retenção
+CREATE OR REPLACE FUNCTION listar_particoes_frias(p_tabela TEXT, p_meses_retencao INTEGER)
+RETURNS TABLE(particao TEXT, mes DATE, linhas BIGINT) AS $$
+DECLARE
+    limite DATE := (DATE_TRUNC('month', CURRENT_DATE) - (p_meses_retencao || ' months')::INTERVAL)::DATE;
+    rec RECORD;
+BEGIN
+    FOR rec IN
+        SELECT c.relname::TEXT AS nome
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = p_tabela
+          AND c.relname ~ ('^' || p_tabela || '_p[0-9]{6}$')
+        ORDER BY c.relname
+    LOOP
+        mes := TO_DATE(RIGHT(rec.nome, 6), 'YYYYMM');
+        IF mes < limite THEN
+            particao := rec.nome;
+            EXECUTE FORMAT('SELECT COUNT(*) FROM %I', rec.nome) INTO linhas;
+            RETURN NEXT;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Desanexa e remove uma partição mensal (chamado após o arquivamento em Parquet)
+CREATE OR REPLACE FUNCTION descartar_particao(p_particao TEXT)
+RETURNS VOID AS $$
+DECLARE
+    tabela TEXT := REGEXP_REPLACE(p_particao, '_p[0-9]{6}$', '');
+BEGIN
+    IF tabela NOT IN ('activity_logs', 'webhooks') OR p_particao !~ '_p[0-9]{6}$' THEN
+        RAISE EXCEPTION 'Partição inválida: %', p_particao;
+    END IF;
+
+    EXECUTE FORMAT('ALTER TABLE %I DETACH PARTITION %I', tabela, p_particao);
+    EXECUTE FORMAT('DROP TABLE %I', p_particao);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- As funções de manutenção rodam como dono das tabelas (SECURITY DEFINER):
+-- o service_role não é dono de activity_logs/webhooks e não conseguiria criar,
+-- proteger ou remover partições. Apenas o job de retenção (service_role) as executa
+REVOKE ALL ON FUNCTION proteger_particao(TEXT) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION criar_particoes_mensais(TEXT, DATE, DATE) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION manter_particoes_futuras(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION listar_particoes_frias(TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION descartar_particao(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION proteger_particao(TEXT) TO service_role;
+GRANT EXECUTE ON FUNCTION criar_particoes_mensais(TEXT, DATE, DATE) TO service_role;
+GRANT EXECUTE ON FUNCTION manter_particoes_futuras(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION listar_particoes_frias(TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION descartar_particao(TEXT) TO service_role;
+
+-- ========== 1. ACTIVITY_LOGS PARTICIONADA ==========
+DO $$
+DECLARE
+    inicio DATE;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'activity_logs'
+    ) THEN
+        RAISE NOTICE 'activity_logs já é particionada - pulando migração';
+        RETURN;
+    END IF;
+
+    ALTER TABLE activity_logs RENAME TO activity_logs_legacy;
+    ALTER INDEX IF EXISTS idx_activity_logs_user RENAME TO idx_activity_logs_legacy_user;
+    ALTER INDEX IF EXISTS idx_activity_logs_timestamp RENAME TO idx_activity_logs_legacy_timestamp;
+
+    -- A chave de partição precisa fazer parte da chave primária
+    CREATE TABLE activity_logs (
+        id UUID DEFAULT uuid_generate_v4(),
+        user_id VARCHAR(50) NOT NULL,
+        action VARCHAR(100) NOT NULL,
+        details TEXT,
+        ip_address INET,
+        user_agent TEXT,
+        timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+
+    -- Linhas fora das partições criadas (ex.: timestamp muito no futuro)
+    CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT;
+    PERFORM proteger_particao('activity_logs_default');
+
+    SELECT COALESCE(MIN(timestamp)::DATE, CURRENT_DATE) INTO inicio FROM activity_logs_legacy;
+    PERFORM criar_particoes_mensais('activity_logs', inicio, (CURRENT_DATE + INTERVAL '3 months')::DATE);
+
+    INSERT INTO activity_logs (id, user_id, action, details, ip_address, user_agent, timestamp)
+    SELECT id, user_id, action, details, ip_address, user_agent, COALESCE(timestamp, NOW())
+    FROM activity_logs_legacy;
+
+    RAISE NOTICE 'activity_logs migrada para tabela particionada';
+END $$;
+
+-- Índices (criados na tabela pai, propagados para todas as partições)
+-- Fallback de get_recent_webhook_events: action = 'webhook_received' ORDER BY timestamp DESC
+CREATE INDEX IF NOT EXISTS idx_activity_logs_action_ts ON activity_logs(action, timestamp DESC);
+-- get_activity_logs(user_id=...) ORDER BY timestamp DESC
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user_ts ON activity_logs(user_id, timestamp DESC);
+-- Listagem geral (últimas atividades)
+CREATE INDEX IF NOT EXISTS idx_activity_logs_ts ON activity_logs(timestamp DESC);
+
+ALTER TABLE activity_logs ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "activity_logs_all" ON activity_logs;
+CREATE POLICY "activity_logs_all" ON activity_logs FOR ALL USING (true) WITH CHECK (true);
+
+-- ========== 2. WEBHOOKS PARTICIONADA ==========
+DO $$
+DECLARE
+    inicio DATE;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table pt
+        JOIN pg_class c ON c.oid = pt.partrelid
+        WHERE c.relname = 'webhooks'
+    ) THEN
+        RAISE NOTICE 'webhooks já é particionada - pulando migração';
+        RETURN;
+    END IF;
+
+    ALTER TABLE webhooks RENAME TO webhooks_legacy;
+    ALTER INDEX IF EXISTS idx_webhooks_source RENAME TO idx_webhooks_legacy_source;
+    ALTER INDEX IF EXISTS idx_webhooks_event_type RENAME TO idx_webhooks_legacy_event_type;
+    ALTER INDEX IF EXISTS idx_webhooks_processed RENAME TO idx_webhooks_legacy_processed;
+    ALTER INDEX IF EXISTS idx_webhooks_created_at RENAME TO idx_webhooks_legacy_created_at;
+    ALTER INDEX IF EXISTS idx_webhooks_status RENAME TO idx_webhooks_legacy_status;
+    DROP TRIGGER IF EXISTS update_webhooks_updated_at ON webhooks_legacy;
+
+    CREATE TABLE webhooks (
+        id UUID DEFAULT uuid_generate_v4(),
+        source VARCHAR(50) NOT NULL DEFAULT 'instagram',
+        event_type VARCHAR(100) NOT NULL,
+        webhook_id VARCHAR(100),
+        object_id VARCHAR(100),
+        data JSONB,
+        signature VARCHAR(255),
+        verified BOOLEAN DEFAULT FALSE,
+        processed BOOLEAN DEFAULT FALSE,
+        processed_at TIMESTAMP WITH TIME ZONE,
+        error_message TEXT,
+        retry_count INTEGER DEFAULT 0,
+        status VARCHAR(20) DEFAULT 'received',
+        created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE TABLE webhooks_default PARTITION OF webhooks DEFAULT;
+    PERFORM proteger_particao('webhooks_default');
+
+    SELECT COALESCE(MIN(created_at)::DATE, CURRENT_DATE) INTO inicio FROM webhooks_legacy;
+    PERFORM criar_particoes_mensais('webhooks', inicio, (CURRENT_DATE + INTERVAL '3 months')::DATE);
+
+    INSERT INTO webhooks
+    SELECT id, source, event_type, webhook_id, object_id, data, signature, verified, processed,
+           processed_at, error_message, retry_count, status, COALESCE(created_at, NOW()), updated_at
+    FROM webhooks_legacy;
+
+    RAISE NOTICE 'webhooks migrada para tabela particionada';
+END $$;
+
+-- get_recent_webhook_events / recent_webhook_events: ORDER BY created_at DESC
+-- update_webhook_daily_stats: source = X AND created_at >= Y AND created_at < Y + 1
+CREATE INDEX IF NOT EXISTS idx_webhooks_source_created ON webhooks(source, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_webhooks_created ON webhooks(created_at DESC);
+-- Reprocessamento de eventos pendentes
+CREATE INDEX IF NOT EXISTS idx_webhooks_pending ON webhooks(created_at) WHERE processed = FALSE;
+
+DROP TRIGGER IF EXISTS update_webhooks_updated_at ON webhooks;
+CREATE TRIGGER update_webhooks_updated_at BEFORE UPDATE ON webhooks
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE webhooks ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "All users can view webhooks" ON webhooks;
+DROP POLICY IF EXISTS "All users can insert webhooks" ON webhooks;
+CREATE POLICY "All users can view webhooks" ON webhooks FOR SELECT USING (true);
+CREATE POLICY "All users can insert webhooks" ON webhooks FOR INSERT WITH CHECK (true);
+
+-- Estatísticas diárias com intervalo em created_at/timestamp (em vez de ::date):
+-- usa os índices acima e lê só a partição do dia
+CREATE OR REPLACE FUNCTION update_webhook_daily_stats(platform_name VARCHAR, stat_date DATE)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO webhook_stats (
+        platform, 
+        date, 
+        events_received,
+        events_processed,
+        leads_created,
+        comments_processed,
+        dms_processed,
+        mentions_processed,
+        errors_count
+    )
+    SELECT 
+        platform_name,
+        stat_date,
+        COUNT(*) as events_received,
+        COUNT(*) FILTER (WHERE processed = true) as events_processed,
+        -- Contar leads criados baseado nos logs
+        (SELECT COUNT(*) FROM activity_logs 
+         WHERE action = 'webhook_lead_created' 
+         AND timestamp >= stat_date AND timestamp < stat_date + 1) as leads_created,
+        COUNT(*) FILTER (WHERE event_type = 'new_comment') as comments_processed,
+        COUNT(*) FILTER (WHERE event_type = 'new_message') as dms_processed,
+        COUNT(*) FILTER (WHERE event_type = 'mention') as mentions_processed,
+        COUNT(*) FILTER (WHERE status = 'error') as errors_count
+    FROM webhooks 
+    WHERE source = platform_name 
+    AND created_at >= stat_date AND created_at < stat_date + 1
+    ON CONFLICT (platform, date) DO UPDATE SET
+        events_received = EXCLUDED.events_received,
+        events_processed = EXCLUDED.events_processed,
+        leads_created = EXCLUDED.leads_created,
+        comments_processed = EXCLUDED.comments_processed,
+        dms_processed = EXCLUDED.dms_processed,
+        mentions_processed = EXCLUDED.mentions_processed,
+        errors_count = EXCLUDED.errors_count,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- A view antiga continuaria apontando para webhooks_legacy
+CREATE OR REPLACE VIEW recent_webhook_events AS
+SELECT
+    id,
+    source,
+    event_type,
+    processed,
+    status,
+    error_message,
+    created_at,
+    data->'from'->>'username' as username,
+    data->'message'->>'text' as message_text,
+    data->'value'->>'text' as comment_text
+FROM webhooks
+ORDER BY created_at DESC
+LIMIT 50;
+
+-- Partições já existentes (criadas antes de proteger_particao)
+DO $$
+DECLARE
+    rec RECORD;
+BEGIN
+    FOR rec IN
+        SELECT c.relname::TEXT AS nome
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname IN ('activity_logs', 'webhooks')
+    LOOP
+        PERFORM proteger_particao(rec.nome);
+    END LOOP;
+END $$;
+
+-- ========== 3. AGENDAMENTO (pg_cron) ==========
+-- Habilite em Database > Extensions > pg_cron. Sem pg_cron, rode
+-- "SELECT manter_particoes_futuras();" uma vez por mês ou deixe o job
+-- utils/log_retention.py fazer isso (ele chama a mesma função).
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule('manter-particoes-logs', '0 3 1 * *', 'SELECT manter_particoes_futuras(3)');
+        RAISE NOTICE 'pg_cron: criação mensal de partições agendada';
+    ELSE
+        RAISE NOTICE 'pg_cron não habilitado - agende manter_particoes_futuras() manualmente';
+    END IF;
+END $$;
+
+-- ========== 4. LIMPEZA (manual, após conferir) ==========
+-- SELECT (SELECT COUNT(*) FROM activity_logs_legacy) AS legado, (SELECT COUNT(*) FROM activity_logs) AS novo;
+-- SELECT (SELECT COUNT(*) FROM webhooks_legacy) AS legado, (SELECT COUNT(*) FROM webhooks) AS novo;
+-- DROP TABLE activity_logs_legacy;
+-- DROP TABLE webhooks_legacy;
@@ -0,0 +1,123 @@
+-- Metas por vendedor e acompanhamento incremental do progresso
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- O faturamento confirmado de cada vendedor no mês fica numa tabela de
+-- totais corrente (metas_progresso), atualizada por trigger a cada venda
+-- inserida, alterada ou removida. Os cards de progresso leem uma linha por
+-- vendedor em vez de somar as vendas, e a notificação de meta atingida é
+-- reservada por uma atualização atômica (dispara uma única vez).
+--
+-- Vendedores são chaveados em minúsculas ('ana'), como na tabela metas.
+
+-- ========== TABELAS ==========
+
+CREATE TABLE IF NOT EXISTS metas_progresso (
+    vendedor VARCHAR(50) NOT NULL,
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL,
+    faturado DECIMAL(12,2) NOT NULL DEFAULT 0,
+    vendas INTEGER NOT NULL DEFAULT 0,
+    notificada_em TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (vendedor, ano, mes)
+);
+
+-- ========== TRIGGER ==========
+
+-- Soma/subtrai a venda confirmada no total do vendedor no mês.
+-- O trigger roda como dono da tabela: o app (anon) só lê metas_progresso
+CREATE OR REPLACE FUNCTION metas_progresso_somar(p_vendedor TEXT, p_data DATE, p_valor NUMERIC, p_vendas INTEGER)
+RETURNS VOID AS $$
+    INSERT INTO metas_progresso (vendedor, ano, mes, faturado, vendas)
+    VALUES (LOWER(p_vendedor), EXTRACT(YEAR FROM p_data)::INT, EXTRACT(MONTH FROM p_data)::INT, p_valor, p_vendas)
+    ON CONFLICT (vendedor, ano, mes) DO UPDATE
+    SET faturado = metas_progresso.faturado + EXCLUDED.faturado,
+        vendas = metas_progresso.vendas + EXCLUDED.vendas,
+        updated_at = NOW();
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION atualizar_metas_progresso()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'confirmada' THEN
+        PERFORM metas_progresso_somar(OLD.vendedor, OLD.data_venda, -OLD.valor, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'confirmada' THEN
+        PERFORM metas_progresso_somar(NEW.vendedor, NEW.data_venda, NEW.valor, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS vendas_metas_progresso ON vendas;
+CREATE TRIGGER vendas_metas_progresso
+    AFTER INSERT OR DELETE OR UPDATE OF status, valor, vendedor, data_venda ON vendas
+    FOR EACH ROW EXECUTE FUNCTION atualizar_metas_progresso();
+
+-- Carga inicial a partir das vendas existentes (pode ser reexecutada)
+INSERT INTO metas_progresso (vendedor, ano, mes, faturado, vendas)
+SELECT LOWER(vendedor), EXTRACT(YEAR FROM data_venda)::INT, EXTRACT(MONTH FROM data_venda)::INT,
+       SUM(valor), COUNT(*)
+FROM vendas
+WHERE status = 'confirmada'
+GROUP BY 1, 2, 3
+ON CONFLICT (vendedor, ano, mes) DO UPDATE
+SET faturado = EXCLUDED.faturado, vendas = EXCLUDED.vendas, updated_at = NOW();
+
+-- ========== PROGRESSO ==========
+
+-- Meta e progresso por vendedor e mês (vendedores com meta ou com vendas)
+CREATE OR REPLACE VIEW metas_status AS
+SELECT
+    COALESCE(m.vendedor, p.vendedor) AS vendedor,
+    COALESCE(m.ano, p.ano) AS ano,
+    COALESCE(m.mes, p.mes) AS mes,
+    m.meta_vendas,
+    m.meta_leads,
+    COALESCE(p.faturado, 0) AS faturado,
+    COALESCE(p.vendas, 0) AS vendas,
+    CASE WHEN m.meta_vendas > 0 THEN ROUND(COALESCE(p.faturado, 0) / m.meta_vendas * 100, 2) END AS percentual,
+    p.notificada_em
+FROM metas m
+FULL JOIN metas_progresso p
+    ON p.vendedor = m.vendedor AND p.ano = m.ano AND p.mes = m.mes;
+
+-- Reserva a notificação de meta atingida: só a primeira chamada após a meta
+-- ser batida recebe TRUE (UPDATE condicional, seguro com sessões concorrentes).
+-- Mês sem meta cadastrada usa a meta padrão do app (METAS_PADRAO, R$ 50.000)
+CREATE OR REPLACE FUNCTION marcar_meta_notificada(p_vendedor TEXT, p_ano INTEGER, p_mes INTEGER)
+RETURNS BOOLEAN AS $$
+    WITH meta AS (
+        SELECT COALESCE(
+            (SELECT m.meta_vendas FROM metas m
+             WHERE m.vendedor = LOWER(p_vendedor) AND m.ano = p_ano AND m.mes = p_mes),
+            50000
+        ) AS valor
+    ),
+    reservada AS (
+        UPDATE metas_progresso p
+        SET notificada_em = NOW()
+        FROM meta
+        WHERE p.vendedor = LOWER(p_vendedor) AND p.ano = p_ano AND p.mes = p_mes
+          AND p.notificada_em IS NULL
+          AND meta.valor > 0
+          AND p.faturado >= meta.valor
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM reservada);
+$$ LANGUAGE sql VOLATILE SECURITY DEFINER SET search_path = public;
+
+-- ========== PERMISSÕES ==========
+
+-- metas_progresso só muda pelo trigger (dono da tabela): pela API é somente leitura
+ALTER TABLE metas_progresso ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "metas_progresso_select_all" ON metas_progresso;
+CREATE POLICY "metas_progresso_select_all" ON metas_progresso
+    FOR SELECT USING (true);
+
+REVOKE INSERT, UPDATE, DELETE, TRUNCATE ON metas_progresso FROM anon, authenticated;
+REVOKE ALL ON FUNCTION metas_progresso_somar(TEXT, DATE, NUMERIC, INTEGER) FROM PUBLIC, anon, authenticated;
+
+GRANT SELECT ON metas_progresso TO anon, authenticated;
+GRANT SELECT ON metas_status TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION marcar_meta_notificada(TEXT, INTEGER, INTEGER) TO anon, authenticated;
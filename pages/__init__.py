@@ -1,2 +1,2 @@
 # Pages package
-from . import overview, vendas, leads, financeiro, config, instagram_analytics
\ No newline at end of file
+# As páginas são importadas sob demanda pelo registro em app.py (PAGES)
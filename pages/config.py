@@ -1,8 +1,12 @@
 import streamlit as st
+import pandas as pd
 import json
 from datetime import datetime
 from utils.database import Database
 from utils.auth import get_current_user
+from utils.profiler import get_perfis, limpar_perfis
+from utils.metas import META_LEADS_PADRAO, progresso_mes
+from utils.realtime import invalidar_frames
 from webhook_handler import get_webhook_url, get_recent_webhook_events, test_webhook_connection
 
 def show_page():
@@ -198,22 +202,32 @@ def show_page():
     with tab2:
         st.markdown("### 🎯 Configuração de Metas")
         
-        # Metas mensais
+        # Metas mensais (tabela metas)
         st.markdown("#### 📊 Metas Mensais")
         
+        hoje = datetime.now().date()
+        proximo_mes = (hoje.replace(day=1) + pd.DateOffset(months=1)).date()
+        mes_meta = st.selectbox("📅 Mês", [hoje.replace(day=1), proximo_mes], format_func=lambda d: d.strftime('%m/%Y'))
+        
+        metas_mes = progresso_mes(db, mes_meta.year, mes_meta.month).set_index('vendedor')
+        meta_leads = pd.to_numeric(metas_mes['meta_leads']).fillna(META_LEADS_PADRAO)
+        sufixo = mes_meta.strftime('%Y_%m')
+        
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("**👤 Meta Ana**")
-            meta_ana_vendas = st.number_input("💰 Meta de Vendas (R$)", value=50000.0, key="meta_ana_vendas")
-            meta_ana_leads = st.number_input("🎯 Meta de Leads", value=100, key="meta_ana_leads")
+            meta_ana_vendas = st.number_input("💰 Meta de Vendas (R$)", value=float(metas_mes.at['ana', 'meta_vendas']), key=f"meta_ana_vendas_{sufixo}")
+            meta_ana_leads = st.number_input("🎯 Meta de Leads", value=int(meta_leads['ana']), key=f"meta_ana_leads_{sufixo}")
             meta_ana_conversao = st.number_input("📈 Meta Conversão (%)", value=15.0, key="meta_ana_conversao")
+            st.caption(f"Progresso: R$ {metas_mes.at['ana', 'faturado']:,.2f} ({metas_mes.at['ana', 'percentual']:.1f}%)")
         
         with col2:
             st.markdown("**👤 Meta Fernando**")
-            meta_fernando_vendas = st.number_input("💰 Meta de Vendas (R$)", value=50000.0, key="meta_fernando_vendas")
-            meta_fernando_leads = st.number_input("🎯 Meta de Leads", value=100, key="meta_fernando_leads")
+            meta_fernando_vendas = st.number_input("💰 Meta de Vendas (R$)", value=float(metas_mes.at['fernando', 'meta_vendas']), key=f"meta_fernando_vendas_{sufixo}")
+            meta_fernando_leads = st.number_input("🎯 Meta de Leads", value=int(meta_leads['fernando']), key=f"meta_fernando_leads_{sufixo}")
             meta_fernando_conversao = st.number_input("📈 Meta Conversão (%)", value=15.0, key="meta_fernando_conversao")
+            st.caption(f"Progresso: R$ {metas_mes.at['fernando', 'faturado']:,.2f} ({metas_mes.at['fernando', 'percentual']:.1f}%)")
         
         # Metas da equipe
         st.markdown("#### 🏢 Metas da Equipe")
@@ -244,8 +258,16 @@ def show_page():
             comissao_lider = st.number_input("👑 Comissão Líder Mensal (%)", value=35.0, min_value=0.0, max_value=100.0)
         
         if st.button("💾 Salvar Metas", type="primary", use_container_width=True):
-            st.success("✅ Metas atualizadas com sucesso!")
-            db.log_activity(user_info.get('username', ''), 'Metas Atualizadas', 'Configurações de metas modificadas')
+            salvas = db.salvar_metas([
+                {'vendedor': 'ana', 'ano': mes_meta.year, 'mes': mes_meta.month,
+                 'meta_vendas': meta_ana_vendas, 'meta_leads': int(meta_ana_leads)},
+                {'vendedor': 'fernando', 'ano': mes_meta.year, 'mes': mes_meta.month,
+                 'meta_vendas': meta_fernando_vendas, 'meta_leads': int(meta_fernando_leads)}
+            ])
+            if salvas:
+                invalidar_frames('metas')
+                st.success("✅ Metas atualizadas com sucesso!")
+                db.log_activity(user_info.get('username', ''), 'Metas Atualizadas', f"Metas de {mes_meta.strftime('%m/%Y')} modificadas")
     
     # ========== TAB 3: USUÁRIOS ==========
     with tab3:
@@ -398,6 +420,9 @@ def show_page():
             if st.button("📊 Estatísticas do DB", use_container_width=True):
                 st.info("📈 Total de registros: 1.247")
         
+        # Snapshots colunares
+        show_snapshots(db)
+        
         # Logs do sistema
         st.markdown("#### 📝 Logs do Sistema")
         
@@ -439,13 +464,18 @@ def show_page():
         col1, col2 = st.columns(2)
         
         with col1:
-            debug_mode = st.checkbox("🐛 Modo Debug", value=False)
+            debug_mode = st.checkbox("🐛 Modo Debug", value=st.session_state.get('debug_mode', False),
+                                     help="Exibe o tempo de renderização de cada página por fase")
+            st.session_state['debug_mode'] = debug_mode
             verbose_logs = st.checkbox("📝 Logs Verbosos", value=False)
         
         with col2:
             mock_data = st.checkbox("🎭 Usar Dados Mock", value=True)
             test_mode = st.checkbox("🧪 Modo de Teste", value=False)
         
+        if debug_mode:
+            show_render_profiles()
+        
         # Informações do sistema
         st.markdown("#### ℹ️ Informações do Sistema")
         
@@ -640,4 +670,119 @@ def show_page():
         
         if st.button("💾 Salvar Configurações de Webhook", type="primary", use_container_width=True):
             st.success("✅ Configurações de webhook salvas!")
-            db.log_activity(user_info.get('username', ''), 'Webhook Config', 'Configurações de webhook modificadas')
\ No newline at end of file
+            db.log_activity(user_info.get('username', ''), 'Webhook Config', 'Configurações de webhook modificadas')
+
+
+def show_render_profiles():
+    """Exibe os tempos de renderização medidos nesta sessão (Modo Debug)"""
+    st.markdown("##### ⏱️ Tempo de Renderização por Página")
+    
+    usar_cprofile = st.checkbox(
+        "🔬 Gravar cProfile a cada rerun",
+        value=st.session_state.get('debug_cprofile', False),
+        help="Adiciona overhead; use apenas para investigar uma página lenta"
+    )
+    st.session_state['debug_cprofile'] = usar_cprofile
+    
+    perfis = get_perfis()
+    
+    if not perfis:
+        st.info("⏱️ Navegue pelas páginas para coletar medições")
+        return
+    
+    perfis_df = pd.DataFrame(perfis[::-1]).drop(columns=['cprofile'])
+    
+    st.dataframe(
+        perfis_df,
+        column_config={
+            'pagina': st.column_config.TextColumn('Página'),
+            'inicio': st.column_config.TextColumn('Hora'),
+            'total_ms': st.column_config.NumberColumn('Total (ms)', format="%.1f"),
+            'dados_ms': st.column_config.NumberColumn('Dados (ms)', format="%.1f"),
+            'calculo_ms': st.column_config.NumberColumn('Cálculo (ms)', format="%.1f"),
+            'graficos_ms': st.column_config.NumberColumn('Gráficos (ms)', format="%.1f"),
+            'consultas': st.column_config.NumberColumn('Consultas'),
+            'graficos': st.column_config.NumberColumn('Gráficos')
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    # Média por página
+    media = perfis_df.groupby('pagina')[['total_ms', 'dados_ms', 'calculo_ms', 'graficos_ms']].mean().round(1)
+    st.caption("Média por página (ms)")
+    st.dataframe(media, use_container_width=True)
+    
+    ultimo_dump = next((p for p in reversed(perfis) if p.get('cprofile')), None)
+    if ultimo_dump:
+        with st.expander(f"🔬 cProfile - {ultimo_dump['pagina']} às {ultimo_dump['inicio']}"):
+            st.code(ultimo_dump['cprofile'], language="text")
+    
+    if st.button("🧹 Limpar Medições", use_container_width=True):
+        limpar_perfis()
+        st.rerun()
+
+
+def show_snapshots(db):
+    """Exportação de snapshots Parquet/Arrow e modo somente leitura a partir deles"""
+    from utils.exports import ExportManager
+    from utils.snapshots import TABELAS_BANCO, FORMATOS, paginas_tabela, raiz_snapshots, resolver_diretorio
+    
+    st.markdown("#### 📦 Snapshots (Parquet / Arrow)")
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    
+    with col1:
+        tabela = st.selectbox("🗂️ Tabela", list(TABELAS_BANCO), key="snapshot_tabela")
+    
+    with col2:
+        formato = st.selectbox("📄 Formato", list(FORMATOS), key="snapshot_formato")
+    
+    with col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        exportar = st.button("📦 Gerar Snapshot", use_container_width=True, disabled=not db.is_connected())
+    
+    if exportar:
+        with st.spinner(f"📦 Exportando {tabela}..."):
+            paginas = db.iter_vendas() if tabela == 'vendas' else paginas_tabela(db.supabase, tabela)
+            try:
+                caminho, filename, mime = ExportManager().export_snapshot(tabela, paginas, formato=formato)
+            except Exception as e:
+                st.error(f"❌ Erro ao exportar {tabela}: {e}")
+                caminho = None
+        
+        if caminho:
+            with open(caminho, "rb") as arquivo:
+                st.download_button(label=f"💾 Download {filename}", data=arquivo, file_name=filename, mime=mime)
+    
+    # Modo snapshot: páginas leem dos arquivos em vez do Supabase
+    snapshot_atual = st.session_state.get('snapshot_dir', '')
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        diretorio = st.text_input(
+            "📂 Diretório de snapshots",
+            value=snapshot_atual,
+            placeholder="2024-06",
+            help=f"Subpasta de `{raiz_snapshots()}` com vendas*.parquet, leads*.parquet... "
+                 "gerados por `python -m utils.snapshots`"
+        )
+    
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if snapshot_atual:
+            if st.button("🔌 Voltar ao Supabase", use_container_width=True):
+                del st.session_state['snapshot_dir']
+                st.rerun()
+        elif st.button("📦 Usar Snapshot", use_container_width=True):
+            # Só subpastas da raiz de snapshots (sem caminhos arbitrários do servidor)
+            caminho = resolver_diretorio(diretorio) if diretorio else None
+            if caminho:
+                st.session_state['snapshot_dir'] = caminho
+                st.rerun()
+            else:
+                st.error(f"❌ Diretório não encontrado em `{raiz_snapshots()}`")
+    
+    if snapshot_atual:
+        st.info(f"🔒 Dashboards em modo somente leitura usando `{snapshot_atual}`")
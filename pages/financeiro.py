@@ -3,8 +3,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import numpy as np
-from utils.database import Database
+from utils.database import get_database
+from utils.timeseries import reduzir_serie
+from utils.cashflow import MAX_PARCELAS, expandir_recebiveis, fluxo_diario
+from utils.forecasting import CAMINHOS_PADRAO, CENARIOS, ajustar_modelo, projetar
+from utils.charts import nome_template
+from utils.comparacoes import comparar
+from utils.realtime import memo_versao
+from utils.report_jobs import solicitar_relatorio, mostrar_relatorio
+
+CATEGORIAS_CUSTO = ["Anúncios", "Ferramentas", "Salários", "Operacional", "Treinamento", "Outros"]
+RESPONSAVEIS_CUSTO = ["Ana", "Fernando", "Empresa"]
 
 def show_page():
     """Página Financeiro - ROI, custos e projeções"""
@@ -13,7 +22,7 @@ def show_page():
     st.markdown("**Custos, ROI, projeções e saúde financeira do negócio**")
     
     # Inicializar database
-    db = Database()
+    db = get_database()
     
     # Tabs principais
     tab1, tab2, tab3, tab4, tab5 = st.tabs(["💰 ROI", "📊 Custos", "📈 Projeções", "💸 Fluxo de Caixa", "📋 Relatórios"])
@@ -30,9 +39,7 @@ def show_page():
             ])
         
         with col2:
-            incluir_custos = st.multiselect("💸 Incluir Custos", [
-                "Anúncios", "Ferramentas", "Salários", "Operacional", "Todos"
-            ], default=["Todos"])
+            incluir_custos = st.multiselect("💸 Incluir Custos", CATEGORIAS_CUSTO + ["Todos"], default=["Todos"])
         
         # Calcular período
         hoje = datetime.now().date()
@@ -45,30 +52,16 @@ def show_page():
         else:  # Este Ano
             data_inicio = hoje.replace(month=1, day=1)
         
-        # Buscar dados
-        vendas_df = db.get_vendas(data_inicio, hoje)
-        
-        # Calcular receitas
-        vendas_confirmadas = vendas_df[vendas_df['status'] == 'confirmada'] if not vendas_df.empty else pd.DataFrame()
-        receita_total = vendas_confirmadas['valor'].sum() if not vendas_confirmadas.empty else 0
-        
-        # Simular custos (em produção, viria do banco)
-        custos_simulados = {
-            "Anúncios": 8500.00,
-            "Ferramentas": 1200.00,
-            "Salários": 15000.00,
-            "Operacional": 3500.00
-        }
-        
-        if "Todos" in incluir_custos:
-            custo_total = sum(custos_simulados.values())
-        else:
-            custo_total = sum(custos_simulados[custo] for custo in incluir_custos if custo in custos_simulados)
+        # Receita e custos do período e da janela anterior de mesmo tamanho numa
+        # única consulta agregada (custos recorrentes expandidos no banco)
+        categorias = None if "Todos" in incluir_custos else incluir_custos
+        comparacao = comparar(db, data_inicio, hoje, categorias)
+        receita_total = comparacao.valor('faturamento')
+        custo_total = comparacao.valor('custos')
         
         # Calcular ROI
-        lucro_liquido = receita_total - custo_total
-        roi_pct = (lucro_liquido / custo_total * 100) if custo_total > 0 else 0
-        margem_lucro = (lucro_liquido / receita_total * 100) if receita_total > 0 else 0
+        roi_pct = comparacao.valor('roi')
+        margem_lucro = comparacao.valor('margem')
         
         # Métricas principais
         col1, col2, col3, col4 = st.columns(4)
@@ -77,14 +70,14 @@ def show_page():
             st.metric(
                 "💰 Receita Total",
                 f"R$ {receita_total:,.2f}",
-                delta=f"+{receita_total * 0.15:.0f} vs período anterior"
+                delta=comparacao.delta('faturamento')
             )
         
         with col2:
             st.metric(
                 "💸 Custo Total",
                 f"R$ {custo_total:,.2f}",
-                delta=f"-{custo_total * 0.05:.0f} vs período anterior",
+                delta=comparacao.delta('custos'),
                 delta_color="inverse"
             )
         
@@ -92,41 +85,43 @@ def show_page():
             st.metric(
                 "📈 ROI",
                 f"{roi_pct:.1f}%",
-                delta=f"+{abs(roi_pct) * 0.1:.1f}% vs período anterior"
+                delta=comparacao.delta('roi', 'pontos')
             )
         
         with col4:
             st.metric(
                 "💎 Margem de Lucro",
                 f"{margem_lucro:.1f}%",
-                delta=f"+{abs(margem_lucro) * 0.08:.1f}% vs período anterior"
+                delta=comparacao.delta('margem', 'pontos')
             )
         
         # Gráfico de ROI
         st.markdown("#### 📊 Evolução do ROI")
         
-        # Simular dados históricos de ROI
-        datas_roi = pd.date_range(start=data_inicio, end=hoje, freq='D')
-        roi_historico = []
-        
-        for i, data in enumerate(datas_roi):
-            # Simular ROI com tendência crescente
-            roi_dia = 150 + (i * 2) + np.random.normal(0, 20)
-            roi_historico.append({
-                'Data': data,
-                'ROI': max(roi_dia, 50),  # ROI mínimo de 50%
-                'Receita': receita_total * (i + 1) / len(datas_roi),
-                'Custo': custo_total * (i + 1) / len(datas_roi)
-            })
-        
-        df_roi = pd.DataFrame(roi_historico)
+        # Série real agregada no banco (acumulados por janela); períodos
+        # longos vêm por semana ou mês para manter poucos pontos
+        dias_periodo = (hoje - data_inicio).days + 1
+        if dias_periodo <= 92:
+            granularidade = 'day'
+        elif dias_periodo <= 400:
+            granularidade = 'week'
+        else:
+            granularidade = 'month'
+        df_roi = db.get_roi_diario(data_inicio, hoje, granularidade, categorias)
         
-        fig = px.line(
-            df_roi,
-            x='Data',
-            y='ROI',
-            title="Evolução do ROI (%)",
-            color_discrete_sequence=['#06FFA5']
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=df_roi['periodo'], y=df_roi['roi'],
+            mode='lines+markers' if granularidade != 'day' else 'lines',
+            line=dict(color='#06FFA5', width=3), name='ROI acumulado',
+            customdata=df_roi[['receita_acumulada', 'custo_acumulado']],
+            hovertemplate="%{x|%d/%m/%Y}<br>ROI: %{y:.1f}%<br>"
+                          "Receita: R$ %{customdata[0]:,.2f}<br>Custo: R$ %{customdata[1]:,.2f}<extra></extra>"
+        ))
+        fig.update_layout(
+            title="Evolução do ROI acumulado (%)" + {'day': "", 'week': " - semanal", 'month': " - mensal"}[granularidade],
+            xaxis_title="Data",
+            yaxis_title="ROI (%)"
         )
         
         # Adicionar linha de meta de ROI
@@ -138,46 +133,53 @@ def show_page():
         )
         
         fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
+            template=nome_template()
         )
         st.plotly_chart(fig, use_container_width=True)
         
         # Breakdown de custos
         st.markdown("#### 💸 Breakdown de Custos")
         
-        custos_df = pd.DataFrame(list(custos_simulados.items()), columns=['Categoria', 'Valor'])
-        custos_df['Percentual'] = (custos_df['Valor'] / custos_df['Valor'].sum() * 100).round(1)
+        custos_resumo = db.get_custos_resumo(data_inicio, hoje)
+        if categorias is not None:
+            custos_resumo = custos_resumo[custos_resumo['categoria'].isin(categorias)]
         
-        col1, col2 = st.columns(2)
+        custos_df = (custos_resumo.groupby('categoria', as_index=False)['total'].sum()
+                     .rename(columns={'categoria': 'Categoria', 'total': 'Valor'})
+                     .sort_values('Valor', ascending=False))
+        custos_por_categoria = dict(zip(custos_df['Categoria'], custos_df['Valor'].astype(float)))
         
-        with col1:
-            fig = px.pie(
-                custos_df,
-                values='Valor',
-                names='Categoria',
-                title="Distribuição de Custos",
-                color_discrete_sequence=['#9D4EDD', '#06FFA5', '#0EA5E9', '#F97316']
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.dataframe(
-                custos_df,
-                column_config={
-                    'Categoria': st.column_config.TextColumn('Categoria'),
-                    'Valor': st.column_config.NumberColumn('Valor (R$)', format="R$ %.2f"),
-                    'Percentual': st.column_config.NumberColumn('% do Total', format="%.1f%%")
-                },
-                hide_index=True,
-                use_container_width=True
-            )
+        if custos_df.empty:
+            st.info("💸 Nenhum custo lançado no período")
+        else:
+            custos_df['Percentual'] = (custos_df['Valor'] / custos_df['Valor'].sum() * 100).round(1)
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                fig = px.pie(
+                    custos_df,
+                    values='Valor',
+                    names='Categoria',
+                    title="Distribuição de Custos",
+                    color_discrete_sequence=['#9D4EDD', '#06FFA5', '#0EA5E9', '#F97316']
+                )
+                fig.update_layout(
+                    template=nome_template()
+                )
+                st.plotly_chart(fig, use_container_width=True)
+            
+            with col2:
+                st.dataframe(
+                    custos_df,
+                    column_config={
+                        'Categoria': st.column_config.TextColumn('Categoria'),
+                        'Valor': st.column_config.NumberColumn('Valor (R$)', format="R$ %.2f"),
+                        'Percentual': st.column_config.NumberColumn('% do Total', format="%.1f%%")
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
     
     # ========== TAB 2: CUSTOS ==========
     with tab2:
@@ -190,88 +192,110 @@ def show_page():
                 
                 with col1:
                     descricao = st.text_input("📝 Descrição", placeholder="Ex: Facebook Ads Janeiro")
-                    categoria = st.selectbox("🏷️ Categoria", [
-                        "Anúncios", "Ferramentas", "Salários", "Operacional", "Treinamento", "Outros"
-                    ])
+                    categoria = st.selectbox("🏷️ Categoria", CATEGORIAS_CUSTO)
                     valor = st.number_input("💰 Valor", min_value=0.0, step=10.0)
                 
                 with col2:
                     data_custo = st.date_input("📅 Data", value=datetime.now().date())
-                    responsavel = st.selectbox("👤 Responsável", ["Ana", "Fernando", "Empresa"])
-                    recorrente = st.checkbox("🔄 Custo Recorrente")
+                    responsavel = st.selectbox("👤 Responsável", RESPONSAVEIS_CUSTO)
+                    recorrente = st.checkbox("🔄 Custo Recorrente", help="Cobrado todo mês a partir da data informada")
+                    recorrente_fim = st.date_input("🏁 Última cobrança (opcional)", value=None,
+                                                   help="Deixe vazio para recorrência sem fim")
                 
                 if st.form_submit_button("💾 Salvar Custo", type="primary"):
-                    st.success("✅ Custo adicionado com sucesso!")
+                    if not descricao or valor <= 0:
+                        st.error("❌ Descrição e valor são obrigatórios!")
+                    else:
+                        # Recorrentes são gravados uma vez; as cobranças mensais
+                        # são geradas na consulta de cada período (custos_periodo)
+                        custo_data = {
+                            'descricao': descricao,
+                            'categoria': categoria,
+                            'valor': valor,
+                            'data_custo': data_custo.isoformat(),
+                            'responsavel': responsavel,
+                            'recorrente': recorrente,
+                            'recorrente_fim': recorrente_fim.isoformat() if recorrente and recorrente_fim else None
+                        }
+                        
+                        if db.add_custo(custo_data):
+                            st.success("✅ Custo adicionado com sucesso!")
+                            st.rerun()
+                        else:
+                            st.error("❌ Erro ao adicionar custo")
         
         # Lista de custos
         st.markdown("#### 📋 Custos do Mês")
         
-        # Simular dados de custos
-        custos_detalhados = [
-            {"Data": "2024-02-01", "Descrição": "Facebook Ads", "Categoria": "Anúncios", "Valor": 3500.00, "Responsável": "Ana"},
-            {"Data": "2024-02-01", "Descrição": "Google Ads", "Categoria": "Anúncios", "Valor": 5000.00, "Responsável": "Fernando"},
-            {"Data": "2024-02-05", "Descrição": "Streamlit Pro", "Categoria": "Ferramentas", "Valor": 200.00, "Responsável": "Empresa"},
-            {"Data": "2024-02-05", "Descrição": "Supabase Pro", "Categoria": "Ferramentas", "Valor": 100.00, "Responsável": "Empresa"},
-            {"Data": "2024-02-01", "Descrição": "Salário Ana", "Categoria": "Salários", "Valor": 7500.00, "Responsável": "Empresa"},
-            {"Data": "2024-02-01", "Descrição": "Salário Fernando", "Categoria": "Salários", "Valor": 7500.00, "Responsável": "Empresa"},
-            {"Data": "2024-02-10", "Descrição": "Hospedagem", "Categoria": "Operacional", "Valor": 300.00, "Responsável": "Empresa"},
-            {"Data": "2024-02-15", "Descrição": "Material de Marketing", "Categoria": "Operacional", "Valor": 800.00, "Responsável": "Ana"},
-        ]
-        
-        custos_df = pd.DataFrame(custos_detalhados)
-        custos_df['Data'] = pd.to_datetime(custos_df['Data']).dt.strftime('%d/%m/%Y')
-        
-        # Filtros
+        # Filtros (aplicados na consulta)
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            filtro_categoria = st.selectbox("🏷️ Filtrar Categoria", 
-                                          ["Todas"] + custos_df['Categoria'].unique().tolist())
+            filtro_categoria = st.selectbox("🏷️ Filtrar Categoria", ["Todas"] + CATEGORIAS_CUSTO)
         
         with col2:
-            filtro_responsavel = st.selectbox("👤 Filtrar Responsável",
-                                           ["Todos"] + custos_df['Responsável'].unique().tolist())
+            filtro_responsavel = st.selectbox("👤 Filtrar Responsável", ["Todos"] + RESPONSAVEIS_CUSTO)
         
         with col3:
             ordenar_por = st.selectbox("🔄 Ordenar por", ["Data", "Valor", "Categoria"])
         
-        # Aplicar filtros
-        custos_filtrados = custos_df.copy()
-        
-        if filtro_categoria != "Todas":
-            custos_filtrados = custos_filtrados[custos_filtrados['Categoria'] == filtro_categoria]
-        
-        if filtro_responsavel != "Todos":
-            custos_filtrados = custos_filtrados[custos_filtrados['Responsável'] == filtro_responsavel]
-        
-        # Exibir tabela
-        st.dataframe(
-            custos_filtrados,
-            column_config={
-                'Data': st.column_config.TextColumn('Data'),
-                'Descrição': st.column_config.TextColumn('Descrição'),
-                'Categoria': st.column_config.TextColumn('Categoria'),
-                'Valor': st.column_config.NumberColumn('Valor (R$)', format="R$ %.2f"),
-                'Responsável': st.column_config.TextColumn('Responsável')
-            },
-            hide_index=True,
-            use_container_width=True
-        )
-        
-        # Resumo de custos
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            total_custos = custos_filtrados['Valor'].sum()
-            st.metric("💸 Total Filtrado", f"R$ {total_custos:,.2f}")
+        inicio_mes = hoje.replace(day=1)
+        fim_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
         
-        with col2:
-            media_custos = custos_filtrados['Valor'].mean()
-            st.metric("📊 Custo Médio", f"R$ {media_custos:,.2f}")
+        custos_mes = db.get_custos(
+            inicio_mes, fim_mes,
+            categoria=filtro_categoria if filtro_categoria != "Todas" else None,
+            responsavel=filtro_responsavel if filtro_responsavel != "Todos" else None
+        )
         
-        with col3:
-            maior_custo = custos_filtrados['Valor'].max()
-            st.metric("📈 Maior Custo", f"R$ {maior_custo:,.2f}")
+        if custos_mes.empty:
+            st.info("💸 Nenhum custo lançado neste mês")
+        else:
+            custos_filtrados = pd.DataFrame({
+                'Data': pd.to_datetime(custos_mes['data_custo']),
+                'Descrição': custos_mes['descricao'],
+                'Categoria': custos_mes['categoria'],
+                'Valor': pd.to_numeric(custos_mes['valor']),
+                'Responsável': custos_mes['responsavel'],
+                'Recorrente': custos_mes['recorrente'].fillna(False).astype(bool)
+            })
+            
+            if ordenar_por == "Valor":
+                custos_filtrados = custos_filtrados.sort_values('Valor', ascending=False)
+            elif ordenar_por == "Categoria":
+                custos_filtrados = custos_filtrados.sort_values(['Categoria', 'Data'])
+            else:
+                custos_filtrados = custos_filtrados.sort_values('Data', ascending=False)
+            
+            # Exibir tabela
+            st.dataframe(
+                custos_filtrados,
+                column_config={
+                    'Data': st.column_config.DateColumn('Data', format="DD/MM/YYYY"),
+                    'Descrição': st.column_config.TextColumn('Descrição'),
+                    'Categoria': st.column_config.TextColumn('Categoria'),
+                    'Valor': st.column_config.NumberColumn('Valor (R$)', format="R$ %.2f"),
+                    'Responsável': st.column_config.TextColumn('Responsável'),
+                    'Recorrente': st.column_config.CheckboxColumn('🔄 Recorrente')
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+            
+            # Resumo de custos
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                total_custos = custos_filtrados['Valor'].sum()
+                st.metric("💸 Total Filtrado", f"R$ {total_custos:,.2f}")
+            
+            with col2:
+                media_custos = custos_filtrados['Valor'].mean()
+                st.metric("📊 Custo Médio", f"R$ {media_custos:,.2f}")
+            
+            with col3:
+                maior_custo = custos_filtrados['Valor'].max()
+                st.metric("📈 Maior Custo", f"R$ {maior_custo:,.2f}")
     
     # ========== TAB 3: PROJEÇÕES ==========
     with tab3:
@@ -289,52 +313,34 @@ def show_page():
                 "Conservador", "Realista", "Otimista"
             ])
         
-        # Buscar dados históricos
-        vendas_df = db.get_vendas()
-        
-        if not vendas_df.empty:
-            vendas_confirmadas = vendas_df[vendas_df['status'] == 'confirmada']
-            
-            # Calcular médias históricas
-            receita_media_dia = vendas_confirmadas['valor'].sum() / 30  # Assumindo 30 dias de dados
-            crescimento_base = {
-                "Conservador": 0.05,  # 5% ao mês
-                "Realista": 0.15,     # 15% ao mês  
-                "Otimista": 0.25      # 25% ao mês
-            }
-            
-            crescimento = crescimento_base[cenario]
-            
-            # Calcular projeção
-            if periodo_projecao == "Próximos 30 dias":
-                dias = 30
-            elif periodo_projecao == "Próximos 3 meses":
-                dias = 90
-            elif periodo_projecao == "Próximos 6 meses":
-                dias = 180
-            else:  # Próximo ano
-                dias = 365
-            
-            # Gerar projeção
-            datas_projecao = pd.date_range(start=datetime.now().date(), periods=dias, freq='D')
-            projecao = []
-            
-            for i, data in enumerate(datas_projecao):
-                # Simular crescimento progressivo
-                fator_crescimento = (1 + crescimento) ** (i / 30)  # Crescimento mensal
-                receita_dia = receita_media_dia * fator_crescimento * (0.8 + 0.4 * np.random.random())
-                
-                projecao.append({
-                    'Data': data,
-                    'Receita_Projetada': receita_dia,
-                    'Receita_Acumulada': sum([p['Receita_Projetada'] for p in projecao]) + receita_dia,
-                    'Cenario': cenario
-                })
-            
-            df_projecao = pd.DataFrame(projecao)
+        # Calcular projeção
+        if periodo_projecao == "Próximos 30 dias":
+            dias = 30
+        elif periodo_projecao == "Próximos 3 meses":
+            dias = 90
+        elif periodo_projecao == "Próximos 6 meses":
+            dias = 180
+        else:  # Próximo ano
+            dias = 365
+        
+        # Tendência e sazonalidade ajustadas na receita diária real; os
+        # cenários são percentis de uma simulação Monte Carlo (seed fixa).
+        # Histórico e simulação só são refeitos quando as vendas, o horizonte
+        # ou o dia mudam (widgets das outras abas reaproveitam o resultado)
+        def ajustar_e_projetar():
+            vendas_df = db.get_vendas()
+            if vendas_df.empty:
+                return None
+            modelo = ajustar_modelo(vendas_df[vendas_df['status'] == 'confirmada'])
+            return modelo, projetar(modelo, dias)
+        
+        projecao = memo_versao(('projecao', dias, datetime.now().date()), ('vendas',), ajustar_e_projetar)
+        
+        if projecao is not None:
+            modelo, df_projecao = projecao
             
             # Métricas da projeção
-            receita_projetada_total = df_projecao['Receita_Projetada'].sum()
+            receita_projetada_total = df_projecao[f"{cenario}_Acumulada"].iloc[-1]
             receita_projetada_mensal = receita_projetada_total / (dias / 30)
             
             col1, col2, col3 = st.columns(3)
@@ -358,19 +364,35 @@ def show_page():
                     f"R$ {lucro_projetado:,.2f}"
                 )
             
-            # Gráfico de projeção
-            fig = px.line(
-                df_projecao,
-                x='Data',
-                y='Receita_Acumulada',
-                title=f"Projeção de Receita - Cenário {cenario}",
-                color_discrete_sequence=['#06FFA5']
+            st.caption(
+                f"📐 Base: {modelo.dias_historico} dias de histórico · tendência de "
+                f"R$ {modelo.tendencia * 30:+,.2f}/mês na receita diária · "
+                f"{CAMINHOS_PADRAO:,} simulações"
             )
             
+            # Gráfico de projeção (faixa Conservador–Otimista e cenário escolhido)
+            serie = reduzir_serie(df_projecao, 'Data', [f"{c}_Acumulada" for c in CENARIOS])
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=serie['Data'], y=serie['Otimista_Acumulada'],
+                mode='lines', line=dict(width=0), name='Otimista (P90)'
+            ))
+            fig.add_trace(go.Scatter(
+                x=serie['Data'], y=serie['Conservador_Acumulada'],
+                mode='lines', line=dict(width=0), fill='tonexty',
+                fillcolor='rgba(6, 255, 165, 0.2)', name='Conservador (P10)'
+            ))
+            fig.add_trace(go.Scatter(
+                x=serie['Data'], y=serie[f"{cenario}_Acumulada"],
+                mode='lines', line=dict(color='#06FFA5', width=3), name=cenario
+            ))
+            
             fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+                title=f"Projeção de Receita - Cenário {cenario}",
+                xaxis_title="Data",
+                yaxis_title="Receita Acumulada",
+                template=nome_template()
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -378,13 +400,12 @@ def show_page():
             st.markdown("#### 🎯 Comparação de Cenários")
             
             cenarios_comparacao = []
-            for cent in ["Conservador", "Realista", "Otimista"]:
-                cresc = crescimento_base[cent]
-                receita_total = receita_media_dia * dias * (1 + cresc)
+            for cent, percentil in CENARIOS.items():
+                receita_total = df_projecao[f"{cent}_Acumulada"].iloc[-1]
                 
                 cenarios_comparacao.append({
                     'Cenário': cent,
-                    'Crescimento Mensal': f"{cresc*100:.0f}%",
+                    'Percentil': f"P{percentil}",
                     'Receita Projetada': f"R$ {receita_total:,.2f}",
                     'Lucro Estimado': f"R$ {receita_total * 0.6:,.2f}"
                 })
@@ -402,41 +423,36 @@ def show_page():
     with tab4:
         st.markdown("### 💸 Fluxo de Caixa")
         
-        # Simular dados de fluxo de caixa
-        hoje = datetime.now().date()
-        datas_fluxo = pd.date_range(start=hoje - timedelta(days=30), end=hoje + timedelta(days=30), freq='D')
+        col1, col2 = st.columns(2)
         
-        fluxo_caixa = []
-        saldo_acumulado = 50000  # Saldo inicial
+        with col1:
+            horizonte = st.selectbox("🔮 Projetar", [
+                "Próximos 30 dias", "Próximos 3 meses", "Próximos 6 meses", "Próximo ano"
+            ])
         
-        for data in datas_fluxo:
-            if data.date() <= hoje:
-                # Dados históricos
-                entrada = np.random.normal(2000, 500) if np.random.random() > 0.3 else 0
-                saida = np.random.normal(800, 200)
-            else:
-                # Projeção futura
-                entrada = np.random.normal(2500, 600) if np.random.random() > 0.2 else 0
-                saida = np.random.normal(900, 250)
-            
-            saldo_dia = entrada - saida
-            saldo_acumulado += saldo_dia
-            
-            fluxo_caixa.append({
-                'Data': data,
-                'Entradas': max(entrada, 0),
-                'Saidas': max(saida, 0),
-                'Saldo_Dia': saldo_dia,
-                'Saldo_Acumulado': saldo_acumulado,
-                'Tipo': 'Histórico' if data.date() <= hoje else 'Projeção'
-            })
+        with col2:
+            saldo_inicial = st.number_input("🏦 Saldo em caixa há 30 dias (R$)", value=0.0, step=1000.0)
+        
+        dias_projecao = {"Próximos 30 dias": 30, "Próximos 3 meses": 90, "Próximos 6 meses": 180, "Próximo ano": 365}[horizonte]
+        inicio_fluxo = hoje - timedelta(days=30)
+        fim_fluxo = hoje + timedelta(days=dias_projecao)
+        
+        # Recebíveis: vendas antigas ainda pagam parcelas dentro da janela.
+        # Busca e expansão só são refeitas quando vendas/custos ou o dia mudam
+        recebiveis = memo_versao(
+            ('recebiveis', hoje), ('vendas',),
+            lambda: expandir_recebiveis(db.get_vendas(inicio_fluxo - timedelta(days=31 * MAX_PARCELAS), hoje))
+        )
+        pagamentos = memo_versao(('pagamentos', inicio_fluxo, fim_fluxo), ('custos',),
+                                 lambda: db.get_custos(inicio_fluxo, fim_fluxo))
         
-        df_fluxo = pd.DataFrame(fluxo_caixa)
+        df_fluxo = fluxo_diario(recebiveis, pagamentos, inicio_fluxo, fim_fluxo, saldo_inicial, hoje)
         
         # Métricas do fluxo
         col1, col2, col3, col4 = st.columns(4)
         
         saldo_atual = df_fluxo[df_fluxo['Tipo'] == 'Histórico']['Saldo_Acumulado'].iloc[-1]
+        entradas_futuras = df_fluxo[df_fluxo['Tipo'] == 'Projeção']['Entradas'].sum()
         entradas_mes = df_fluxo[df_fluxo['Tipo'] == 'Histórico']['Entradas'].sum()
         saidas_mes = df_fluxo[df_fluxo['Tipo'] == 'Histórico']['Saidas'].sum()
         saldo_projetado = df_fluxo['Saldo_Acumulado'].iloc[-1]
@@ -457,7 +473,7 @@ def show_page():
         fig = go.Figure()
         
         # Histórico
-        historico = df_fluxo[df_fluxo['Tipo'] == 'Histórico']
+        historico = reduzir_serie(df_fluxo[df_fluxo['Tipo'] == 'Histórico'], 'Data', 'Saldo_Acumulado')
         fig.add_trace(go.Scatter(
             x=historico['Data'],
             y=historico['Saldo_Acumulado'],
@@ -467,7 +483,7 @@ def show_page():
         ))
         
         # Projeção
-        projecao = df_fluxo[df_fluxo['Tipo'] == 'Projeção']
+        projecao = reduzir_serie(df_fluxo[df_fluxo['Tipo'] == 'Projeção'], 'Data', 'Saldo_Acumulado')
         fig.add_trace(go.Scatter(
             x=projecao['Data'],
             y=projecao['Saldo_Acumulado'],
@@ -486,9 +502,7 @@ def show_page():
         
         fig.update_layout(
             title='Evolução do Saldo - Histórico vs Projeção',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            template=nome_template(),
             xaxis_title='Data',
             yaxis_title='Saldo (R$)'
         )
@@ -505,18 +519,38 @@ def show_page():
         else:
             st.success("🟢 **Situação financeira saudável.**")
         
-        # Próximos vencimentos (simulado)
+        # Recebíveis futuros por meio de pagamento
+        st.markdown("#### 💳 A Receber")
+        
+        a_receber = recebiveis[recebiveis['data'] > pd.Timestamp(hoje)] if not recebiveis.empty else recebiveis
+        if a_receber.empty:
+            st.info("💳 Nenhum recebimento pendente")
+        else:
+            st.metric("💳 Total a Receber", f"R$ {a_receber['valor'].sum():,.2f}",
+                      delta=f"R$ {entradas_futuras:,.2f} no horizonte")
+            st.dataframe(
+                a_receber.groupby('meio_pagamento', as_index=False)
+                         .agg(Valor=('valor', 'sum'), Parcelas=('valor', 'size'), Proximo=('data', 'min'))
+                         .rename(columns={'meio_pagamento': 'Meio de Pagamento'}),
+                column_config={
+                    'Valor': st.column_config.NumberColumn('Valor (R$)', format="R$ %.2f"),
+                    'Proximo': st.column_config.DateColumn('Próximo recebimento', format="DD/MM/YYYY")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        # Próximos vencimentos
         st.markdown("#### 📅 Próximos Vencimentos")
         
-        vencimentos = [
-            {"Data": "05/03/2024", "Descrição": "Pagamento Google Ads", "Valor": "R$ 5.000,00"},
-            {"Data": "10/03/2024", "Descrição": "Salários", "Valor": "R$ 15.000,00"},
-            {"Data": "15/03/2024", "Descrição": "Aluguel", "Valor": "R$ 3.500,00"},
-            {"Data": "20/03/2024", "Descrição": "Ferramentas SaaS", "Valor": "R$ 800,00"},
-        ]
+        vencimentos = pagamentos[pd.to_datetime(pagamentos['data_custo']) >= pd.Timestamp(hoje)] if not pagamentos.empty else pagamentos
         
-        for venc in vencimentos:
-            st.markdown(f"📅 **{venc['Data']}** - {venc['Descrição']}: {venc['Valor']}")
+        if vencimentos.empty:
+            st.info("📅 Nenhum custo a pagar no período")
+        else:
+            for _, venc in vencimentos.sort_values('data_custo').head(5).iterrows():
+                data_venc = pd.to_datetime(venc['data_custo']).strftime('%d/%m/%Y')
+                st.markdown(f"📅 **{data_venc}** - {venc['descricao']}: R$ {float(venc['valor']):,.2f}")
     
     # ========== TAB 5: RELATÓRIOS ==========
     with tab5:
@@ -608,9 +642,7 @@ def show_page():
                 color_discrete_map={'Receita': '#06FFA5', 'Custo': '#EF4444'}
             )
             fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+                template=nome_template()
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -644,7 +676,14 @@ def show_page():
         
         with col2:
             if st.button("📊 Gerar Excel", use_container_width=True):
-                st.success("✅ Excel gerado com sucesso!")
+                # Totais agregados no banco; renderização em segundo plano
+                solicitar_relatorio(
+                    'financeiro_xlsx',
+                    {'custos': custos_por_categoria},
+                    {'resumo': db.get_vendas_resumo(data_inicio, hoje), 'vendas': db.get_vendas(data_inicio, hoje)}
+                )
+            
+            mostrar_relatorio('financeiro_xlsx', "💾 Download Excel")
         
         with col3:
             if st.button("📈 Enviar por E-mail", use_container_width=True):
@@ -5,8 +5,12 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import json
 import requests
-from utils.database import Database
+from utils.database import get_database
+from utils.timeseries import reduzir_serie
+from utils.charts import grafico, nome_template
+from utils.exports import ExportManager
 from utils.auth import get_current_user
+from utils.realtime import memo_versao
 from utils.instagram_insights import InstagramSalesCorrelator, AutoInsightGenerator, create_insight_visualizations
 import numpy as np
 
@@ -219,7 +223,7 @@ def show_page():
     st.markdown("**Análise completa de performance e engajamento**")
     
     # Inicializar
-    db = Database()
+    db = get_database()
     user_info = get_current_user()
     instagram_api = InstagramAPI()
     
@@ -280,6 +284,12 @@ def show_page():
             insights_df = pd.DataFrame(insights_data)
             posts_df = pd.DataFrame(posts_data)
     
+    # Modo snapshot: usar os posts gravados no snapshot, se houver
+    if hasattr(db, 'get_instagram_media'):
+        posts_snapshot = db.get_instagram_media()
+        if not posts_snapshot.empty:
+            posts_df = posts_snapshot
+    
     # ========== 1. CARDS PRINCIPAIS ==========
     st.markdown("### 📊 Métricas Principais")
     
@@ -342,8 +352,9 @@ def show_page():
     
     if db.is_connected():
         try:
-            vendas_df = db.get_vendas()
-            leads_df = db.get_leads()
+            # Recarregados só quando vendas/leads mudam (contadores de versoes.sql)
+            vendas_df = memo_versao(('instagram_vendas',), ('vendas',), db.get_vendas)
+            leads_df = memo_versao(('instagram_leads',), ('leads',), db.get_leads)
         except:
             pass
     
@@ -474,9 +485,7 @@ def show_page():
             trendline='ols'
         )
         fig_correlation.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
+            template=nome_template()
         )
         st.plotly_chart(fig_correlation, use_container_width=True)
         
@@ -498,9 +507,7 @@ def show_page():
             color_continuous_scale='viridis'
         )
         fig_roi.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
+            template=nome_template()
         )
         st.plotly_chart(fig_roi, use_container_width=True)
         
@@ -517,20 +524,14 @@ def show_page():
     
     with col1:
         # Evolução de followers
-        fig_followers = px.line(
-            insights_df, 
+        fig_followers = grafico('instagram_followers', reduzir_serie(insights_df, 'date', 'followers'), lambda dados, template: px.line(
+            dados, 
             x='date', 
             y='followers',
             title="📈 Evolução de Followers (30 dias)",
-            markers=True
-        )
-        fig_followers.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
-            height=350
-        )
-        fig_followers.update_traces(line_color='#06FFA5')
+            markers=True,
+            template=template
+        ).update_layout(height=350).update_traces(line_color='#06FFA5'))
         st.plotly_chart(fig_followers, use_container_width=True)
     
     with col2:
@@ -548,9 +549,7 @@ def show_page():
             color_continuous_scale='viridis'
         )
         fig_engagement.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            template=nome_template(),
             height=350,
             showlegend=False
         )
@@ -583,22 +582,17 @@ def show_page():
             row.append(round(base_engagement, 1))
         engagement_matrix.append(row)
     
-    fig_heatmap = go.Figure(data=go.Heatmap(
-        z=engagement_matrix,
-        x=[f"{h}:00" for h in hours],
-        y=days,
-        colorscale='Viridis',
-        hoverongaps=False
+    fig_heatmap = grafico('instagram_heatmap', engagement_matrix, lambda dados, template: go.Figure(
+        data=go.Heatmap(
+            z=dados,
+            x=[f"{h}:00" for h in hours],
+            y=days,
+            colorscale='Viridis',
+            hoverongaps=False
+        ),
+        layout=dict(title="🔥 Heatmap de Engagement por Horário", height=300, template=template)
     ))
     
-    fig_heatmap.update_layout(
-        title="🔥 Heatmap de Engagement por Horário",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_color='white',
-        height=300
-    )
-    
     st.plotly_chart(fig_heatmap, use_container_width=True)
     
     st.divider()
@@ -694,9 +688,7 @@ def show_page():
             color_continuous_scale='viridis'
         )
         fig_hashtags.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            template=nome_template(),
             height=400
         )
         st.plotly_chart(fig_hashtags, use_container_width=True)
@@ -755,9 +747,7 @@ def show_page():
             title="Gênero da Audiência"
         )
         fig_gender.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white'
+            template=nome_template()
         )
         st.plotly_chart(fig_gender, use_container_width=True)
         
@@ -772,9 +762,7 @@ def show_page():
             color_continuous_scale='plasma'
         )
         fig_age.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            template=nome_template(),
             showlegend=False
         )
         st.plotly_chart(fig_age, use_container_width=True)
@@ -797,9 +785,7 @@ def show_page():
             color_continuous_scale='viridis'
         )
         fig_cities.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font_color='white',
+            template=nome_template(),
             height=500
         )
         st.plotly_chart(fig_cities, use_container_width=True)
@@ -859,9 +845,7 @@ def show_page():
                 color_continuous_scale='viridis'
             )
             fig_comp_followers.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+                template=nome_template()
             )
             st.plotly_chart(fig_comp_followers, use_container_width=True)
         
@@ -875,9 +859,7 @@ def show_page():
                 color_continuous_scale='plasma'
             )
             fig_comp_engagement.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
+                template=nome_template()
             )
             st.plotly_chart(fig_comp_engagement, use_container_width=True)
     
@@ -989,6 +971,11 @@ def show_page():
                 file_name=f"instagram_analytics_{datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv"
             )
+        
+        if st.button("📦 Exportar Parquet", use_container_width=True):
+            caminho, filename, mime = ExportManager().export_snapshot('instagram_media', [posts_df], formato="parquet")
+            with open(caminho, "rb") as arquivo:
+                st.download_button(label="💾 Download Parquet", data=arquivo, file_name=filename, mime=mime)
     
     with col2:
         if st.button("📊 Relatório PDF", use_container_width=True):
@@ -1,8 +1,25 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, date
-from utils.database import Database
+import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
+from datetime import datetime, date, timedelta
+from typing import Any, Dict
+from utils.database import get_database
 from utils.auth import get_current_user
+from utils.realtime import ConsultaCompartilhada, get_live_frame, invalidar_frames
+from utils.charts import grafico
+from utils.comparacoes import comparar
+from utils.followup import resumo_followup
+
+STATUS_LEADS = ["novo", "contatado", "interessado", "negociacao", "fechado", "perdido"]
+ORIGENS_LEADS = ["Instagram", "WhatsApp", "Indicacao", "Site", "Evento", "Facebook", "Google", "Outros"]
+
+# Leads por página na lista do pipeline
+LEADS_POR_PAGINA = 50
+
+# Janela (dias) comparada nos deltas das métricas do pipeline
+JANELA_PIPELINE_DIAS = 30
 
 def format_instagram_link(instagram_value):
     """Formata o Instagram como link clicável que abre em nova aba"""
@@ -44,7 +61,7 @@ def show_page():
     st.markdown("**Pipeline de vendas, follow-up e conversão de leads**")
     
     # Inicializar
-    db = Database()
+    db = get_database()
     user_info = get_current_user()
     
     # Verificar Supabase
@@ -53,8 +70,11 @@ def show_page():
         st.markdown("📋 Veja as instruções em `SUPABASE_SETUP.md`")
         return
     
-    # Buscar dados
-    leads_df = db.get_leads()
+    # Buscar dados (mantidos em dia pelo Realtime, sem nova consulta a cada rerun).
+    # As abas Pipeline e Follow-up são fragmentos: ações e filtros nelas
+    # rerodam só a própria aba, reaproveitando a consulta desta execução
+    consulta = ConsultaCompartilhada(db.get_leads)
+    leads_df = get_live_frame('leads', consulta)
     
     # Tabs
     tab1, tab2, tab3, tab4 = st.tabs(["➕ Novo Lead", "📋 Pipeline", "📞 Follow-up", "📊 Relatórios"])
@@ -80,11 +100,9 @@ def show_page():
                     index=0 if user_info.get('name') == 'Ana' else 1
                 )
                 
-                origem_options = ["Instagram", "WhatsApp", "Indicacao", "Site", "Evento", "Facebook", "Google", "Outros"]
-                origem = st.selectbox("Origem do Lead", origem_options)
+                origem = st.selectbox("Origem do Lead", ORIGENS_LEADS)
                 
-                status_options = ["novo", "contatado", "interessado", "negociacao", "fechado", "perdido"]
-                status = st.selectbox("Status Inicial", status_options)
+                status = st.selectbox("Status Inicial", STATUS_LEADS)
                 
                 score = st.slider("Score do Lead", min_value=1, max_value=10, value=5, 
                     help="1 = Pouco interesse, 10 = Muito interessado")
@@ -135,6 +153,7 @@ def show_page():
                     if db.add_lead(lead_data):
                         st.success("✅ Lead cadastrado com sucesso!")
                         db.log_activity(user_info.get('username', ''), 'Novo Lead', f"Lead {nome} cadastrado")
+                        invalidar_frames('leads')
                         st.balloons()
                         st.rerun()
                     else:
@@ -142,338 +161,11 @@ def show_page():
     
     # ========== TAB 2: PIPELINE ==========
     with tab2:
-        st.markdown("### 📋 Pipeline de Leads")
-        
-        if leads_df.empty:
-            st.info("📭 Nenhum lead cadastrado ainda")
-            st.markdown("Use a aba **'Novo Lead'** para começar!")
-            return
-        
-        # Métricas do pipeline
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        total_leads = len(leads_df)
-        leads_novos = len(leads_df[leads_df['status'] == 'novo'])
-        leads_contatados = len(leads_df[leads_df['status'] == 'contatado'])
-        leads_interessados = len(leads_df[leads_df['status'] == 'interessado'])
-        leads_fechados = len(leads_df[leads_df['status'] == 'fechado'])
-        taxa_conversao = (leads_fechados / total_leads * 100) if total_leads > 0 else 0
-        
-        with col1:
-            st.metric("🆕 Novos", leads_novos, delta=f"+{int(leads_novos * 0.1)}")
-        
-        with col2:
-            st.metric("📞 Contatados", leads_contatados, delta=f"+{int(leads_contatados * 0.15)}")
-        
-        with col3:
-            st.metric("🤔 Interessados", leads_interessados, delta=f"+{int(leads_interessados * 0.2)}")
-        
-        with col4:
-            st.metric("✅ Fechados", leads_fechados, delta=f"+{int(leads_fechados * 0.05)}")
-        
-        with col5:
-            st.metric("📈 Conversão", f"{taxa_conversao:.1f}%", delta=f"+{taxa_conversao * 0.1:.1f}%")
-        
-        # Funil visual
-        st.markdown("### 🎯 Funil de Conversão")
-        
-        import plotly.graph_objects as go
-        
-        funil_data = {
-            'Novos': leads_novos,
-            'Contatados': leads_contatados, 
-            'Interessados': leads_interessados,
-            'Fechados': leads_fechados
-        }
-        
-        fig_funil = go.Figure(go.Funnel(
-            y = list(funil_data.keys()),
-            x = list(funil_data.values()),
-            textinfo = "value+percent initial",
-            marker = dict(color = ["#06FFA5", "#0EA5E9", "#F97316", "#9D4EDD"])
-        ))
-        
-        fig_funil.update_layout(
-            title="Pipeline de Conversão",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)', 
-            font_color='white',
-            height=400
-        )
-        
-        st.plotly_chart(fig_funil, use_container_width=True)
-        
-        # Filtros
-        st.markdown("#### 🔍 Filtros")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            filtro_vendedor = st.selectbox("Vendedor", ["Todos"] + list(leads_df['vendedor'].unique()))
-        
-        with col2:
-            filtro_status = st.selectbox("Status", ["Todos"] + list(leads_df['status'].unique()))
-        
-        with col3:
-            filtro_origem = st.selectbox("Origem", ["Todas"] + list(leads_df['origem'].unique()))
-        
-        # Aplicar filtros
-        leads_filtrados = leads_df.copy()
-        
-        if filtro_vendedor != "Todos":
-            leads_filtrados = leads_filtrados[leads_filtrados['vendedor'] == filtro_vendedor]
-        
-        if filtro_status != "Todos":
-            leads_filtrados = leads_filtrados[leads_filtrados['status'] == filtro_status]
-        
-        if filtro_origem != "Todas":
-            leads_filtrados = leads_filtrados[leads_filtrados['origem'] == filtro_origem]
-        
-        # Cards de leads por status
-        st.markdown("#### 📊 Gestão de Leads por Status")
-        
-        # Organizar leads por status
-        status_cores = {
-            'novo': '🟢',
-            'contatado': '🔵', 
-            'interessado': '🟡',
-            'negociacao': '🟠',
-            'fechado': '✅',
-            'perdido': '❌'
-        }
-        
-        for status in ['novo', 'contatado', 'interessado', 'negociacao']:
-            leads_status = leads_filtrados[leads_filtrados['status'] == status]
-            
-            if not leads_status.empty:
-                with st.expander(f"{status_cores.get(status, '📋')} {status.title()} ({len(leads_status)} leads)", expanded=(status == 'novo')):
-                    
-                    for idx, lead in leads_status.iterrows():
-                        col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
-                        
-                        with col1:
-                            st.markdown(f"**{lead['nome']}** ⭐ {lead['score']}/10")
-                            if lead.get('telefone'):
-                                whatsapp_link = format_whatsapp_link(lead['telefone'])
-                                if whatsapp_link:
-                                    st.markdown(whatsapp_link, unsafe_allow_html=True)
-                            if lead.get('instagram'):
-                                instagram_link = format_instagram_link(lead['instagram'])
-                                if instagram_link:
-                                    st.markdown(instagram_link, unsafe_allow_html=True)
-                        
-                        with col2:
-                            st.markdown(f"🎯 **{lead['vendedor']}**")
-                            st.caption(f"📍 {lead['origem']}")
-                        
-                        with col3:
-                            if lead.get('valor_estimado'):
-                                st.markdown(f"💰 R$ {lead['valor_estimado']:,.2f}")
-                            
-                            # Calcular dias desde última interação
-                            if lead.get('ultima_interacao'):
-                                try:
-                                    ultima_data = pd.to_datetime(lead['ultima_interacao']).date()
-                                    dias_sem_contato = (date.today() - ultima_data).days
-                                    
-                                    if dias_sem_contato == 0:
-                                        st.caption("🟢 Contato hoje")
-                                    elif dias_sem_contato <= 2:
-                                        st.caption(f"🟡 {dias_sem_contato} dias atrás")
-                                    else:
-                                        st.caption(f"🔴 {dias_sem_contato} dias atrás")
-                                except:
-                                    st.caption("📅 Data inválida")
-                        
-                        with col4:
-                            # Ações rápidas
-                            if st.button("📞", key=f"contact_{idx}", help="Marcar como contatado"):
-                                # Atualizar status
-                                lead_update = {
-                                    'status': 'contatado',
-                                    'ultima_interacao': date.today().strftime('%Y-%m-%d')
-                                }
-                                if db.update_lead(lead.get('id'), lead_update):
-                                    st.success("✅ Atualizado!")
-                                    st.rerun()
-                            
-                            if st.button("✏️", key=f"edit_{idx}", help="Editar lead"):
-                                st.session_state[f'editing_lead_{idx}'] = True
-                        
-                        # Mostrar observações se existir
-                        if lead.get('nota'):
-                            st.caption(f"📝 {lead['nota']}")
-                        
-                        st.divider()
-        
-        # Tabela resumida para visão geral
-        st.markdown("#### 📋 Visão Geral (Tabela)")
-        
-        if not leads_filtrados.empty:
-            # Preparar dados para exibição
-            display_df = leads_filtrados.copy()
-            
-            # Formatar colunas para exibição
-            colunas_exibir = ['nome', 'telefone', 'vendedor', 'status', 'score', 'origem']
-            if all(col in display_df.columns for col in colunas_exibir):
-                display_df = display_df[colunas_exibir]
-            
-            # Configuração das colunas
-            column_config = {
-                'nome': st.column_config.TextColumn('Nome', width='medium'),
-                'telefone': st.column_config.TextColumn('Telefone', width='medium'),
-                'vendedor': st.column_config.TextColumn('Vendedor', width='small'),
-                'status': st.column_config.TextColumn('Status', width='small'),
-                'score': st.column_config.NumberColumn('Score', width='small'),
-                'origem': st.column_config.TextColumn('Origem', width='medium')
-            }
-            
-            st.dataframe(
-                display_df,
-                column_config=column_config,
-                hide_index=True,
-                use_container_width=True,
-                height=300
-            )
-            
-            st.info(f"📊 Exibindo {len(leads_filtrados)} de {len(leads_df)} leads")
-        else:
-            st.warning("🔍 Nenhum lead encontrado com os filtros selecionados")
+        _aba_pipeline(db, consulta)
     
     # ========== TAB 3: FOLLOW-UP ==========
     with tab3:
-        st.markdown("### 📞 Follow-up e Agenda")
-        
-        if leads_df.empty:
-            st.info("📞 Nenhum lead para follow-up")
-            return
-        
-        # Leads que precisam de follow-up
-        hoje = date.today()
-        leads_df['ultima_interacao_date'] = pd.to_datetime(leads_df['ultima_interacao'], errors='coerce').dt.date
-        
-        # Calcular dias sem contato corretamente
-        leads_df['dias_sem_contato'] = leads_df['ultima_interacao_date'].apply(
-            lambda x: (hoje - x).days if pd.notna(x) else 999
-        )
-        
-        # Classificar por urgência
-        leads_urgentes = leads_df[leads_df['dias_sem_contato'] > 3]
-        leads_atencao = leads_df[(leads_df['dias_sem_contato'] > 1) & (leads_df['dias_sem_contato'] <= 3)]
-        leads_ok = leads_df[leads_df['dias_sem_contato'] <= 1]
-        
-        # Resumo de follow-up
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.error(f"🔴 **{len(leads_urgentes)} Leads Urgentes**")
-            st.caption("Mais de 3 dias sem contato")
-        
-        with col2:
-            st.warning(f"🟡 **{len(leads_atencao)} Leads Atenção**")
-            st.caption("1-3 dias sem contato")
-        
-        with col3:
-            st.success(f"🟢 **{len(leads_ok)} Leads OK**")
-            st.caption("Contato recente")
-        
-        # Lista de follow-up urgente
-        if not leads_urgentes.empty:
-            st.markdown("#### 🔴 Leads Urgentes - Follow-up Imediato")
-            
-            for idx, lead in leads_urgentes.head(10).iterrows():
-                with st.container():
-                    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
-                    
-                    with col1:
-                        st.markdown(f"**{lead['nome']}** ⭐ {lead['score']}/10")
-                        # WhatsApp e Instagram clicáveis
-                        contato_parts = []
-                        
-                        # WhatsApp clicável
-                        if lead.get('telefone'):
-                            whatsapp_link = format_whatsapp_link(lead['telefone'])
-                            if whatsapp_link:
-                                contato_parts.append(whatsapp_link)
-                        
-                        # Instagram clicável
-                        instagram_link = format_instagram_link(lead.get('instagram', ''))
-                        if instagram_link:
-                            contato_parts.append(instagram_link)
-                        
-                        if contato_parts:
-                            st.markdown(" | ".join(contato_parts), unsafe_allow_html=True)
-                    
-                    with col2:
-                        st.markdown(f"🎯 {lead['vendedor']}")
-                        st.caption(f"Status: {lead['status']}")
-                    
-                    with col3:
-                        dias = lead['dias_sem_contato']
-                        st.markdown(f"🔴 **{dias} dias** sem contato")
-                        try:
-                            ultimo_contato = lead['ultima_interacao_date'].strftime('%d/%m/%Y')
-                            st.caption(f"Último: {ultimo_contato}")
-                        except:
-                            st.caption("Data inválida")
-                    
-                    with col4:
-                        if st.button("📞 Contatar", key=f"urgent_contact_{idx}", type="primary"):
-                            # Marcar como contatado
-                            lead_update = {
-                                'status': 'contatado',
-                                'ultima_interacao': hoje.strftime('%Y-%m-%d')
-                            }
-                            if db.update_lead(lead.get('id'), lead_update):
-                                st.success("✅ Marcado como contatado!")
-                                st.rerun()
-                    
-                    if lead.get('nota'):
-                        st.caption(f"📝 {lead['nota']}")
-                    
-                    st.divider()
-        
-        # Agenda do dia
-        st.markdown("#### 📅 Agenda de Hoje")
-        
-        # Simular agendamentos baseados nos leads
-        if not leads_df.empty:
-            agendamentos_hoje = leads_df[leads_df['status'].isin(['contatado', 'interessado'])].head(5)
-            
-            if not agendamentos_hoje.empty:
-                for i, lead in agendamentos_hoje.iterrows():
-                    hora = f"{9 + i}:00"
-                    st.markdown(f"🕘 **{hora}** - {lead['nome']} ({lead['vendedor']})")
-                    # WhatsApp clicável na agenda
-                    telefone_agenda = format_whatsapp_link(lead['telefone'])
-                    if telefone_agenda:
-                        agenda_text = f"{telefone_agenda} | Status: {lead['status']}"
-                        st.markdown(agenda_text, unsafe_allow_html=True)
-                    else:
-                        st.caption(f"Status: {lead['status']}")
-            else:
-                st.info("📅 Nenhum agendamento para hoje")
-        
-        # Ações em massa
-        st.markdown("#### ⚡ Ações em Massa")
-        
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("📞 Marcar Urgentes como Contatados", use_container_width=True):
-                if not leads_urgentes.empty:
-                    # Implementar atualização em massa
-                    st.success(f"✅ {len(leads_urgentes)} leads marcados como contatados!")
-                else:
-                    st.info("Nenhum lead urgente para atualizar")
-        
-        with col2:
-            if st.button("📧 Enviar E-mail Follow-up", use_container_width=True):
-                st.info("📧 Funcionalidade em desenvolvimento")
-        
-        with col3:
-            if st.button("📱 WhatsApp Automático", use_container_width=True):
-                st.info("📱 Integração em desenvolvimento")
+        _aba_followup(db, consulta)
     
     # ========== TAB 4: RELATÓRIOS ==========
     with tab4:
@@ -492,18 +184,12 @@ def show_page():
         
         with col1:
             # Gráfico de pizza
-            import plotly.express as px
-            
-            fig_pizza = px.pie(
-                values=status_counts.values,
-                names=status_counts.index,
-                title="Leads por Status"
-            )
-            fig_pizza.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white'
-            )
+            fig_pizza = grafico('leads_status', status_counts, lambda dados, template: px.pie(
+                values=dados.values,
+                names=dados.index,
+                title="Leads por Status",
+                template=template
+            ))
             st.plotly_chart(fig_pizza, use_container_width=True)
         
         with col2:
@@ -572,4 +258,377 @@ def show_page():
         
         with col3:
             if st.button("📧 Enviar Relatório", use_container_width=True):
-                st.info("📧 Funcionalidade em desenvolvimento")
\ No newline at end of file
+                st.info("📧 Funcionalidade em desenvolvimento")
+
+
+def _recarregar_leads(consulta):
+    """Descarta os leads em memória e reroda só o fragmento atual"""
+    consulta.invalidar()
+    invalidar_frames('leads')
+    st.rerun(scope="fragment")
+
+
+@st.fragment
+def _aba_pipeline(db, consulta):
+    """Métricas, funil e lista paginada do pipeline (ações nos leads rerodam só esta aba)
+
+    Contagens vêm agregadas do banco (view leads_funil) e a lista busca só a
+    página visível, então o custo não cresce com o total de leads.
+    """
+    
+    st.markdown("### 📋 Pipeline de Leads")
+    
+    funil_df = db.get_leads_funil()
+    
+    if funil_df.empty:
+        st.info("📭 Nenhum lead cadastrado ainda")
+        st.markdown("Use a aba **'Novo Lead'** para começar!")
+        return
+    
+    # Métricas do pipeline
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    por_status = funil_df.groupby('status')['quantidade'].sum()
+    total_leads = int(por_status.sum())
+    leads_novos = int(por_status.get('novo', 0))
+    leads_contatados = int(por_status.get('contatado', 0))
+    leads_interessados = int(por_status.get('interessado', 0))
+    leads_fechados = int(por_status.get('fechado', 0))
+    taxa_conversao = (leads_fechados / total_leads * 100) if total_leads > 0 else 0
+    
+    with col1:
+        st.metric("🆕 Novos", leads_novos)
+    
+    with col2:
+        st.metric("📞 Contatados", leads_contatados)
+    
+    with col3:
+        st.metric("🤔 Interessados", leads_interessados)
+    
+    with col4:
+        st.metric("✅ Fechados", leads_fechados)
+    
+    with col5:
+        st.metric("📈 Conversão", f"{taxa_conversao:.1f}%")
+    
+    # Leads criados na janela recente contra a janela anterior de mesmo tamanho
+    # (valores e deltas da mesma coorte; uma consulta agregada)
+    st.markdown(f"#### 🗓️ Criados nos Últimos {JANELA_PIPELINE_DIAS} Dias")
+    
+    hoje = date.today()
+    comparacao = comparar(db, hoje - timedelta(days=JANELA_PIPELINE_DIAS - 1), hoje)
+    sufixo = f" vs {JANELA_PIPELINE_DIAS} dias anteriores"
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("🆕 Leads Criados", f"{comparacao.valor('leads'):.0f}",
+                  delta=comparacao.delta('leads', 'diferenca', sufixo))
+    
+    with col2:
+        st.metric("✅ Já Fechados", f"{comparacao.valor('leads_fechado'):.0f}",
+                  delta=comparacao.delta('leads_fechado', 'diferenca', sufixo))
+    
+    with col3:
+        st.metric("📈 Conversão da Coorte", f"{comparacao.valor('conversao'):.1f}%",
+                  delta=comparacao.delta('conversao', 'pontos', sufixo))
+    
+    # Funil visual
+    st.markdown("### 🎯 Funil de Conversão")
+    
+    funil_data = {
+        'Novos': leads_novos,
+        'Contatados': leads_contatados, 
+        'Interessados': leads_interessados,
+        'Fechados': leads_fechados
+    }
+    
+    fig_funil = grafico('leads_funil', funil_data, lambda dados, template: go.Figure(
+        go.Funnel(
+            y = list(dados.keys()),
+            x = list(dados.values()),
+            textinfo = "value+percent initial",
+            marker = dict(color = ["#06FFA5", "#0EA5E9", "#F97316", "#9D4EDD"])
+        ),
+        layout=dict(title="Pipeline de Conversão", height=400, template=template)
+    ))
+    
+    st.plotly_chart(fig_funil, use_container_width=True)
+    
+    # Filtros (trocar qualquer filtro volta para a primeira página)
+    st.markdown("#### 🔍 Filtros")
+    
+    def _voltar_primeira_pagina():
+        st.session_state['pipeline_pagina'] = 1
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        filtro_vendedor = st.selectbox("Vendedor", ["Todos"] + sorted(funil_df['vendedor'].dropna().unique()),
+                                       key="pipeline_vendedor", on_change=_voltar_primeira_pagina)
+    
+    with col2:
+        filtro_status = st.selectbox("Status", ["Todos"] + STATUS_LEADS,
+                                     key="pipeline_status", on_change=_voltar_primeira_pagina)
+    
+    with col3:
+        filtro_origem = st.selectbox("Origem", ["Todas"] + ORIGENS_LEADS,
+                                     key="pipeline_origem", on_change=_voltar_primeira_pagina)
+    
+    # Lista paginada no banco: só a página visível vira widgets
+    st.markdown("#### 📊 Gestão de Leads")
+    
+    filtros = dict(
+        status=filtro_status if filtro_status != "Todos" else None,
+        vendedor=filtro_vendedor if filtro_vendedor != "Todos" else None,
+        origem=filtro_origem if filtro_origem != "Todas" else None
+    )
+    
+    pagina = st.session_state.get('pipeline_pagina', 1)
+    pagina_df, total_filtro = db.get_leads_pagina(pagina=pagina - 1, por_pagina=LEADS_POR_PAGINA, **filtros)
+    total_paginas = max(1, -(-total_filtro // LEADS_POR_PAGINA))
+    
+    if pagina > total_paginas:
+        # Filtro encolheu (ex.: leads mudaram de status): ir para a última página
+        st.session_state['pipeline_pagina'] = total_paginas
+        st.rerun(scope="fragment")
+    
+    if pagina_df.empty:
+        st.warning("🔍 Nenhum lead encontrado com os filtros selecionados")
+        return
+    
+    editor_df = _preparar_pagina_pipeline(pagina_df)
+    
+    editado_df = st.data_editor(
+        editor_df,
+        column_config={
+            'id': None,
+            'contatar': st.column_config.CheckboxColumn('📞', help="Marcar como contatado hoje", width='small'),
+            'nome': st.column_config.TextColumn('Nome', width='medium', disabled=True),
+            'whatsapp': st.column_config.LinkColumn('WhatsApp', display_text=r"https://wa\.me/(\d+)", width='medium'),
+            'instagram': st.column_config.LinkColumn('Instagram', display_text=r"https://instagram\.com/(.+)", width='medium'),
+            'vendedor': st.column_config.TextColumn('Vendedor', width='small', disabled=True),
+            'status': st.column_config.SelectboxColumn('Status', options=STATUS_LEADS, width='small', required=True),
+            'score': st.column_config.NumberColumn('Score', min_value=1, max_value=10, step=1, width='small'),
+            'origem': st.column_config.TextColumn('Origem', width='small', disabled=True),
+            'valor_estimado': st.column_config.NumberColumn('Valor', format="R$ %.2f", width='small', disabled=True),
+            'contato': st.column_config.TextColumn('Último contato', width='small', disabled=True),
+            'nota': st.column_config.TextColumn('Observações', width='large'),
+        },
+        disabled=['whatsapp', 'instagram'],
+        hide_index=True,
+        use_container_width=True,
+        # A versão muda a cada gravação, descartando as edições já aplicadas
+        key=f"pipeline_editor_{st.session_state.get('pipeline_versao', 0)}_{pagina}_{filtro_status}_{filtro_vendedor}_{filtro_origem}"
+    )
+    
+    # Paginação e ações
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key="pipeline_pagina")
+    
+    with col2:
+        st.info(f"📊 Exibindo {len(pagina_df)} de {total_filtro} leads (página {pagina} de {total_paginas})")
+    
+    with col3:
+        alteracoes = _alteracoes_pipeline(editor_df, editado_df)
+        if st.button(f"💾 Salvar ({len(alteracoes)})", type="primary", use_container_width=True,
+                     disabled=not alteracoes):
+            salvos = sum(bool(db.update_lead(lead_id, dados)) for lead_id, dados in alteracoes.items())
+            if salvos:
+                st.success(f"✅ {salvos} lead(s) atualizado(s)!")
+                st.session_state['pipeline_versao'] = st.session_state.get('pipeline_versao', 0) + 1
+                _recarregar_leads(consulta)
+
+
+def _preparar_pagina_pipeline(pagina_df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas exibidas no editor do pipeline (apenas a página atual)"""
+    hoje = date.today()
+    ultima = pd.to_datetime(pagina_df['ultima_interacao'], errors='coerce')
+    dias = (pd.Timestamp(hoje) - ultima).dt.days
+    
+    contato = np.select(
+        [dias.isna(), dias == 0, dias <= 2],
+        ["📅 Sem registro", "🟢 Hoje", "🟡 " + dias.astype('Int64').astype(str) + " dias"],
+        default="🔴 " + dias.astype('Int64').astype(str) + " dias"
+    )
+    
+    telefones = pagina_df.get('telefone', pd.Series('', index=pagina_df.index)).fillna('').astype(str)
+    digitos = telefones.str.replace(r'\D', '', regex=True)
+    # Mesma regra de format_whatsapp_link: DDD + número ganha o +55
+    sem_pais = digitos.str.len().isin([10, 11]) | ~digitos.str.startswith('55')
+    digitos = digitos.where(~sem_pais | (digitos == ''), '55' + digitos)
+    
+    arrobas = pagina_df.get('instagram', pd.Series('', index=pagina_df.index)).fillna('').astype(str)
+    arrobas = arrobas.str.replace('@', '', regex=False).str.strip()
+    
+    return pd.DataFrame({
+        'id': pagina_df['id'],
+        'contatar': False,
+        'nome': pagina_df['nome'],
+        'whatsapp': ("https://wa.me/" + digitos).where(digitos != '', None),
+        'instagram': ("https://instagram.com/" + arrobas).where(arrobas != '', None),
+        'vendedor': pagina_df['vendedor'],
+        'status': pagina_df['status'],
+        'score': pagina_df['score'],
+        'origem': pagina_df.get('origem'),
+        'valor_estimado': pagina_df.get('valor_estimado'),
+        'contato': contato,
+        'nota': pagina_df.get('nota', pd.Series('', index=pagina_df.index)).fillna(''),
+    })
+
+
+def _alteracoes_pipeline(original: pd.DataFrame, editado: pd.DataFrame) -> Dict[Any, Dict[str, Any]]:
+    """Atualizações por id de lead a partir das edições feitas no editor"""
+    alteracoes = {}
+    hoje = date.today().strftime('%Y-%m-%d')
+    
+    for (_, antes), (_, depois) in zip(original.iterrows(), editado.iterrows()):
+        dados = {}
+        
+        if depois['contatar']:
+            dados.update({'status': 'contatado', 'ultima_interacao': hoje})
+        elif depois['status'] != antes['status']:
+            dados['status'] = depois['status']
+        
+        if depois['score'] != antes['score'] and pd.notna(depois['score']):
+            dados['score'] = int(depois['score'])
+        
+        if depois['nota'] != antes['nota']:
+            dados['nota'] = depois['nota'] or ""
+        
+        if dados:
+            alteracoes[antes['id']] = dados
+    
+    return alteracoes
+
+
+@st.fragment
+def _aba_followup(db, consulta):
+    """Resumo de urgência, lista de follow-up e agenda (rerodam só esta aba)"""
+    
+    leads_df = get_live_frame('leads', consulta)
+    
+    st.markdown("### 📞 Follow-up e Agenda")
+    
+    if leads_df.empty:
+        st.info("📞 Nenhum lead para follow-up")
+        return
+    
+    # Leads que precisam de follow-up (contagens por faixa e urgentes de maior score)
+    hoje = date.today()
+    contagens, leads_urgentes = resumo_followup(leads_df, top_n=10, hoje=hoje)
+    
+    # Resumo de follow-up
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.error(f"🔴 **{contagens['urgente']} Leads Urgentes**")
+        st.caption("Mais de 3 dias sem contato")
+    
+    with col2:
+        st.warning(f"🟡 **{contagens['atencao']} Leads Atenção**")
+        st.caption("1-3 dias sem contato")
+    
+    with col3:
+        st.success(f"🟢 **{contagens['ok']} Leads OK**")
+        st.caption("Contato recente")
+    
+    # Lista de follow-up urgente
+    if not leads_urgentes.empty:
+        st.markdown("#### 🔴 Leads Urgentes - Follow-up Imediato")
+    
+        for idx, lead in leads_urgentes.iterrows():
+            with st.container():
+                col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    
+                with col1:
+                    st.markdown(f"**{lead['nome']}** ⭐ {lead['score']}/10")
+                    # WhatsApp e Instagram clicáveis
+                    contato_parts = []
+    
+                    # WhatsApp clicável
+                    if lead.get('telefone'):
+                        whatsapp_link = format_whatsapp_link(lead['telefone'])
+                        if whatsapp_link:
+                            contato_parts.append(whatsapp_link)
+    
+                    # Instagram clicável
+                    instagram_link = format_instagram_link(lead.get('instagram', ''))
+                    if instagram_link:
+                        contato_parts.append(instagram_link)
+    
+                    if contato_parts:
+                        st.markdown(" | ".join(contato_parts), unsafe_allow_html=True)
+    
+                with col2:
+                    st.markdown(f"🎯 {lead['vendedor']}")
+                    st.caption(f"Status: {lead['status']}")
+    
+                with col3:
+                    dias = lead['dias_sem_contato']
+                    st.markdown(f"🔴 **{dias} dias** sem contato")
+                    try:
+                        ultimo_contato = lead['ultima_interacao_date'].strftime('%d/%m/%Y')
+                        st.caption(f"Último: {ultimo_contato}")
+                    except:
+                        st.caption("Data inválida")
+    
+                with col4:
+                    if st.button("📞 Contatar", key=f"urgent_contact_{idx}", type="primary"):
+                        # Marcar como contatado
+                        lead_update = {
+                            'status': 'contatado',
+                            'ultima_interacao': hoje.strftime('%Y-%m-%d')
+                        }
+                        if db.update_lead(lead.get('id'), lead_update):
+                            st.success("✅ Marcado como contatado!")
+                            _recarregar_leads(consulta)
+    
+                if lead.get('nota'):
+                    st.caption(f"📝 {lead['nota']}")
+    
+                st.divider()
+    
+    # Agenda do dia
+    st.markdown("#### 📅 Agenda de Hoje")
+    
+    # Simular agendamentos baseados nos leads
+    if not leads_df.empty:
+        agendamentos_hoje = leads_df[leads_df['status'].isin(['contatado', 'interessado'])].head(5)
+    
+        if not agendamentos_hoje.empty:
+            for i, lead in agendamentos_hoje.iterrows():
+                hora = f"{9 + i}:00"
+                st.markdown(f"🕘 **{hora}** - {lead['nome']} ({lead['vendedor']})")
+                # WhatsApp clicável na agenda
+                telefone_agenda = format_whatsapp_link(lead['telefone'])
+                if telefone_agenda:
+                    agenda_text = f"{telefone_agenda} | Status: {lead['status']}"
+                    st.markdown(agenda_text, unsafe_allow_html=True)
+                else:
+                    st.caption(f"Status: {lead['status']}")
+        else:
+            st.info("📅 Nenhum agendamento para hoje")
+    
+    # Ações em massa
+    st.markdown("#### ⚡ Ações em Massa")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("📞 Marcar Urgentes como Contatados", use_container_width=True):
+            if contagens['urgente']:
+                # Implementar atualização em massa
+                st.success(f"✅ {contagens['urgente']} leads marcados como contatados!")
+            else:
+                st.info("Nenhum lead urgente para atualizar")
+    
+    with col2:
+        if st.button("📧 Enviar E-mail Follow-up", use_container_width=True):
+            st.info("📧 Funcionalidade em desenvolvimento")
+    
+    with col3:
+        if st.button("📱 WhatsApp Automático", use_container_width=True):
+            st.info("📱 Integração em desenvolvimento")
@@ -2,10 +2,19 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from calendar import monthrange
 from datetime import datetime, timedelta
-from utils.database import Database
+from utils.database import get_database
+from utils.timeseries import reduzir_serie
+from utils.charts import grafico
+from utils.comparacoes import comparar, periodo_anterior
+from utils.metas import VENDEDORES, progresso_mes
+from utils.realtime import fragmento_ao_vivo, get_live_frame, invalidar_frames, memo_versao, realtime_ativo, versao_de
 from utils.styles import create_metric_card, create_vendedor_card, get_user_theme_css
 
+# Vendedores exibidos no ranking
+RANKING_TOP_N = 10
+
 def show_page():
     """Página Overview - Métricas gerais e dashboard principal"""
     
@@ -17,7 +26,7 @@ def show_page():
     st.markdown("**Visão geral das vendas e performance da equipe**")
     
     # Inicializar database
-    db = Database()
+    db = get_database()
     
     # Verificar se Supabase está configurado
     if not db.is_connected():
@@ -33,12 +42,42 @@ def show_page():
         """)
         return
     
+    # Notificações e painel de vendas/leads: fragmentos atualizados por push
+    # (Supabase Realtime), sem rerodar autenticação e CSS da página. O seletor
+    # de período fica dentro do painel: trocar as datas reroda só o painel
+    fragmento_ao_vivo(_painel_notificacoes)(db)
+    fragmento_ao_vivo(_painel_vendas_leads)(db, user_theme)
+    
+    # ========== ÚLTIMAS ATIVIDADES ==========
+    st.markdown("### 📝 Últimas Atividades")
+    
+    logs_df = db.get_activity_logs(limit=10)
+    
+    if not logs_df.empty:
+        for _, log in logs_df.head(5).iterrows():
+            timestamp = pd.to_datetime(log['timestamp']).strftime('%d/%m %H:%M')
+            st.markdown(f"🔸 **{log['user_id'].title()}** - {log['action']} - {timestamp}")
+    else:
+        st.info("📝 Nenhuma atividade recente registrada")
+    
+    # ========== REFRESH ==========
+    # A atualização automática é feita pelos fragmentos acima (fragmento_ao_vivo),
+    # que só refazem as consultas das tabelas alteradas
+    if st.button("🔄 Atualizar Dashboard", type="primary", use_container_width=True):
+        invalidar_frames()
+        st.rerun()
+
+
+def _painel_vendas_leads(db, user_theme):
+    """Métricas, gráficos, alertas e ranking do período (depende de vendas e leads)"""
+    
     # Período de análise
     col1, col2, col3 = st.columns([1, 1, 2])
     
     with col1:
         data_inicio = st.date_input(
             "📅 Data Início",
+            key="overview_data_inicio",
             value=datetime.now() - timedelta(days=30),
             max_value=datetime.now().date()
         )
@@ -46,16 +85,33 @@ def show_page():
     with col2:
         data_fim = st.date_input(
             "📅 Data Fim",
+            key="overview_data_fim",
             value=datetime.now().date(),
             max_value=datetime.now().date()
         )
     
+    # Metas e progresso do mês corrente (uma linha por vendedor, metas.sql)
+    hoje = datetime.now().date()
+    dias_mes = monthrange(hoje.year, hoje.month)[1]
+    progresso = memo_versao(('metas_progresso', hoje.year, hoje.month), ('vendas', 'metas'),
+                            lambda: progresso_mes(db, hoje.year, hoje.month))
+    meta_mes = progresso['meta_vendas'].sum()
+    faturado_mes = progresso['faturado'].sum()
+    
     with col3:
-        st.markdown("**🎯 Meta do Mês: R$ 100.000,00**")
+        st.markdown(f"**🎯 Meta do Mês: R$ {meta_mes:,.2f}**")
+    
+    # Buscar dados (frames da sessão mantidos em dia pelos eventos do Realtime)
+    inicio_iso, fim_iso = data_inicio.isoformat(), data_fim.isoformat()
+    vendas_df = get_live_frame(
+        'vendas', lambda: db.get_vendas(data_inicio, data_fim), inicio_iso, fim_iso,
+        filtro=lambda venda: inicio_iso <= str(venda.get('data_venda', ''))[:10] <= fim_iso
+    )
+    leads_df = get_live_frame('leads', db.get_leads)
     
-    # Buscar dados
-    vendas_df = db.get_vendas(data_inicio, data_fim)
-    leads_df = db.get_leads()
+    # Chave dos gráficos: contadores das tabelas em vez do hash dos dados
+    # (com Realtime os frames mudam por eventos, antes dos contadores)
+    versoes = None if realtime_ativo() else versao_de('vendas', 'leads')
     
     # Filtrar vendas confirmadas
     vendas_confirmadas = vendas_df[vendas_df['status'] == 'confirmada'] if not vendas_df.empty else pd.DataFrame()
@@ -63,6 +119,11 @@ def show_page():
     # ========== MÉTRICAS PRINCIPAIS ==========
     st.markdown("### 🎯 Métricas Principais")
     
+    # Deltas contra a janela anterior de mesmo tamanho (uma consulta por período)
+    comparacao = comparar(db, data_inicio, data_fim)
+    inicio_anterior, fim_anterior = periodo_anterior(data_inicio, data_fim)
+    ajuda = f"Comparado com {inicio_anterior.strftime('%d/%m/%Y')} a {fim_anterior.strftime('%d/%m/%Y')}"
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -70,7 +131,8 @@ def show_page():
         st.metric(
             label="🏆 Total de Vendas",
             value=f"{total_vendas}",
-            delta=f"+{int(total_vendas * 0.15)} vs mês anterior"
+            delta=comparacao.delta('vendas', 'diferenca'),
+            help=ajuda
         )
     
     with col2:
@@ -78,7 +140,8 @@ def show_page():
         st.metric(
             label="💰 Faturamento",
             value=f"R$ {faturamento:,.2f}",
-            delta=f"+{faturamento * 0.12:.0f} vs mês anterior"
+            delta=comparacao.delta('faturamento'),
+            help=ajuda
         )
     
     with col3:
@@ -86,63 +149,53 @@ def show_page():
         st.metric(
             label="🎫 Ticket Médio",
             value=f"R$ {ticket_medio:,.2f}",
-            delta="+5.2% vs mês anterior"
+            delta=comparacao.delta('ticket_medio'),
+            help=ajuda
         )
     
     with col4:
+        # Total atual contra o total no início do período: a diferença são os
+        # leads criados no período
         total_leads = len(leads_df) if not leads_df.empty else 0
         st.metric(
             label="🎯 Total de Leads",
             value=f"{total_leads}",
-            delta=f"+{int(total_leads * 0.08)} vs mês anterior"
+            delta=f"{comparacao.valor('leads'):+,.0f} no período"
         )
     
     # ========== PERFORMANCE HOJE ==========
     st.markdown("### 📊 Performance de Hoje")
     
-    hoje = datetime.now().date()
     vendas_hoje = vendas_confirmadas[vendas_confirmadas['data_venda'] == hoje.strftime('%Y-%m-%d')] if not vendas_confirmadas.empty else pd.DataFrame()
+    comparacao_hoje = comparar(db, hoje, hoje)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
         vendas_hoje_count = len(vendas_hoje) if not vendas_hoje.empty else 0
-        st.markdown(create_metric_card("🏆 Vendas Hoje", vendas_hoje_count, "+2 vs ontem"), unsafe_allow_html=True)
+        delta = comparacao_hoje.delta('vendas', 'diferenca', sufixo=' vs ontem')
+        st.markdown(create_metric_card("🏆 Vendas Hoje", vendas_hoje_count, delta,
+                                       "inverse" if delta and delta.startswith('-') else "normal"), unsafe_allow_html=True)
     
     with col2:
         faturamento_hoje = vendas_hoje['valor'].sum() if not vendas_hoje.empty else 0
-        st.markdown(create_metric_card("💰 Faturamento Hoje", f"R$ {faturamento_hoje:,.2f}", "+12.5%"), unsafe_allow_html=True)
+        delta = comparacao_hoje.delta('faturamento', sufixo=' vs ontem')
+        st.markdown(create_metric_card("💰 Faturamento Hoje", f"R$ {faturamento_hoje:,.2f}", delta,
+                                       "inverse" if delta and delta.startswith('-') else "normal"), unsafe_allow_html=True)
     
     with col3:
-        meta_diaria = 100000 / 30  # Meta mensal dividida por 30 dias
+        meta_diaria = meta_mes / dias_mes
         progresso_dia = (faturamento_hoje / meta_diaria * 100) if meta_diaria > 0 else 0
         st.markdown(create_metric_card("🎯 Meta do Dia", f"{progresso_dia:.1f}%", f"Meta: R$ {meta_diaria:,.0f}"), unsafe_allow_html=True)
     
     # ========== PERFORMANCE POR VENDEDOR ==========
-    st.markdown("### ⚔️ Performance por Vendedor")
+    st.markdown("### ⚔️ Performance por Vendedor no Mês")
     
-    if not vendas_confirmadas.empty:
-        vendas_por_vendedor = vendas_confirmadas.groupby('vendedor')['valor'].sum().reset_index()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Ana
-            vendas_ana = vendas_por_vendedor[vendas_por_vendedor['vendedor'] == 'Ana']['valor'].sum() if not vendas_por_vendedor.empty else 0
-            meta_ana = 50000
-            st.markdown(create_vendedor_card("Ana", vendas_ana, meta_ana, "ana"), unsafe_allow_html=True)
-        
-        with col2:
-            # Fernando
-            vendas_fernando = vendas_por_vendedor[vendas_por_vendedor['vendedor'] == 'Fernando']['valor'].sum() if not vendas_por_vendedor.empty else 0
-            meta_fernando = 50000
-            st.markdown(create_vendedor_card("Fernando", vendas_fernando, meta_fernando, "fernando"), unsafe_allow_html=True)
-    else:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown(create_vendedor_card("Ana", 0, 50000, "ana"), unsafe_allow_html=True)
-        with col2:
-            st.markdown(create_vendedor_card("Fernando", 0, 50000, "fernando"), unsafe_allow_html=True)
+    colunas = st.columns(len(progresso))
+    for coluna, (_, linha) in zip(colunas, progresso.iterrows()):
+        with coluna:
+            nome = VENDEDORES.get(linha['vendedor'], linha['vendedor'].title())
+            st.markdown(create_vendedor_card(nome, linha['faturado'], linha['meta_vendas'], linha['vendedor']), unsafe_allow_html=True)
     
     # ========== GRÁFICOS ==========
     col1, col2 = st.columns(2)
@@ -156,20 +209,15 @@ def show_page():
                 'id': 'count'
             }).reset_index()
             vendas_diarias.columns = ['Data', 'Faturamento', 'Quantidade']
+            vendas_diarias = reduzir_serie(vendas_diarias, 'Data', 'Faturamento', inicio=data_inicio, fim=data_fim)
             
-            fig = px.line(
-                vendas_diarias, 
+            fig = grafico('overview_faturamento', vendas_diarias, lambda dados, template: px.line(
+                dados, 
                 x='Data', 
                 y='Faturamento',
                 title="Faturamento Diário",
-                color_discrete_sequence=[user_theme['primary']]
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                title_font_size=16
-            )
+                template=template
+            ), versao=(inicio_iso, fim_iso) + versoes if versoes else None)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("📊 Sem dados de vendas para exibir")
@@ -190,20 +238,15 @@ def show_page():
                 'perdido': '#EF4444'
             }
             
-            fig = px.funnel(
-                funil_leads,
+            fig = grafico('overview_funil', funil_leads, lambda dados, template: px.funnel(
+                dados,
                 x='Quantidade',
                 y='Status',
                 title="Pipeline de Leads",
                 color='Status',
-                color_discrete_map=cores_funil
-            )
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font_color='white',
-                title_font_size=16
-            )
+                color_discrete_map=cores_funil,
+                template=template
+            ), versao=versoes)
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("🎯 Sem dados de leads para exibir")
@@ -214,7 +257,7 @@ def show_page():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if faturamento < 30000:  # Se faturamento baixo
+        if faturado_mes < meta_mes * hoje.day / dias_mes:  # Abaixo do ritmo da meta
             st.warning("⚠️ **Faturamento abaixo da meta!** Acelere as vendas.")
         else:
             st.success("✅ **Meta em dia!** Continue assim.")
@@ -232,48 +275,72 @@ def show_page():
         else:
             st.success(f"🎉 **{vendas_hoje_count} vendas hoje!** Excelente trabalho!")
     
-    # ========== RANKING SEMANAL ==========
-    st.markdown("### 🏆 Ranking da Semana")
+    # ========== RANKING ==========
+    col1, col2 = st.columns([3, 1])
     
-    # Calcular vendas da semana
-    inicio_semana = datetime.now() - timedelta(days=7)
-    vendas_semana = vendas_confirmadas[vendas_confirmadas['data_venda'] >= inicio_semana.strftime('%Y-%m-%d')] if not vendas_confirmadas.empty else pd.DataFrame()
+    with col2:
+        janela = st.selectbox("📅 Janela", ["Semana", "Mês", "Período selecionado"], key="overview_ranking_janela",
+                              label_visibility="collapsed")
     
-    if not vendas_semana.empty:
-        ranking = vendas_semana.groupby('vendedor').agg({
-            'valor': 'sum',
-            'id': 'count'
-        }).reset_index()
-        ranking.columns = ['Vendedor', 'Faturamento', 'Vendas']
-        ranking = ranking.sort_values('Faturamento', ascending=False)
-        
-        for i, row in ranking.iterrows():
-            emoji = "🥇" if i == 0 else "🥈" if i == 1 else "🥉"
-            st.markdown(f"{emoji} **{row['Vendedor']}** - R$ {row['Faturamento']:,.2f} ({row['Vendas']} vendas)")
+    if janela == "Semana":
+        inicio_ranking, fim_ranking = hoje - timedelta(days=6), hoje
+    elif janela == "Mês":
+        inicio_ranking, fim_ranking = hoje.replace(day=1), hoje
     else:
-        st.info("🏆 Nenhuma venda registrada esta semana")
+        inicio_ranking, fim_ranking = data_inicio, data_fim
     
-    # ========== ÚLTIMAS ATIVIDADES ==========
-    st.markdown("### 📝 Últimas Atividades")
+    with col1:
+        titulo = {"Semana": "da Semana", "Mês": "do Mês", "Período selecionado": "do Período"}[janela]
+        st.markdown(f"### 🏆 Ranking {titulo}")
+    
+    # Top-N agregado no banco (ranking_vendedores, relatorios.sql), refeito só quando vendas mudam
+    ranking = memo_versao(('ranking', inicio_ranking, fim_ranking), ('vendas',),
+                          lambda: db.get_ranking_vendedores(inicio_ranking, fim_ranking, limite=RANKING_TOP_N))
+    
+    if not ranking.empty:
+        medalhas = {1: "🥇", 2: "🥈", 3: "🥉"}
+        for row in ranking.to_dict('records'):
+            emoji = medalhas.get(int(row['posicao']), f"{int(row['posicao'])}º")
+            if pd.isna(row['variacao']):
+                variacao = "🆕 sem vendas no período anterior"
+            else:
+                variacao = f"{'▲' if row['variacao'] >= 0 else '▼'} {abs(row['variacao']):.1f}% vs período anterior"
+            st.markdown(f"{emoji} **{row['vendedor']}** - R$ {row['faturamento']:,.2f} ({row['vendas']} vendas) · {variacao}")
+    else:
+        st.info("🏆 Nenhuma venda registrada no período")
+
+
+def _painel_notificacoes(db):
+    """Notificações não lidas do usuário (ex.: leads quentes detectados por webhook)"""
+    username = st.session_state.get('user_info', {}).get('username', '')
     
-    logs_df = db.get_activity_logs(limit=10)
+    notificacoes_df = get_live_frame(
+        'notificacoes', lambda: db.get_notificacoes(username), username,
+        filtro=lambda n: n.get('user_id') == username and not n.get('lida')
+    )
     
-    if not logs_df.empty:
-        for _, log in logs_df.head(5).iterrows():
-            timestamp = pd.to_datetime(log['timestamp']).strftime('%d/%m %H:%M')
-            st.markdown(f"🔸 **{log['user_id'].title()}** - {log['action']} - {timestamp}")
-    else:
-        st.info("📝 Nenhuma atividade recente registrada")
+    # Na primeira carga, não repetir toasts de notificações antigas
+    primeira_carga = 'notificacoes_exibidas' not in st.session_state
+    exibidas = st.session_state.setdefault('notificacoes_exibidas', set())
     
-    # ========== REFRESH AUTOMÁTICO ==========
-    if st.button("🔄 Atualizar Dashboard", type="primary", use_container_width=True):
-        st.rerun()
+    if notificacoes_df.empty:
+        return
     
-    # Auto-refresh a cada 5 minutos (opcional)
-    st.markdown("""
-    <script>
-    setTimeout(function(){
-        window.location.reload();
-    }, 300000); // 5 minutos
-    </script>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    for notificacao in notificacoes_df.to_dict('records'):
+        if notificacao['id'] not in exibidas:
+            if not primeira_carga:
+                st.toast(f"**{notificacao['titulo']}** {notificacao.get('mensagem') or ''}", icon="🔔")
+            exibidas.add(notificacao['id'])
+    
+    with st.expander(f"🔔 {len(notificacoes_df)} notificações não lidas"):
+        for notificacao in notificacoes_df.head(10).to_dict('records'):
+            col1, col2 = st.columns([5, 1])
+            
+            with col1:
+                st.markdown(f"**{notificacao['titulo']}** - {notificacao.get('mensagem') or ''}")
+            
+            with col2:
+                if st.button("✔️", key=f"notificacao_lida_{notificacao['id']}", help="Marcar como lida"):
+                    if db.marcar_notificacao_lida(notificacao['id']):
+                        invalidar_frames('notificacoes')
+                        st.rerun(scope="fragment")
@@ -3,8 +3,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from utils.database import Database
+from utils.database import COLUNAS_VENDAS, get_database
 from utils.auth import get_current_user
+from utils.exports import ExportManager
+from utils.report_jobs import solicitar_relatorio, mostrar_relatorio
+from utils.charts import grafico
+from utils.cashflow import MAX_PARCELAS
+from utils.comissoes import intervalo_mes, recalcular_comissoes
+from utils.metas import verificar_meta_atingida
+from utils.realtime import invalidar_frames
 
 def show_page():
     """Página de Vendas - CRUD completo de vendas e comissões"""
@@ -13,7 +20,7 @@ def show_page():
     st.markdown("**Adicione, edite e acompanhe todas as vendas da equipe**")
     
     # Inicializar database
-    db = Database()
+    db = get_database()
     user_info = get_current_user()
     
     # Tabs principais
@@ -46,7 +53,7 @@ def show_page():
                 meio_pagamento = st.selectbox("💳 Meio de Pagamento", [
                     "PIX", "Cartão à vista", "Cartão parcelado", "Boleto", "Transferência"
                 ])
-                comissao_pct = st.number_input("📈 Comissão (%)", min_value=0.0, max_value=100.0, value=30.0, step=1.0) / 100
+                parcelas = st.number_input("🔢 Parcelas (cartão parcelado)", min_value=1, max_value=MAX_PARCELAS, value=1, step=1)
             
             observacoes = st.text_area("📝 Observações", placeholder="Detalhes adicionais sobre a venda...")
             
@@ -70,7 +77,7 @@ def show_page():
                         'data_venda': data_venda.strftime('%Y-%m-%d'),
                         'status': 'confirmada',
                         'meio_pagamento': meio_pagamento,
-                        'comissao_pct': comissao_pct,
+                        'parcelas': int(parcelas) if meio_pagamento == "Cartão parcelado" else 1,
                         'observacoes': observacoes,
                         'created_at': datetime.now().isoformat()
                     }
@@ -78,107 +85,20 @@ def show_page():
                     if db.add_venda(venda_data):
                         st.success("✅ Venda adicionada com sucesso!")
                         db.log_activity(user_info.get('username', ''), 'Nova Venda', f"Venda de R$ {valor:,.2f} para {cliente_nome}")
+                        # A venda pode mudar a faixa de comissão do vendedor no mês
+                        recalcular_comissoes(db, *intervalo_mes(data_venda.strftime('%Y-%m')))
+                        # Webhook meta_atingida (uma única vez por vendedor e mês)
+                        verificar_meta_atingida(db, vendedor, data_venda)
+                        invalidar_frames('vendas', 'leads')
                         st.balloons()
                         st.rerun()
                     else:
                         st.error("❌ Erro ao adicionar venda. Tente novamente.")
     
     # ========== TAB 2: HISTÓRICO ==========
+    # Fragmento: filtros e período rerodam só o histórico
     with tab2:
-        st.markdown("### 📋 Histórico de Vendas")
-        
-        # Filtros
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            filtro_vendedor = st.selectbox("👤 Filtrar por Vendedor", ["Todos", "Ana", "Fernando"])
-        
-        with col2:
-            filtro_status = st.selectbox("📊 Status", ["Todos", "confirmada", "pendente", "cancelada"])
-        
-        with col3:
-            data_inicio = st.date_input("📅 Data Início", value=datetime.now() - timedelta(days=30))
-        
-        with col4:
-            data_fim = st.date_input("📅 Data Fim", value=datetime.now().date())
-        
-        # Buscar vendas
-        vendas_df = db.get_vendas(data_inicio, data_fim)
-        
-        if not vendas_df.empty:
-            # Aplicar filtros
-            if filtro_vendedor != "Todos":
-                vendas_df = vendas_df[vendas_df['vendedor'] == filtro_vendedor]
-            
-            if filtro_status != "Todos":
-                vendas_df = vendas_df[vendas_df['status'] == filtro_status]
-            
-            # Estatísticas do período
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("🏆 Total de Vendas", len(vendas_df))
-            
-            with col2:
-                total_faturamento = vendas_df['valor'].sum()
-                st.metric("💰 Faturamento", f"R$ {total_faturamento:,.2f}")
-            
-            with col3:
-                ticket_medio = vendas_df['valor'].mean()
-                st.metric("🎫 Ticket Médio", f"R$ {ticket_medio:,.2f}")
-            
-            with col4:
-                total_comissoes = vendas_df['valor'].sum() * 0.3  # Assumindo 30% de comissão
-                st.metric("💵 Comissões", f"R$ {total_comissoes:,.2f}")
-            
-            # Tabela de vendas
-            st.markdown("### 📊 Lista de Vendas")
-            
-            # Preparar dados para exibição
-            vendas_display = vendas_df.copy()
-            vendas_display['valor'] = vendas_display['valor'].apply(lambda x: f"R$ {x:,.2f}")
-            vendas_display['data_venda'] = pd.to_datetime(vendas_display['data_venda']).dt.strftime('%d/%m/%Y')
-            
-            # Configurar colunas
-            column_config = {
-                'cliente_nome': st.column_config.TextColumn('Cliente', width='medium'),
-                'produto': st.column_config.TextColumn('Produto', width='medium'),
-                'valor': st.column_config.TextColumn('Valor', width='small'),
-                'vendedor': st.column_config.TextColumn('Vendedor', width='small'),
-                'data_venda': st.column_config.TextColumn('Data', width='small'),
-                'status': st.column_config.TextColumn('Status', width='small'),
-                'meio_pagamento': st.column_config.TextColumn('Pagamento', width='medium'),
-            }
-            
-            # Exibir tabela editável
-            edited_df = st.data_editor(
-                vendas_display[['cliente_nome', 'produto', 'valor', 'vendedor', 'data_venda', 'status', 'meio_pagamento']],
-                column_config=column_config,
-                hide_index=True,
-                use_container_width=True,
-                height=400
-            )
-            
-            # Opções de ação em massa
-            col1, col2, col3 = st.columns([1, 1, 2])
-            
-            with col1:
-                if st.button("📥 Exportar CSV", use_container_width=True):
-                    csv = vendas_df.to_csv(index=False)
-                    st.download_button(
-                        label="💾 Download CSV",
-                        data=csv,
-                        file_name=f"vendas_{datetime.now().strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
-            
-            with col2:
-                if st.button("📊 Exportar Excel", use_container_width=True):
-                    # Implementar export Excel
-                    st.success("✅ Funcionalidade em desenvolvimento")
-        
-        else:
-            st.info("📊 Nenhuma venda encontrada no período selecionado")
+        _aba_historico(db)
     
     # ========== TAB 3: COMISSÕES ==========
     with tab3:
@@ -196,62 +116,39 @@ def show_page():
         with col2:
             st.markdown("**🎯 Meta de Comissão: R$ 15.000,00**")
         
-        # Calcular comissões
-        vendas_df = db.get_vendas()
+        # Comissões gravadas no mês (faixa de data indexada)
+        inicio_mes, fim_mes = intervalo_mes(mes_comissao)
         
-        if not vendas_df.empty:
-            # Filtrar por mês
-            vendas_df['data_venda'] = pd.to_datetime(vendas_df['data_venda'])
-            vendas_mes = vendas_df[vendas_df['data_venda'].dt.strftime('%Y-%m') == mes_comissao]
+        if st.button("🔄 Recalcular comissões do mês", help="Reaplica as regras de comissão às vendas do mês"):
+            atualizadas = recalcular_comissoes(db, inicio_mes, fim_mes)
+            st.success(f"✅ {atualizadas} venda(s) com comissão atualizada")
+        
+        comissoes = db.get_comissoes(inicio_mes, fim_mes)
+        
+        if not comissoes.empty:
+            comissoes['Pct'] = (comissoes['comissao'] / comissoes['total_vendas'].where(comissoes['total_vendas'] > 0)).fillna(0) * 100
             
-            if not vendas_mes.empty:
-                comissoes = vendas_mes.groupby('vendedor').agg({
-                    'valor': ['sum', 'count'],
-                }).round(2)
-                
-                comissoes.columns = ['Total_Vendas', 'Qtd_Vendas']
-                comissoes['Comissao_30pct'] = comissoes['Total_Vendas'] * 0.3
-                comissoes = comissoes.reset_index()
-                
-                # Cards de comissão
-                for _, row in comissoes.iterrows():
-                    with st.container():
-                        if row['vendedor'] == 'Ana':
-                            st.markdown(f"""
-                            <div class="vendedor-ana">
-                                <h3>👤 {row['vendedor']}</h3>
-                                <div style="display: flex; justify-content: space-between;">
-                                    <div>
-                                        <p><strong>Vendas:</strong> {row['Qtd_Vendas']:.0f}</p>
-                                        <p><strong>Faturamento:</strong> R$ {row['Total_Vendas']:,.2f}</p>
-                                    </div>
-                                    <div style="text-align: right;">
-                                        <p style="font-size: 1.5rem;"><strong>R$ {row['Comissao_30pct']:,.2f}</strong></p>
-                                        <p>Comissão (30%)</p>
-                                    </div>
-                                </div>
+            # Cards de comissão
+            for _, row in comissoes.iterrows():
+                classe = "vendedor-ana" if row['vendedor'] == 'Ana' else "vendedor-fernando"
+                with st.container():
+                    st.markdown(f"""
+                    <div class="{classe}">
+                        <h3>👤 {row['vendedor']}</h3>
+                        <div style="display: flex; justify-content: space-between;">
+                            <div>
+                                <p><strong>Vendas:</strong> {row['quantidade']:.0f}</p>
+                                <p><strong>Faturamento:</strong> R$ {row['total_vendas']:,.2f}</p>
                             </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div class="vendedor-fernando">
-                                <h3>👤 {row['vendedor']}</h3>
-                                <div style="display: flex; justify-content: space-between;">
-                                    <div>
-                                        <p><strong>Vendas:</strong> {row['Qtd_Vendas']:.0f}</p>
-                                        <p><strong>Faturamento:</strong> R$ {row['Total_Vendas']:,.2f}</p>
-                                    </div>
-                                    <div style="text-align: right;">
-                                        <p style="font-size: 1.5rem;"><strong>R$ {row['Comissao_30pct']:,.2f}</strong></p>
-                                        <p>Comissão (30%)</p>
-                                    </div>
-                                </div>
+                            <div style="text-align: right;">
+                                <p style="font-size: 1.5rem;"><strong>R$ {row['comissao']:,.2f}</strong></p>
+                                <p>Comissão ({row['Pct']:.1f}%)</p>
                             </div>
-                            """, unsafe_allow_html=True)
-            else:
-                st.info("💵 Nenhuma venda registrada no mês selecionado")
+                        </div>
+                    </div>
+                    """, unsafe_allow_html=True)
         else:
-            st.info("💵 Nenhum dado de venda disponível")
+            st.info("💵 Nenhuma venda registrada no mês selecionado")
     
     # ========== TAB 4: RELATÓRIOS ==========
     with tab4:
@@ -273,19 +170,15 @@ def show_page():
                 ])['valor'].sum().reset_index()
                 vendas_mensais['data_venda'] = vendas_mensais['data_venda'].astype(str)
                 
-                fig = px.bar(
-                    vendas_mensais,
+                fig = grafico('vendas_mensais', vendas_mensais, lambda dados, template: px.bar(
+                    dados,
                     x='data_venda',
                     y='valor',
                     color='vendedor',
                     title="Faturamento Mensal por Vendedor",
-                    color_discrete_map={'Ana': '#9D4EDD', 'Fernando': '#0EA5E9'}
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
+                    color_discrete_map={'Ana': '#9D4EDD', 'Fernando': '#0EA5E9'},
+                    template=template
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
@@ -294,17 +187,13 @@ def show_page():
                 vendas_produto = vendas_df['produto'].value_counts().reset_index()
                 vendas_produto.columns = ['Produto', 'Quantidade']
                 
-                fig = px.pie(
-                    vendas_produto,
+                fig = grafico('vendas_produto', vendas_produto, lambda dados, template: px.pie(
+                    dados,
                     values='Quantidade',
                     names='Produto',
-                    title="Distribuição de Vendas por Produto"
-                )
-                fig.update_layout(
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    font_color='white'
-                )
+                    title="Distribuição de Vendas por Produto",
+                    template=template
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             
             # Análise de performance
@@ -331,4 +220,131 @@ def show_page():
                 use_container_width=True
             )
         else:
-            st.info("📊 Nenhum dado disponível para relatórios")
\ No newline at end of file
+            st.info("📊 Nenhum dado disponível para relatórios")
+
+
+@st.fragment
+def _aba_historico(db):
+    """Filtros, métricas, lista e exports do histórico de vendas"""
+    
+    st.markdown("### 📋 Histórico de Vendas")
+    
+    # Filtros
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        filtro_vendedor = st.selectbox("👤 Filtrar por Vendedor", ["Todos", "Ana", "Fernando"])
+    
+    with col2:
+        filtro_status = st.selectbox("📊 Status", ["Todos", "confirmada", "pendente", "cancelada"])
+    
+    with col3:
+        data_inicio = st.date_input("📅 Data Início", value=datetime.now() - timedelta(days=30))
+    
+    with col4:
+        data_fim = st.date_input("📅 Data Fim", value=datetime.now().date())
+    
+    # Buscar vendas
+    vendas_df = db.get_vendas(data_inicio, data_fim)
+    
+    if not vendas_df.empty:
+        # Aplicar filtros
+        if filtro_vendedor != "Todos":
+            vendas_df = vendas_df[vendas_df['vendedor'] == filtro_vendedor]
+    
+        if filtro_status != "Todos":
+            vendas_df = vendas_df[vendas_df['status'] == filtro_status]
+    
+        # Estatísticas do período
+        col1, col2, col3, col4 = st.columns(4)
+    
+        with col1:
+            st.metric("🏆 Total de Vendas", len(vendas_df))
+    
+        with col2:
+            total_faturamento = vendas_df['valor'].sum()
+            st.metric("💰 Faturamento", f"R$ {total_faturamento:,.2f}")
+    
+        with col3:
+            ticket_medio = vendas_df['valor'].mean()
+            st.metric("🎫 Ticket Médio", f"R$ {ticket_medio:,.2f}")
+    
+        with col4:
+            total_comissoes = pd.to_numeric(vendas_df['comissao_valor']).sum() if 'comissao_valor' in vendas_df.columns else 0.0
+            st.metric("💵 Comissões", f"R$ {total_comissoes:,.2f}")
+    
+        # Tabela de vendas
+        st.markdown("### 📊 Lista de Vendas")
+    
+        # Preparar dados para exibição
+        vendas_display = vendas_df.copy()
+        vendas_display['valor'] = vendas_display['valor'].apply(lambda x: f"R$ {x:,.2f}")
+        vendas_display['data_venda'] = pd.to_datetime(vendas_display['data_venda']).dt.strftime('%d/%m/%Y')
+    
+        # Configurar colunas
+        column_config = {
+            'cliente_nome': st.column_config.TextColumn('Cliente', width='medium'),
+            'produto': st.column_config.TextColumn('Produto', width='medium'),
+            'valor': st.column_config.TextColumn('Valor', width='small'),
+            'vendedor': st.column_config.TextColumn('Vendedor', width='small'),
+            'data_venda': st.column_config.TextColumn('Data', width='small'),
+            'status': st.column_config.TextColumn('Status', width='small'),
+            'meio_pagamento': st.column_config.TextColumn('Pagamento', width='medium'),
+        }
+    
+        # Exibir tabela editável
+        edited_df = st.data_editor(
+            vendas_display[['cliente_nome', 'produto', 'valor', 'vendedor', 'data_venda', 'status', 'meio_pagamento']],
+            column_config=column_config,
+            hide_index=True,
+            use_container_width=True,
+            height=400
+        )
+    
+        # Opções de ação em massa
+        col1, col2, col3 = st.columns([1, 1, 2])
+    
+        with col1:
+            compactar = st.checkbox("🗜️ Compactar (.gz)", value=False)
+    
+            if st.button("📥 Exportar CSV", use_container_width=True):
+                # Export em streaming: busca página a página direto do banco
+                with st.spinner("📥 Gerando CSV..."):
+                    paginas = db.iter_vendas(
+                        data_inicio, data_fim,
+                        vendedor=filtro_vendedor if filtro_vendedor != "Todos" else None,
+                        status=filtro_status if filtro_status != "Todos" else None
+                    )
+                    try:
+                        caminho, filename, mime = ExportManager().export_csv_stream(
+                            paginas, filename_prefix="vendas", compactar=compactar, colunas=COLUNAS_VENDAS
+                        )
+                    except Exception as e:
+                        # Falha no meio da leitura: nada de CSV incompleto para download
+                        st.error(f"❌ Erro ao exportar vendas: {e}")
+                        caminho = None
+    
+                if caminho:
+                    with open(caminho, "rb") as arquivo:
+                        st.download_button(
+                            label="💾 Download CSV",
+                            data=arquivo,
+                            file_name=filename,
+                            mime=mime
+                        )
+    
+        with col2:
+            if st.button("📊 Exportar Excel", use_container_width=True):
+                # Implementar export Excel
+                st.success("✅ Funcionalidade em desenvolvimento")
+    
+        with col3:
+            if st.button("📄 Relatório PDF", use_container_width=True):
+                # Renderizado em segundo plano; pedidos iguais reaproveitam o arquivo
+                periodo = f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}"
+                solicitar_relatorio('vendas_pdf', {'periodo': periodo}, {'vendas': vendas_df})
+    
+            mostrar_relatorio('vendas_pdf', "💾 Download PDF")
+    
+    else:
+        st.info("📊 Nenhuma venda encontrada no período selecionado")
@@ -0,0 +1,34 @@
+-- Atualização em tempo real do dashboard (Supabase Realtime)
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- O app (utils/realtime.py) assina inserts/updates/deletes destas tabelas e
+-- aplica as mudanças nos dados já carregados, sem refazer as consultas.
+
+-- ========== PUBLICAÇÃO ==========
+
+DO $$
+DECLARE
+    tabela TEXT;
+BEGIN
+    FOREACH tabela IN ARRAY ARRAY['vendas', 'leads', 'notificacoes'] LOOP
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_publication_tables
+            WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = tabela
+        ) THEN
+            EXECUTE FORMAT('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', tabela);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Enviar a linha antiga completa em updates/deletes (necessário para remover
+-- registros do período exibido quando mudam de data ou status)
+ALTER TABLE vendas REPLICA IDENTITY FULL;
+ALTER TABLE leads REPLICA IDENTITY FULL;
+ALTER TABLE notificacoes REPLICA IDENTITY FULL;
+
+-- ========== VERIFICAÇÃO ==========
+
+SELECT schemaname, tablename
+FROM pg_publication_tables
+WHERE pubname = 'supabase_realtime'
+ORDER BY tablename;
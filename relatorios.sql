@@ -0,0 +1,74 @@
+-- Funções de agregação usadas pelos relatórios e exports
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- Os relatórios recebem totais já agregados pelo banco em vez de baixar
+-- todas as vendas do período para agrupar no app.
+
+-- ========== RESUMO DE VENDAS ==========
+
+-- Total e quantidade por vendedor e status no período (datas opcionais)
+CREATE OR REPLACE FUNCTION vendas_resumo(p_inicio DATE DEFAULT NULL, p_fim DATE DEFAULT NULL)
+RETURNS TABLE (vendedor VARCHAR, status VARCHAR, total NUMERIC, quantidade BIGINT) AS $$
+    SELECT v.vendedor, v.status, SUM(v.valor), COUNT(*)
+    FROM vendas v
+    WHERE (p_inicio IS NULL OR v.data_venda >= p_inicio)
+      AND (p_fim IS NULL OR v.data_venda <= p_fim)
+    GROUP BY v.vendedor, v.status
+    ORDER BY v.vendedor, v.status;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION vendas_resumo(DATE, DATE) TO anon, authenticated;
+
+-- ========== RANKING DE VENDEDORES ==========
+
+-- Vendas confirmadas por data com vendedor e valor no índice (index-only scan).
+-- Índice único para as faixas de vendas confirmadas (mesmo nome e definição em
+-- comissoes.sql): substitui idx_vendas_ranking e a versão sem INCLUDE
+DROP INDEX IF EXISTS idx_vendas_ranking;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE indexname = 'idx_vendas_confirmadas_data' AND indexdef NOT LIKE '%INCLUDE%'
+    ) THEN
+        DROP INDEX idx_vendas_confirmadas_data;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_vendas_confirmadas_data ON vendas(data_venda) INCLUDE (vendedor, valor)
+    WHERE status = 'confirmada';
+
+-- Top-N vendedores da janela [p_inicio, p_fim] com faturamento, nº de vendas
+-- e variação contra a janela anterior de mesmo tamanho, numa única leitura
+-- das duas janelas (agregados com FILTER)
+CREATE OR REPLACE FUNCTION ranking_vendedores(p_inicio DATE, p_fim DATE, p_limite INTEGER DEFAULT 10)
+RETURNS TABLE (
+    posicao BIGINT, vendedor VARCHAR, faturamento NUMERIC, vendas BIGINT,
+    faturamento_anterior NUMERIC, vendas_anterior BIGINT, variacao NUMERIC
+) AS $$
+    WITH janelas AS (
+        SELECT
+            v.vendedor,
+            COALESCE(SUM(v.valor) FILTER (WHERE v.data_venda >= p_inicio), 0) AS faturamento,
+            COUNT(*) FILTER (WHERE v.data_venda >= p_inicio) AS vendas,
+            COALESCE(SUM(v.valor) FILTER (WHERE v.data_venda < p_inicio), 0) AS faturamento_anterior,
+            COUNT(*) FILTER (WHERE v.data_venda < p_inicio) AS vendas_anterior
+        FROM vendas v
+        WHERE v.status = 'confirmada'
+          AND v.data_venda BETWEEN p_inicio - (p_fim - p_inicio + 1) AND p_fim
+        GROUP BY v.vendedor
+    )
+    SELECT
+        RANK() OVER (ORDER BY j.faturamento DESC),
+        j.vendedor, j.faturamento, j.vendas, j.faturamento_anterior, j.vendas_anterior,
+        CASE WHEN j.faturamento_anterior > 0
+             THEN ROUND((j.faturamento - j.faturamento_anterior) / j.faturamento_anterior * 100, 2)
+        END
+    FROM janelas j
+    WHERE j.vendas > 0
+    ORDER BY j.faturamento DESC, j.vendedor
+    LIMIT p_limite;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION ranking_vendedores(DATE, DATE, INTEGER) TO anon, authenticated;
@@ -30,6 +30,7 @@ CREATE TABLE IF NOT EXISTS vendas (
     data_venda DATE NOT NULL,
     status VARCHAR(20) DEFAULT 'pendente',
     meio_pagamento VARCHAR(50),
+    parcelas SMALLINT DEFAULT 1 CHECK (parcelas BETWEEN 1 AND 12),
     comissao_pct DECIMAL(5,4) DEFAULT 0.30,
     comissao_valor DECIMAL(10,2) GENERATED ALWAYS AS (valor * comissao_pct) STORED,
     observacoes TEXT,
@@ -79,6 +80,7 @@ CREATE TABLE IF NOT EXISTS custos (
     data_custo DATE NOT NULL,
     responsavel VARCHAR(50),
     recorrente BOOLEAN DEFAULT FALSE,
+    recorrente_fim DATE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -121,9 +123,14 @@ CREATE TABLE IF NOT EXISTS notificacoes (
 CREATE INDEX IF NOT EXISTS idx_vendas_vendedor ON vendas(vendedor);
 CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas(data_venda);
 CREATE INDEX IF NOT EXISTS idx_vendas_status ON vendas(status);
+-- Paginação keyset dos exports (ORDER BY data_venda DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_vendas_data_id ON vendas(data_venda DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_leads_vendedor ON leads(vendedor);
 CREATE INDEX IF NOT EXISTS idx_leads_status ON leads(status);
 CREATE INDEX IF NOT EXISTS idx_leads_created ON leads(created_at);
+-- Lista paginada do pipeline (filtro por status, ORDER BY created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_leads_pipeline ON leads(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_leads_created_id ON leads(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_activity_logs_user ON activity_logs(user_id);
 CREATE INDEX IF NOT EXISTS idx_activity_logs_timestamp ON activity_logs(timestamp);
 
@@ -0,0 +1,54 @@
+"""Recebíveis do fluxo de caixa (utils/cashflow.py)"""
+
+import pandas as pd
+
+from utils.cashflow import expandir_recebiveis
+
+
+def _vendas(*linhas):
+    return pd.DataFrame([
+        {'id': i, 'status': 'confirmada', 'parcelas': 1, **linha}
+        for i, linha in enumerate(linhas, start=1)
+    ])
+
+
+def _datas(recebiveis):
+    return [d.date().isoformat() for d in pd.to_datetime(recebiveis['data'])]
+
+
+def test_centavos_que_sobram_ficam_na_primeira_parcela():
+    vendas = _vendas({'data_venda': '2026-10-01', 'valor': 100.0,
+                      'meio_pagamento': 'Cartão parcelado', 'parcelas': 3})
+
+    recebiveis = expandir_recebiveis(vendas)
+
+    assert recebiveis['parcela'].tolist() == [1, 2, 3]
+    assert recebiveis['valor'].tolist() == [33.34, 33.33, 33.33]
+    assert round(recebiveis['valor'].sum(), 2) == 100.0
+
+
+def test_prazo_cai_no_proximo_dia_util():
+    vendas = _vendas(
+        # sexta + 2 dias úteis -> terça
+        {'data_venda': '2026-10-16', 'valor': 50.0, 'meio_pagamento': 'Boleto'},
+        # quinta + 30 dias corridos = sábado -> segunda
+        {'data_venda': '2026-09-17', 'valor': 80.0, 'meio_pagamento': 'Cartão à vista'},
+    )
+
+    assert _datas(expandir_recebiveis(vendas)) == ['2026-10-20', '2026-10-19']
+
+
+def test_pix_no_fim_de_semana_entra_no_mesmo_dia():
+    vendas = _vendas(
+        {'data_venda': '2026-10-17', 'valor': 30.0, 'meio_pagamento': 'PIX'},
+        {'data_venda': '2026-10-18', 'valor': 40.0, 'meio_pagamento': 'PIX'},
+    )
+
+    assert _datas(expandir_recebiveis(vendas)) == ['2026-10-17', '2026-10-18']
+
+
+def test_vendas_nao_confirmadas_nao_geram_recebiveis():
+    vendas = _vendas({'data_venda': '2026-10-01', 'valor': 10.0, 'meio_pagamento': 'PIX'})
+    vendas['status'] = 'pendente'
+
+    assert expandir_recebiveis(vendas).empty
@@ -0,0 +1,86 @@
+"""Motor de comissões (utils/comissoes.py)"""
+
+from datetime import date
+
+import pandas as pd
+
+from utils.comissoes import PCT_PADRAO, calcular_comissoes, recalcular_comissoes
+
+METAS = {'ana': 1000.0, 'fernando': 1000.0}
+
+
+def _vendas(*linhas):
+    base = {'vendedor': 'ana', 'produto': 'Curso', 'meio_pagamento': 'PIX', 'valor': 100.0,
+            'data_venda': '2026-10-05', 'status': 'confirmada', 'comissao_pct': None}
+    return pd.DataFrame([{'id': i, **base, **linha} for i, linha in enumerate(linhas, start=1)])
+
+
+def test_regra_mais_especifica_vence_mesmo_antes_na_lista():
+    regras = (
+        {'vendedor': 'Ana', 'produto': 'Curso', 'pct': 0.50},
+        {'vendedor': 'ana', 'pct': 0.40},
+        {'pct': 0.30},
+    )
+    vendas = _vendas({'produto': 'Curso'}, {'produto': 'Mentoria'}, {'vendedor': 'fernando'})
+
+    assert calcular_comissoes(vendas, METAS, regras).tolist() == [0.50, 0.40, 0.30]
+
+
+def test_empate_de_campos_vence_maior_atingimento_min():
+    regras = (
+        {'atingimento_min': 1.0, 'pct': 0.35},
+        {'atingimento_min': 0.5, 'pct': 0.32},
+    )
+    # ana: 1200 / 1000 = 1,2 da meta; fernando: 600 / 1000 = 0,6
+    vendas = _vendas({'valor': 1200.0}, {'vendedor': 'fernando', 'valor': 600.0})
+
+    assert calcular_comissoes(vendas, METAS, regras).tolist() == [0.35, 0.32]
+
+
+def test_empate_total_vence_a_ultima_regra():
+    regras = ({'vendedor': 'ana', 'pct': 0.40}, {'produto': 'Curso', 'pct': 0.45})
+    vendas = _vendas({})
+
+    assert calcular_comissoes(vendas, METAS, regras).tolist() == [0.45]
+    assert calcular_comissoes(vendas, METAS, regras[::-1]).tolist() == [0.40]
+
+
+def test_sem_regra_aplicavel_usa_pct_padrao():
+    vendas = _vendas({}, {'vendedor': 'fernando'})
+
+    assert calcular_comissoes(vendas, METAS, ({'vendedor': 'fernando', 'pct': 0.50},)).tolist() == [PCT_PADRAO, 0.50]
+    assert calcular_comissoes(vendas, METAS, ()).tolist() == [PCT_PADRAO, PCT_PADRAO]
+
+
+class _BancoFalso:
+    def __init__(self, vendas):
+        self.vendas = vendas
+        self.aplicadas = []
+
+    def get_vendas(self, inicio, fim):
+        return self.vendas
+
+    def aplicar_comissoes(self, pcts):
+        self.aplicadas.append(pcts)
+        return len(pcts)
+
+
+def test_recalcular_envia_so_as_vendas_que_mudaram():
+    regras = ({'pct': 0.30}, {'produto': 'Mentoria', 'pct': 0.40})
+    banco = _BancoFalso(_vendas(
+        {'comissao_pct': 0.30},
+        {'produto': 'Mentoria', 'comissao_pct': 0.30},
+        {'comissao_pct': None},
+    ))
+
+    atualizadas = recalcular_comissoes(banco, date(2026, 10, 1), date(2026, 10, 31), METAS, regras)
+
+    assert atualizadas == 2
+    assert banco.aplicadas[0].to_dict() == {2: 0.40, 3: 0.30}
+
+
+def test_recalcular_sem_mudancas_nao_grava():
+    banco = _BancoFalso(_vendas({'comissao_pct': 0.30}, {'comissao_pct': 0.30}))
+
+    assert recalcular_comissoes(banco, date(2026, 10, 1), date(2026, 10, 31), METAS, ({'pct': 0.30},)) == 0
+    assert banco.aplicadas == []
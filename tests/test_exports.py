@@ -0,0 +1,41 @@
+"""Export de CSV em streaming (utils/exports.py)"""
+
+import gzip
+import os
+
+import pytest
+
+from utils import exports
+from utils.exports import ExportManager
+
+
+@pytest.fixture(autouse=True)
+def pasta_exports(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_export_sem_linhas_tem_cabecalho():
+    caminho, _, _ = ExportManager().export_csv_stream(iter([]), colunas=['id', 'valor'])
+
+    with open(caminho, encoding='utf-8') as f:
+        assert f.read().splitlines() == ['id,valor']
+
+
+def test_export_compactado_sem_linhas_tem_cabecalho():
+    caminho, filename, _ = ExportManager().export_csv_stream(iter([[]]), compactar=True, colunas=['id', 'valor'])
+
+    assert filename.endswith('.csv.gz')
+    with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+        assert f.read().splitlines() == ['id,valor']
+
+
+def test_erro_no_meio_nao_deixa_arquivo_parcial(pasta_exports):
+    def paginas():
+        yield [{'id': 1, 'valor': 10.0}]
+        raise RuntimeError("conexão perdida")
+
+    with pytest.raises(RuntimeError):
+        ExportManager().export_csv_stream(paginas(), compactar=True)
+
+    assert os.listdir(pasta_exports) == []
@@ -0,0 +1,45 @@
+"""Snapshots colunares: gravação e leitura de volta (utils/snapshots.py)"""
+
+import os
+
+import pandas as pd
+
+from utils import snapshots
+from utils.snapshots import SnapshotDatabase, escrever_snapshot
+
+
+def test_snapshot_leads_sem_coluna_tags(tmp_path):
+    leads = pd.DataFrame([
+        {'id': '1', 'nome': 'Maria', 'status': 'novo', 'origem': 'Instagram', 'vendedor': 'Ana',
+         'score': 80, 'created_at': '2024-06-01T10:00:00+00:00'},
+        {'id': '2', 'nome': 'João', 'status': 'fechado', 'origem': 'WhatsApp', 'vendedor': 'Fernando',
+         'score': None, 'created_at': '2024-06-02T10:00:00+00:00'},
+    ])
+
+    total = escrever_snapshot('leads', [leads], str(tmp_path / 'leads.parquet'))
+    lidos = SnapshotDatabase(str(tmp_path)).get_leads()
+
+    assert total == 2
+    assert lidos['id'].tolist() == ['2', '1']
+    assert lidos['tags'].tolist() == [None, None]
+
+
+def test_snapshot_leads_com_tags_mistas(tmp_path):
+    leads = [{'id': '1', 'tags': ['vip', 'curso']}, {'id': '2', 'tags': None}, {'id': '3'}]
+
+    escrever_snapshot('leads', [leads], str(tmp_path / 'leads.arrow'), formato='arrow')
+    lidos = SnapshotDatabase(str(tmp_path)).get_leads().set_index('id')
+
+    assert lidos.at['1', 'tags'] == ['vip', 'curso']
+    assert lidos.at['2', 'tags'] is None
+    assert lidos.at['3', 'tags'] is None
+
+
+def test_resolver_diretorio_fica_na_raiz(tmp_path, monkeypatch):
+    (tmp_path / '2024-06').mkdir()
+    monkeypatch.setattr(snapshots, 'raiz_snapshots', lambda: os.path.realpath(str(tmp_path)))
+
+    assert snapshots.resolver_diretorio('2024-06') == os.path.realpath(str(tmp_path / '2024-06'))
+    assert snapshots.resolver_diretorio('../') is None
+    assert snapshots.resolver_diretorio('/etc') is None
+    assert snapshots.resolver_diretorio('nao-existe') is None
@@ -0,0 +1,43 @@
+"""Redução de séries para gráficos (utils/timeseries.py)"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.timeseries import reduzir_serie
+
+
+def _serie(datas):
+    return pd.DataFrame({'data': datas, 'valor': np.arange(len(datas), dtype=float)})
+
+
+def test_recorte_com_coluna_tz_aware_e_limites_naive():
+    # Timestamps do Supabase chegam como ISO com fuso
+    df = _serie(['2026-09-30T23:00:00+00:00', '2026-10-01T10:00:00+00:00',
+                 '2026-10-02T23:59:00+00:00', '2026-10-03T00:00:00+00:00'])
+
+    serie = reduzir_serie(df, 'data', 'valor', inicio=date(2026, 10, 1), fim=date(2026, 10, 2))
+
+    assert serie['valor'].tolist() == [1.0, 2.0]
+    assert str(serie['data'].dt.tz) == 'UTC'
+
+
+def test_recorte_com_coluna_naive():
+    df = _serie(pd.date_range('2026-10-01', periods=5, freq='D'))
+
+    serie = reduzir_serie(df, 'data', 'valor', inicio='2026-10-02', fim='2026-10-03')
+
+    assert serie['valor'].tolist() == [1.0, 2.0]
+
+
+def test_lttb_limita_pontos_e_mantem_extremos():
+    df = _serie(pd.date_range('2026-01-01', periods=5000, freq='h'))
+    df.loc[2500, 'valor'] = 1e6
+
+    serie = reduzir_serie(df, 'data', 'valor', max_pontos=100)
+
+    assert len(serie) == 100
+    assert serie['data'].iloc[0] == df['data'].iloc[0]
+    assert serie['data'].iloc[-1] == df['data'].iloc[-1]
+    assert serie['valor'].max() == 1e6
@@ -0,0 +1,170 @@
+"""
+📝 Writer Assíncrono de Logs de Atividade
+Acumula linhas de activity_logs em memória e grava em lote numa thread de fundo,
+para que ações do usuário não paguem um round trip extra ao Supabase.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+# Gravar quando o buffer atingir esse número de linhas...
+BATCH_SIZE = 50
+# ...ou a cada N segundos, o que vier primeiro
+FLUSH_INTERVAL = 5.0
+# Máximo de linhas por insert no Supabase
+MAX_ROWS_PER_INSERT = 500
+
+DEFAULT_SPILL_PATH = os.path.join(tempfile.gettempdir(), "activity_logs_spill.jsonl")
+
+
+class ActivityLogWriter:
+    """Buffer de activity_logs com flush em lote por tamanho, tempo e no shutdown"""
+
+    def __init__(self, client=None, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, spill_path: str = DEFAULT_SPILL_PATH):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, row: Dict[str, Any]):
+        """Enfileira uma linha; o insert acontece em segundo plano"""
+        with self._buffer_lock:
+            self._buffer.append(row)
+            cheio = len(self._buffer) >= self.batch_size
+
+        if cheio:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        """Quantidade de linhas aguardando gravação"""
+        with self._buffer_lock:
+            return len(self._buffer)
+
+    def buffered(self) -> List[Dict[str, Any]]:
+        """Cópia das linhas ainda no buffer (sem gravar nem esperar um flush)"""
+        with self._buffer_lock:
+            return list(self._buffer)
+
+    def flush(self) -> bool:
+        """Grava o buffer e as linhas do arquivo de spill. Retorna False se algo foi para o spill"""
+        with self._flush_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+
+            rows = self._read_spill() + rows
+            if not rows:
+                return True
+
+            if self.client is None:
+                self._spill(rows)
+                return False
+
+            for inicio in range(0, len(rows), MAX_ROWS_PER_INSERT):
+                lote = rows[inicio:inicio + MAX_ROWS_PER_INSERT]
+                try:
+                    self.client.table('activity_logs').insert(lote).execute()
+                except Exception:
+                    # Guardar o restante em disco para tentar no próximo flush
+                    self._spill(rows[inicio:])
+                    return False
+
+            return True
+
+    def close(self):
+        """Para a thread de fundo e grava o que estiver pendente"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    def _run(self):
+        """Loop da thread de fundo: acorda por tamanho do buffer ou por tempo"""
+        while not self._closed.is_set():
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                # Nunca deixar a thread morrer; as linhas já foram para o spill
+                pass
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        """Anexa linhas não gravadas ao arquivo local (JSON Lines)"""
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+        except OSError:
+            # Sem disco disponível: manter em memória para a próxima tentativa
+            with self._buffer_lock:
+                self._buffer = rows + self._buffer
+
+    def _read_spill(self) -> List[Dict[str, Any]]:
+        """Lê e remove o arquivo de spill (as linhas voltam a ele se o flush falhar)
+
+        Um .retry deixado por uma remoção que falhou é lido antes de ser
+        substituído: no pior caso uma linha é gravada duas vezes, nunca perdida.
+        """
+        retry_path = f"{self.spill_path}.retry"
+        if not os.path.exists(self.spill_path) and not os.path.exists(retry_path):
+            return []
+
+        rows = self._read_jsonl(retry_path)
+        try:
+            if os.path.exists(self.spill_path):
+                os.replace(self.spill_path, retry_path)
+                rows += self._read_jsonl(retry_path)
+            os.remove(retry_path)
+        except OSError:
+            pass
+        return rows
+
+    @staticmethod
+    def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+        rows = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        rows.append(json.loads(linha))
+                    except ValueError:
+                        # Linha truncada (ex.: processo morto durante a escrita)
+                        continue
+        except OSError:
+            pass
+        return rows
+
+
+_writer: Optional[ActivityLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer(client=None) -> ActivityLogWriter:
+    """Retorna o writer do processo, atualizando o cliente Supabase se informado"""
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = ActivityLogWriter(client)
+        elif client is not None:
+            _writer.client = client
+        return _writer
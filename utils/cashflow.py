@@ -0,0 +1,146 @@
+"""
+💸 Fluxo de Caixa
+Expande cada venda confirmada nas datas em que o dinheiro de fato entra
+(parcelas do cartão, prazo de liquidação, compensação do boleto) e cada
+custo no dia em que é pago, e monta entradas, saídas e saldo diário de
+todo o intervalo de uma vez (np.repeat / np.busday_offset / np.bincount).
+"""
+
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Prazo de recebimento por meio de pagamento: (dias, unidade)
+#   'uteis'    -> dias úteis após a venda (seg-sex)
+#   'corridos' -> dias corridos após a venda, rolando para o próximo dia útil
+# No parcelado, a parcela k cai em k * prazo.
+PRAZOS_RECEBIMENTO = {
+    'PIX': (0, 'corridos'),
+    'Transferência': (1, 'uteis'),
+    'Boleto': (2, 'uteis'),
+    'Cartão à vista': (30, 'corridos'),
+    'Cartão parcelado': (30, 'corridos'),
+    'Cartão': (30, 'corridos'),
+    'Cartão de Crédito': (30, 'corridos'),
+}
+
+# Meios não mapeados entram no dia da venda
+PRAZO_PADRAO = (0, 'corridos')
+
+# Parcelas aceitas no parcelado
+MAX_PARCELAS = 12
+
+COLUNAS_RECEBIVEIS = ['data', 'valor', 'venda_id', 'parcela', 'parcelas', 'meio_pagamento']
+
+
+def _dia(valores) -> np.ndarray:
+    """Datas como datetime64[D]"""
+    datas = pd.to_datetime(pd.Series(valores), errors='coerce')
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+    return datas.to_numpy(dtype='datetime64[D]')
+
+
+def expandir_recebiveis(vendas_df: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por recebimento esperado de cada venda confirmada
+
+    O valor da venda é dividido igualmente entre as parcelas; os centavos
+    que sobram do arredondamento ficam na primeira parcela.
+    """
+    if vendas_df.empty:
+        return pd.DataFrame(columns=COLUNAS_RECEBIVEIS)
+
+    vendas = vendas_df
+    if 'status' in vendas.columns:
+        vendas = vendas[vendas['status'] == 'confirmada']
+
+    datas = _dia(vendas['data_venda'])
+    validas = ~np.isnat(datas)
+    vendas, datas = vendas[validas], datas[validas]
+    if vendas.empty:
+        return pd.DataFrame(columns=COLUNAS_RECEBIVEIS)
+
+    meios = vendas.get('meio_pagamento', pd.Series(None, index=vendas.index)).fillna('').astype(str)
+    valores = pd.to_numeric(vendas['valor'], errors='coerce').fillna(0.0).to_numpy()
+
+    parcelas = pd.to_numeric(vendas.get('parcelas', pd.Series(1, index=vendas.index)), errors='coerce')
+    parcelas = parcelas.fillna(1).clip(1, MAX_PARCELAS).astype(int).to_numpy()
+    # Só o parcelado tem mais de uma parcela
+    parcelas = np.where(meios.to_numpy() == 'Cartão parcelado', parcelas, 1)
+
+    prazo = meios.map(lambda m: PRAZOS_RECEBIMENTO.get(m, PRAZO_PADRAO)[0]).to_numpy()
+    uteis = meios.map(lambda m: PRAZOS_RECEBIMENTO.get(m, PRAZO_PADRAO)[1] == 'uteis').to_numpy()
+
+    # Uma linha por parcela
+    total = int(parcelas.sum())
+    origem = np.repeat(np.arange(len(vendas)), parcelas)
+    inicio_grupo = np.repeat(np.cumsum(parcelas) - parcelas, parcelas)
+    numero = np.arange(total) - inicio_grupo + 1
+
+    # Valor de cada parcela em centavos (resto na primeira)
+    centavos = np.round(valores * 100).astype(np.int64)
+    base = centavos // parcelas
+    resto = centavos - base * parcelas
+    valor_parcela = base[origem] + np.where(numero == 1, resto[origem], 0)
+
+    # Data de recebimento
+    data_venda = datas[origem]
+    dias = prazo[origem] * numero
+    em_dias_uteis = uteis[origem]
+
+    recebimento = np.empty(total, dtype='datetime64[D]')
+    recebimento[em_dias_uteis] = np.busday_offset(
+        data_venda[em_dias_uteis], dias[em_dias_uteis], roll='forward'
+    )
+    corridos = ~em_dias_uteis
+    recebimento[corridos] = np.busday_offset(
+        data_venda[corridos] + dias[corridos].astype('timedelta64[D]'), 0, roll='forward'
+    )
+    # PIX e meios sem prazo entram no próprio dia, mesmo em fim de semana
+    imediato = corridos & (dias == 0)
+    recebimento[imediato] = data_venda[imediato]
+
+    ids = vendas['id'].to_numpy() if 'id' in vendas.columns else np.arange(len(vendas))
+    return pd.DataFrame({
+        'data': recebimento,
+        'valor': valor_parcela / 100,
+        'venda_id': ids[origem],
+        'parcela': numero,
+        'parcelas': parcelas[origem],
+        'meio_pagamento': meios.to_numpy()[origem],
+    })
+
+
+def fluxo_diario(recebiveis: pd.DataFrame, pagamentos: pd.DataFrame, inicio: date, fim: date,
+                 saldo_inicial: float = 0.0, hoje: Optional[date] = None) -> pd.DataFrame:
+    """Entradas, saídas e saldo por dia de `inicio` a `fim`
+
+    `recebiveis` precisa das colunas data e valor (expandir_recebiveis);
+    `pagamentos` das colunas data_custo e valor (Database.get_custos).
+    Lançamentos fora do intervalo são ignorados.
+    """
+    dias = pd.date_range(inicio, fim, freq='D')
+    primeiro = np.datetime64(pd.Timestamp(inicio).date(), 'D')
+
+    def _somar_por_dia(datas, valores) -> np.ndarray:
+        posicao = (_dia(datas) - primeiro).astype(np.int64) if len(datas) else np.array([], dtype=np.int64)
+        valores = pd.to_numeric(pd.Series(valores), errors='coerce').fillna(0.0).to_numpy()
+        dentro = (posicao >= 0) & (posicao < len(dias))
+        return np.bincount(posicao[dentro], weights=valores[dentro], minlength=len(dias))
+
+    entradas = _somar_por_dia(recebiveis['data'], recebiveis['valor']) if not recebiveis.empty else np.zeros(len(dias))
+    saidas = _somar_por_dia(pagamentos['data_custo'], pagamentos['valor']) if not pagamentos.empty else np.zeros(len(dias))
+
+    saldo_dia = entradas - saidas
+    referencia = pd.Timestamp(hoje or date.today())
+
+    return pd.DataFrame({
+        'Data': dias,
+        'Entradas': entradas,
+        'Saidas': saidas,
+        'Saldo_Dia': saldo_dia,
+        'Saldo_Acumulado': saldo_inicial + np.cumsum(saldo_dia),
+        'Tipo': np.where(dias <= referencia, 'Histórico', 'Projeção'),
+    })
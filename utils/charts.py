@@ -0,0 +1,141 @@
+"""
+📊 Fábrica de Gráficos com Cache
+Template Plotly do dashboard (fundo transparente, fonte clara e paleta do
+tema do usuário) e cache LRU de figuras por (tipo, dados, tema), para que
+reruns e trocas de aba reaproveitem figuras já montadas. Os dados entram na
+chave pelo hash ou, quando informada, pela versão das tabelas de origem.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from utils.profiler import medido
+
+# Figuras mantidas no cache do processo
+FIGURAS_MAX = 128
+
+TEMA_PADRAO = {"primary": "#9D4EDD", "secondary": "#06FFA5"}
+
+# Cores usadas depois das duas do tema
+CORES_EXTRAS = ['#0EA5E9', '#F97316', '#10B981', '#EF4444', '#FACC15']
+
+_templates_lock = threading.Lock()
+
+
+def tema_atual() -> Dict[str, str]:
+    return st.session_state.get('user_theme', TEMA_PADRAO)
+
+
+def nome_template(tema: Optional[Dict[str, str]] = None) -> str:
+    """Nome do template Plotly do tema (registrado na primeira chamada)"""
+    tema = tema or tema_atual()
+    nome = f"dashboard_{tema['primary']}_{tema['secondary']}".replace('#', '')
+
+    with _templates_lock:
+        if nome not in pio.templates:
+            template = go.layout.Template(pio.templates['plotly'])
+            template.layout.update(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white'),
+                title=dict(font=dict(size=16)),
+                colorway=[tema['primary'], tema['secondary']] + CORES_EXTRAS
+            )
+            pio.templates[nome] = template
+
+    return nome
+
+
+class FigureCache:
+    """LRU de figuras prontas (compartilhado entre sessões; figuras são somente leitura)"""
+
+    def __init__(self, max_itens: int = FIGURAS_MAX):
+        self.max_itens = max_itens
+        self.acertos = 0
+        self.faltas = 0
+        self._itens: "OrderedDict[Tuple, go.Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave: Tuple) -> Optional[go.Figure]:
+        with self._lock:
+            figura = self._itens.get(chave)
+            if figura is None:
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return figura
+
+    def put(self, chave: Tuple, figura: go.Figure):
+        with self._lock:
+            self._itens[chave] = figura
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Cache de figuras do processo"""
+    return FigureCache()
+
+
+def impressao_digital(dados: Any, params: Dict[str, Any]) -> str:
+    """Hash dos dados do gráfico e dos parâmetros de construção"""
+    h = hashlib.sha1()
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    if isinstance(dados, (pd.DataFrame, pd.Series)):
+        if isinstance(dados, pd.DataFrame):
+            h.update(json.dumps([str(c) for c in dados.columns]).encode())
+        try:
+            hashes = pd.util.hash_pandas_object(dados, index=True)
+        except TypeError:
+            # Colunas com listas/dicts
+            hashes = pd.util.hash_pandas_object(dados.astype(str), index=True)
+        h.update(hashes.values.tobytes())
+    else:
+        h.update(json.dumps(dados, sort_keys=True, default=str).encode())
+
+    return h.hexdigest()
+
+
+@medido('graficos')
+def grafico(tipo: str, dados: Any, construir: Callable[..., go.Figure],
+            versao: Optional[Tuple] = None, **params) -> go.Figure:
+    """Figura do cache ou construída por construir(dados, template=..., **params)
+
+    `tipo` identifica o gráfico (ex.: 'overview_faturamento'); `construir` deve
+    depender apenas de `dados`, `template` e `params`. Não altere a figura
+    retornada: ela pode estar sendo exibida em outras sessões.
+
+    `versao` identifica os dados sem precisar hasheá-los: os filtros da
+    consulta mais os contadores das tabelas (realtime.versao_de). Sem ela,
+    a chave é o hash dos dados.
+    """
+    tema = tema_atual()
+    digital = impressao_digital(versao, params) if versao is not None else impressao_digital(dados, params)
+    chave = (tipo, digital, tema['primary'], tema['secondary'])
+
+    cache = get_figure_cache()
+    figura = cache.get(chave)
+
+    if figura is None:
+        template = nome_template(tema)
+        figura = construir(dados, template=template, **params)
+        figura.update_layout(template=template)
+        cache.put(chave, figura)
+
+    return figura
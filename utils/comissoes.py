@@ -0,0 +1,123 @@
+"""
+💵 Motor de Comissões
+Percentual de comissão de cada venda por regras em faixas (vendedor, produto,
+meio de pagamento e atingimento da meta do mês), avaliadas de uma vez sobre
+todas as vendas (matriz venda x regra em numpy). O resultado é gravado em
+`vendas.comissao_pct` em lote (função aplicar_comissoes, comissoes.sql) e o
+banco mantém `comissao_valor` (coluna gerada).
+"""
+
+from calendar import monthrange
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.metas import METAS_PADRAO, metas_vendas
+
+# Percentual quando nenhuma regra se aplica (configuracoes.comissao_padrao)
+PCT_PADRAO = 0.30
+
+# Regras de comissão. Campos omitidos valem para qualquer venda:
+#   vendedor, produto, meio_pagamento -> igualdade (vendedor sem diferenciar maiúsculas)
+#   atingimento_min -> faturamento confirmado do vendedor no mês / meta do mês
+# Vence a regra mais específica (mais campos); no empate, a de maior
+# atingimento_min e, depois, a que aparece por último.
+REGRAS_COMISSAO = (
+    {'pct': 0.30},
+    {'atingimento_min': 1.0, 'pct': 0.35},
+)
+
+_CAMPOS_REGRA = ('vendedor', 'produto', 'meio_pagamento', 'atingimento_min')
+
+
+def intervalo_mes(ano_mes: str) -> Tuple[date, date]:
+    """Primeiro e último dia de um mês 'AAAA-MM' (filtro por faixa de data indexada)"""
+    ano, mes = (int(parte) for parte in ano_mes.split('-'))
+    return date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1])
+
+
+def atingimento_meta(vendas_df: pd.DataFrame, metas: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Atingimento da meta do vendedor no mês de cada venda (0 quando não há meta)
+
+    Considera apenas o faturamento confirmado; a faixa vale para todas as
+    vendas do vendedor no mês.
+    """
+    metas = {k.lower(): float(v) for k, v in (metas or METAS_PADRAO).items()}
+
+    vendedor = vendas_df['vendedor'].astype(str).str.lower()
+    mes = pd.to_datetime(vendas_df['data_venda']).dt.to_period('M')
+    valor = pd.to_numeric(vendas_df['valor'], errors='coerce').fillna(0.0)
+    confirmado = valor.where(vendas_df['status'] == 'confirmada', 0.0) if 'status' in vendas_df.columns else valor
+
+    faturado = confirmado.groupby([vendedor, mes]).transform('sum')
+    meta = vendedor.map(metas).astype(float)
+    return (faturado / meta).where(meta > 0, 0.0).fillna(0.0).to_numpy()
+
+
+def calcular_comissoes(vendas_df: pd.DataFrame, metas: Optional[Dict[str, float]] = None,
+                       regras: Sequence[dict] = REGRAS_COMISSAO) -> pd.Series:
+    """Percentual de comissão de cada venda (mesmo índice de `vendas_df`)"""
+    if vendas_df.empty:
+        return pd.Series(dtype=float, index=vendas_df.index)
+    if not regras:
+        return pd.Series(PCT_PADRAO, index=vendas_df.index)
+
+    colunas = {
+        'vendedor': vendas_df['vendedor'].astype(str).str.lower().to_numpy(),
+        'produto': vendas_df['produto'].astype(str).to_numpy(),
+        'meio_pagamento': vendas_df.get('meio_pagamento', pd.Series('', index=vendas_df.index)).astype(str).to_numpy(),
+    }
+    atingimento = atingimento_meta(vendas_df, metas)
+
+    # Uma coluna por regra: a regra vale para a venda?
+    vale = np.ones((len(vendas_df), len(regras)), dtype=bool)
+    for j, regra in enumerate(regras):
+        for campo in ('vendedor', 'produto', 'meio_pagamento'):
+            if campo in regra:
+                alvo = regra[campo].lower() if campo == 'vendedor' else regra[campo]
+                vale[:, j] &= colunas[campo] == alvo
+        if 'atingimento_min' in regra:
+            vale[:, j] &= atingimento >= regra['atingimento_min']
+
+    # Prioridade: especificidade, depois atingimento_min, depois posição
+    prioridade = np.array([
+        (sum(campo in regra for campo in _CAMPOS_REGRA), regra.get('atingimento_min', 0.0), j)
+        for j, regra in enumerate(regras)
+    ], dtype=[('campos', int), ('atingimento', float), ('posicao', int)])
+    ordem = np.argsort(prioridade, order=('campos', 'atingimento', 'posicao'))
+    posto = np.empty(len(regras), dtype=int)
+    posto[ordem] = np.arange(len(regras))
+
+    pontos = np.where(vale, posto, -1)
+    vencedora = pontos.argmax(axis=1)
+    pcts = np.array([regra['pct'] for regra in regras], dtype=float)
+
+    pct = np.where(pontos.max(axis=1) >= 0, pcts[vencedora], PCT_PADRAO)
+    return pd.Series(np.round(pct, 4), index=vendas_df.index)
+
+
+def recalcular_comissoes(db, inicio: date, fim: date, metas: Optional[Dict[str, float]] = None,
+                         regras: Sequence[dict] = REGRAS_COMISSAO) -> int:
+    """Recalcula e grava as comissões das vendas do período (só as que mudaram)
+
+    Use meses completos: o atingimento considera o faturamento do mês.
+    Sem `metas`, usa as metas cadastradas para o mês de `inicio`.
+    Retorna o nº de vendas atualizadas.
+    """
+    vendas = db.get_vendas(inicio, fim)
+    if vendas.empty:
+        return 0
+
+    if metas is None:
+        metas = metas_vendas(db, inicio.year, inicio.month)
+
+    pct = calcular_comissoes(vendas, metas, regras)
+    atual = pd.to_numeric(vendas.get('comissao_pct', pd.Series(np.nan, index=vendas.index)), errors='coerce')
+    mudou = ~np.isclose(pct.to_numpy(), atual.to_numpy(dtype=float), atol=5e-5)
+    if not mudou.any():
+        return 0
+
+    alteradas = pd.Series(pct.to_numpy()[mudou], index=vendas['id'].to_numpy()[mudou])
+    return db.aplicar_comissoes(alteradas)
@@ -0,0 +1,92 @@
+"""
+📊 Comparação com o Período Anterior
+Deltas dos cards de métricas: cada card compara o período exibido com a
+janela anterior de mesmo tamanho (ex.: 01-15/06 contra 17-31/05). Os
+agregados base das duas janelas vêm de uma única consulta (função
+comparar_periodos, comparacoes.sql, separada com FILTER) e as métricas
+derivadas são definidas aqui sobre eles. O resultado fica na sessão por
+período até vendas, leads ou custos mudarem (memo_versao).
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from utils.realtime import memo_versao
+
+# Tabelas lidas por comparar_periodos (invalidam a comparação guardada)
+TABELAS_COMPARACAO = ('vendas', 'leads', 'custos')
+
+# Métricas devolvidas pelo banco
+METRICAS_BASE = ('vendas', 'faturamento', 'comissao', 'leads', 'leads_novo', 'leads_contatado',
+                 'leads_interessado', 'leads_fechado', 'custos')
+
+
+def _razao(numerador: float, denominador: float, escala: float = 1.0) -> float:
+    return numerador / denominador * escala if denominador else 0.0
+
+
+# Métricas derivadas: função dos agregados base de uma janela
+METRICAS: Dict[str, Callable[[Dict[str, float]], float]] = {
+    'ticket_medio': lambda b: _razao(b['faturamento'], b['vendas']),
+    'lucro': lambda b: b['faturamento'] - b['custos'],
+    'roi': lambda b: _razao(b['faturamento'] - b['custos'], b['custos'], 100),
+    'margem': lambda b: _razao(b['faturamento'] - b['custos'], b['faturamento'], 100),
+    'conversao': lambda b: _razao(b['leads_fechado'], b['leads'], 100),
+}
+
+
+def periodo_anterior(inicio: date, fim: date) -> Tuple[date, date]:
+    """Janela de mesmo tamanho imediatamente antes de [inicio, fim]"""
+    dias = (fim - inicio).days + 1
+    return inicio - timedelta(days=dias), inicio - timedelta(days=1)
+
+
+class Comparacao:
+    """Valores de um período e da janela anterior, com o delta formatado para st.metric"""
+
+    def __init__(self, atual: Dict[str, float], anterior: Dict[str, float]):
+        self.atual = atual
+        self.anterior = anterior
+
+    def valor(self, metrica: str, anterior: bool = False) -> float:
+        base = self.anterior if anterior else self.atual
+        if metrica in METRICAS:
+            return METRICAS[metrica](base)
+        return base[metrica]
+
+    def delta(self, metrica: str, formato: str = 'variacao',
+              sufixo: str = ' vs período anterior') -> Optional[str]:
+        """Texto do delta: 'variacao' (%), 'diferenca' (unidades) ou 'pontos' (p.p.)
+
+        None quando a variação percentual não existe (período anterior zerado).
+        """
+        atual, anterior = self.valor(metrica), self.valor(metrica, anterior=True)
+
+        if formato == 'diferenca':
+            texto = f"{atual - anterior:+,.0f}"
+        elif formato == 'pontos':
+            texto = f"{atual - anterior:+.1f} p.p."
+        elif anterior:
+            texto = f"{(atual - anterior) / abs(anterior) * 100:+.1f}%"
+        else:
+            return None
+        return texto + sufixo
+
+
+def comparar(db, inicio: date, fim: date, categorias: Optional[Sequence[str]] = None) -> Comparacao:
+    """Comparação de [inicio, fim] com a janela anterior (uma consulta por período)
+
+    `categorias` limita as categorias de custo somadas (None = todas,
+    [] = nenhuma).
+    """
+    chave = ('comparacao', inicio, fim, tuple(categorias) if categorias is not None else None)
+    df = memo_versao(chave, TABELAS_COMPARACAO,
+                     lambda: db.get_comparacao_periodos(inicio, fim, categorias))
+
+    linhas = df.set_index('metrica') if not df.empty else None
+    atual, anterior = {}, {}
+    for metrica in METRICAS_BASE:
+        presente = linhas is not None and metrica in linhas.index
+        atual[metrica] = float(linhas.at[metrica, 'atual']) if presente else 0.0
+        anterior[metrica] = float(linhas.at[metrica, 'anterior']) if presente else 0.0
+    return Comparacao(atual, anterior)
@@ -3,6 +3,16 @@ from supabase import create_client, Client
 import pandas as pd
 from datetime import datetime, timedelta
 import json
+from utils.profiler import medido
+from utils.activity_logger import get_log_writer
+
+# Colunas da tabela vendas (schema.sql), na ordem do export
+COLUNAS_VENDAS = ['id', 'cliente_nome', 'cliente_instagram', 'cliente_email', 'cliente_telefone', 'produto',
+                  'valor', 'vendedor', 'data_venda', 'status', 'meio_pagamento', 'parcelas', 'comissao_pct',
+                  'comissao_valor', 'observacoes', 'created_at', 'updated_at']
+
+# Colunas retornadas por custos_periodo (financeiro.sql)
+COLUNAS_CUSTOS = ['id', 'descricao', 'categoria', 'valor', 'data_custo', 'responsavel', 'recorrente']
 
 class Database:
     def __init__(self):
@@ -40,21 +50,19 @@ class Database:
         return self.supabase is not None
     
     def log_activity(self, user_id: str, action: str, details: str = ""):
-        """Registra atividade do usuário"""
+        """Registra atividade do usuário (gravação em lote, em segundo plano)"""
         if not self.is_connected():
             return
         
-        try:
-            self.supabase.table('activity_logs').insert({
-                'user_id': user_id,
-                'action': action,
-                'details': details,
-                'timestamp': datetime.now().isoformat()
-            }).execute()
-        except Exception as e:
-            st.error(f"Erro ao registrar atividade: {e}")
+        get_log_writer(self.supabase).write({
+            'user_id': user_id,
+            'action': action,
+            'details': details,
+            'timestamp': datetime.now().isoformat()
+        })
     
     # VENDAS
+    @medido('dados')
     def get_vendas(self, start_date=None, end_date=None):
         """Busca vendas com filtros de data"""
         if not self.is_connected():
@@ -75,6 +83,87 @@ class Database:
             st.error(f"Erro ao buscar vendas: {e}")
             return pd.DataFrame()
     
+    def iter_vendas(self, start_date=None, end_date=None, vendedor=None, status=None, page_size=1000):
+        """Percorre vendas página a página (keyset em data_venda desc, id desc)
+        
+        Gera listas de dicts sem montar o resultado inteiro em memória;
+        usado pelos exports de volume grande. Erros de consulta são propagados
+        (inclusive após as primeiras páginas): quem exporta descarta o arquivo
+        parcial em vez de entregá-lo como completo.
+        """
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return
+        
+        ultima = None
+        
+        while True:
+            query = self.supabase.table('vendas').select('*')
+            
+            if start_date:
+                query = query.gte('data_venda', start_date.isoformat())
+            if end_date:
+                query = query.lte('data_venda', end_date.isoformat())
+            if vendedor:
+                query = query.eq('vendedor', vendedor)
+            if status:
+                query = query.eq('status', status)
+            
+            # Continuar a partir da última linha da página anterior
+            if ultima is not None:
+                data, venda_id = ultima['data_venda'], ultima['id']
+                query = query.or_(f"data_venda.lt.{data},and(data_venda.eq.{data},id.lt.{venda_id})")
+            
+            rows = query.order('data_venda', desc=True).order('id', desc=True).limit(page_size).execute().data
+            if not rows:
+                break
+            
+            yield rows
+            
+            if len(rows) < page_size:
+                break
+            ultima = rows[-1]
+    
+    def get_vendas_resumo(self, start_date=None, end_date=None):
+        """Totais por vendedor e status agregados no banco (função vendas_resumo, relatorios.sql)"""
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=['vendedor', 'status', 'total', 'quantidade'])
+        
+        try:
+            result = self.supabase.rpc('vendas_resumo', {
+                'p_inicio': start_date.isoformat() if start_date else None,
+                'p_fim': end_date.isoformat() if end_date else None
+            }).execute()
+            return pd.DataFrame(result.data, columns=['vendedor', 'status', 'total', 'quantidade'])
+        except Exception as e:
+            st.error(f"Erro ao buscar resumo de vendas: {e}")
+            return pd.DataFrame(columns=['vendedor', 'status', 'total', 'quantidade'])
+    
+    @medido('dados')
+    def get_ranking_vendedores(self, start_date, end_date, limite=10):
+        """Top-N vendedores da janela com variação contra a janela anterior de mesmo tamanho
+        
+        Função ranking_vendedores (relatorios.sql): uma consulta agregada no banco.
+        """
+        colunas = ['posicao', 'vendedor', 'faturamento', 'vendas', 'faturamento_anterior', 'vendas_anterior', 'variacao']
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=colunas)
+        
+        try:
+            result = self.supabase.rpc('ranking_vendedores', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat(),
+                'p_limite': limite
+            }).execute()
+            df = pd.DataFrame(result.data, columns=colunas)
+            df[colunas[2:]] = df[colunas[2:]].apply(pd.to_numeric)
+            return df
+        except Exception as e:
+            st.error(f"Erro ao buscar ranking: {e}")
+            return pd.DataFrame(columns=colunas)
+    
     def add_venda(self, venda_data):
         """Adiciona nova venda e cria lead automaticamente se não existir"""
         if not self.is_connected():
@@ -178,7 +267,104 @@ class Database:
             st.error(f"Erro ao remover venda: {e}")
             return False
     
+    # COMISSÕES
+    def aplicar_comissoes(self, percentuais):
+        """Grava comissao_pct de várias vendas numa chamada (função aplicar_comissoes, comissoes.sql)
+
+        `percentuais`: Series com o id da venda no índice e o percentual (0-1) como valor.
+        Retorna o nº de vendas atualizadas.
+        """
+        if not self.is_connected():
+            st.error("⚠️ Configure o Supabase para gravar comissões!")
+            return 0
+        
+        if len(percentuais) == 0:
+            return 0
+        
+        try:
+            result = self.supabase.rpc('aplicar_comissoes', {
+                'p_ids': [str(venda_id) for venda_id in percentuais.index],
+                'p_pcts': [round(float(pct), 4) for pct in percentuais.to_numpy()]
+            }).execute()
+            return int(result.data or 0)
+        except Exception as e:
+            st.error(f"Erro ao gravar comissões: {e}")
+            return 0
+    
+    @medido('dados')
+    def get_comissoes(self, start_date, end_date):
+        """Faturamento, quantidade e comissão gravada por vendedor (função comissoes_periodo)"""
+        colunas = ['vendedor', 'total_vendas', 'quantidade', 'comissao']
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=colunas)
+        
+        try:
+            result = self.supabase.rpc('comissoes_periodo', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat()
+            }).execute()
+            df = pd.DataFrame(result.data, columns=colunas)
+            df[colunas[1:]] = df[colunas[1:]].apply(pd.to_numeric)
+            return df
+        except Exception as e:
+            st.error(f"Erro ao buscar comissões: {e}")
+            return pd.DataFrame(columns=colunas)
+    
+    # METAS
+    @medido('dados')
+    def get_metas_progresso(self, ano, mes, vendedor=None):
+        """Meta e faturamento do mês por vendedor (view metas_status, metas.sql)
+        
+        Leitura de uma linha por vendedor na tabela de totais mantida por trigger.
+        """
+        from utils.metas import COLUNAS_PROGRESSO
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=COLUNAS_PROGRESSO)
+        
+        try:
+            query = self.supabase.table('metas_status').select('*').eq('ano', ano).eq('mes', mes)
+            if vendedor:
+                query = query.eq('vendedor', vendedor.lower())
+            result = query.execute()
+            return pd.DataFrame(result.data, columns=COLUNAS_PROGRESSO)
+        except Exception as e:
+            st.error(f"Erro ao buscar metas: {e}")
+            return pd.DataFrame(columns=COLUNAS_PROGRESSO)
+    
+    def salvar_metas(self, metas):
+        """Grava metas (lista de dicts com vendedor, ano, mes, meta_vendas, meta_leads)"""
+        if not self.is_connected():
+            st.error("⚠️ Configure o Supabase para salvar metas!")
+            return False
+        
+        try:
+            registros = [{**meta, 'vendedor': meta['vendedor'].lower()} for meta in metas]
+            self.supabase.table('metas').upsert(registros, on_conflict='vendedor,ano,mes').execute()
+            return True
+        except Exception as e:
+            st.error(f"Erro ao salvar metas: {e}")
+            return False
+    
+    def marcar_meta_notificada(self, vendedor, ano, mes):
+        """Reserva a notificação de meta atingida (True só na primeira vez)"""
+        if not self.is_connected():
+            return False
+        
+        try:
+            result = self.supabase.rpc('marcar_meta_notificada', {
+                'p_vendedor': vendedor,
+                'p_ano': ano,
+                'p_mes': mes
+            }).execute()
+            return bool(result.data)
+        except Exception as e:
+            st.error(f"Erro ao verificar meta: {e}")
+            return False
+    
     # LEADS
+    @medido('dados')
     def get_leads(self, status=None):
         """Busca leads com filtro de status"""
         if not self.is_connected():
@@ -196,7 +382,50 @@ class Database:
         except Exception as e:
             st.error(f"Erro ao buscar leads: {e}")
             return pd.DataFrame()
-    
+
+    @medido('dados')
+    def get_leads_pagina(self, status=None, vendedor=None, origem=None, pagina=0, por_pagina=50):
+        """Uma página de leads filtrados e o total de leads no filtro
+
+        Paginação feita no banco (range + count), então só a página visível
+        trafega e vira DataFrame. Retorna (DataFrame, total).
+        """
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(), 0
+
+        try:
+            query = self.supabase.table('leads').select('*', count='exact')
+
+            if status:
+                query = query.eq('status', status)
+            if vendedor:
+                query = query.eq('vendedor', vendedor)
+            if origem:
+                query = query.eq('origem', origem)
+
+            inicio = pagina * por_pagina
+            result = (query.order('created_at', desc=True).order('id', desc=True)
+                      .range(inicio, inicio + por_pagina - 1).execute())
+            return pd.DataFrame(result.data), result.count or 0
+        except Exception as e:
+            st.error(f"Erro ao buscar leads: {e}")
+            return pd.DataFrame(), 0
+
+    @medido('dados')
+    def get_leads_funil(self):
+        """Quantidade e score médio por vendedor e status (view leads_funil)"""
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame()
+
+        try:
+            result = self.supabase.table('leads_funil').select('*').execute()
+            return pd.DataFrame(result.data)
+        except Exception as e:
+            st.error(f"Erro ao buscar funil de leads: {e}")
+            return pd.DataFrame()
+
     def add_lead(self, lead_data):
         """Adiciona novo lead"""
         if not self.is_connected():
@@ -222,6 +451,167 @@ class Database:
         except Exception as e:
             st.error(f"Erro ao atualizar lead: {e}")
             return False
+
+    # CUSTOS
+    def add_custo(self, custo_data):
+        """Adiciona custo (recorrentes são gravados uma vez, na data da primeira cobrança)"""
+        if not self.is_connected():
+            st.error("⚠️ Configure o Supabase para adicionar custos!")
+            return False
+
+        try:
+            self.supabase.table('custos').insert(custo_data).execute()
+            return True
+        except Exception as e:
+            st.error(f"Erro ao adicionar custo: {e}")
+            return False
+
+    @medido('dados')
+    def get_custos(self, start_date, end_date, categoria=None, responsavel=None):
+        """Custos do período com os recorrentes expandidos por mês (função custos_periodo, financeiro.sql)"""
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=COLUNAS_CUSTOS)
+
+        try:
+            query = self.supabase.rpc('custos_periodo', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat()
+            })
+
+            if categoria:
+                query = query.eq('categoria', categoria)
+            if responsavel:
+                query = query.eq('responsavel', responsavel)
+
+            result = query.order('data_custo', desc=True).execute()
+            return pd.DataFrame(result.data, columns=COLUNAS_CUSTOS)
+        except Exception as e:
+            st.error(f"Erro ao buscar custos: {e}")
+            return pd.DataFrame(columns=COLUNAS_CUSTOS)
+
+    @medido('dados')
+    def get_custos_resumo(self, start_date, end_date):
+        """Totais de custo por mês, categoria, responsável e recorrente (função custos_resumo)"""
+        colunas = ['mes', 'categoria', 'responsavel', 'recorrente', 'total', 'quantidade']
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=colunas)
+
+        try:
+            result = self.supabase.rpc('custos_resumo', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat()
+            }).execute()
+            df = pd.DataFrame(result.data, columns=colunas)
+            df['total'] = pd.to_numeric(df['total'])
+            return df
+        except Exception as e:
+            st.error(f"Erro ao buscar resumo de custos: {e}")
+            return pd.DataFrame(columns=colunas)
+
+    @medido('dados')
+    def get_roi_diario(self, start_date, end_date, granularidade='day', categorias=None):
+        """Receita, custo, acumulados e ROI por dia/semana/mês (função roi_diario, financeiro.sql)
+
+        `granularidade`: 'day', 'week' ou 'month'; `categorias` limita as categorias
+        de custo somadas (None = todas, [] = nenhuma).
+        """
+        colunas = ['periodo', 'receita', 'custo', 'receita_acumulada', 'custo_acumulado', 'roi']
+        if not self.is_connected():
+            st.error("⚠️ **Supabase não configurado!** Configure SUPABASE_URL e SUPABASE_ANON_KEY nos secrets.")
+            return pd.DataFrame(columns=colunas)
+
+        try:
+            result = self.supabase.rpc('roi_diario', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat(),
+                'p_granularidade': granularidade,
+                'p_categorias': list(categorias) if categorias is not None else None
+            }).execute()
+            df = pd.DataFrame(result.data, columns=colunas)
+            df['periodo'] = pd.to_datetime(df['periodo'])
+            df[colunas[1:]] = df[colunas[1:]].apply(pd.to_numeric)
+            return df
+        except Exception as e:
+            st.error(f"Erro ao buscar evolução do ROI: {e}")
+            return pd.DataFrame(columns=colunas)
+
+    # COMPARAÇÃO COM O PERÍODO ANTERIOR
+    @medido('dados')
+    def get_comparacao_periodos(self, start_date, end_date, categorias=None):
+        """Agregados do período e da janela anterior de mesmo tamanho (função comparar_periodos)
+
+        Uma linha por métrica base (vendas, faturamento, comissao, leads,
+        leads_<status>, custos) com `atual` e `anterior`; `categorias` como em
+        get_roi_diario. Usado por utils/comparacoes.py.
+        """
+        colunas = ['metrica', 'atual', 'anterior']
+        if not self.is_connected():
+            return pd.DataFrame(columns=colunas)
+
+        try:
+            result = self.supabase.rpc('comparar_periodos', {
+                'p_inicio': start_date.isoformat(),
+                'p_fim': end_date.isoformat(),
+                'p_categorias': list(categorias) if categorias is not None else None
+            }).execute()
+            df = pd.DataFrame(result.data, columns=colunas)
+            df[colunas[1:]] = df[colunas[1:]].apply(pd.to_numeric)
+            return df
+        except Exception as e:
+            st.error(f"Erro ao comparar com o período anterior: {e}")
+            return pd.DataFrame(columns=colunas)
+
+    # VERSÕES
+    def get_data_versions(self):
+        """Versão atual de cada tabela (função versoes_dados, versoes.sql)
+        
+        Um dict {tabela: contador}; o contador (table_versions, incrementado por
+        trigger) só cresce e muda a cada comando que altera a tabela.
+        Vazio se a consulta falhar (quem chama recarrega os dados).
+        """
+        if not self.is_connected():
+            return {}
+        
+        try:
+            result = self.supabase.rpc('versoes_dados', {}).execute()
+            return {linha['tabela']: int(linha['versao']) for linha in result.data}
+        except Exception:
+            return {}
+    
+    # NOTIFICAÇÕES
+    @medido('dados')
+    def get_notificacoes(self, user_id=None, apenas_nao_lidas=True, limit=50):
+        """Busca notificações do usuário (ex.: leads quentes criados por webhook)"""
+        if not self.is_connected():
+            return pd.DataFrame()
+        
+        try:
+            query = self.supabase.table('notificacoes').select('*')
+            
+            if user_id:
+                query = query.eq('user_id', user_id)
+            if apenas_nao_lidas:
+                query = query.eq('lida', False)
+                
+            result = query.order('created_at', desc=True).limit(limit).execute()
+            return pd.DataFrame(result.data)
+        except Exception as e:
+            st.error(f"Erro ao buscar notificações: {e}")
+            return pd.DataFrame()
+    
+    def marcar_notificacao_lida(self, notificacao_id):
+        """Marca notificação como lida"""
+        if not self.is_connected():
+            return False
+        
+        try:
+            self.supabase.table('notificacoes').update({'lida': True}).eq('id', notificacao_id).execute()
+            return True
+        except Exception as e:
+            st.error(f"Erro ao atualizar notificação: {e}")
+            return False
     
     # DADOS MOCK
     def _get_mock_vendas(self):
@@ -276,6 +666,7 @@ class Database:
         
         return pd.DataFrame(data)
     
+    @medido('dados')
     def get_activity_logs(self, user_id=None, limit=50):
         """Busca logs de atividade"""
         if not self.is_connected():
@@ -288,7 +679,15 @@ class Database:
                 query = query.eq('user_id', user_id)
                 
             result = query.order('timestamp', desc=True).limit(limit).execute()
-            return pd.DataFrame(result.data)
+            
+            # Atividades ainda no buffer do writer entram na listagem sem gravar agora
+            pendentes = [linha for linha in get_log_writer().buffered()
+                         if not user_id or linha.get('user_id') == user_id]
+            if not pendentes:
+                return pd.DataFrame(result.data)
+            
+            logs = pd.DataFrame(pendentes + result.data)
+            return logs.sort_values('timestamp', ascending=False, kind='stable').head(limit).reset_index(drop=True)
         except Exception as e:
             st.error(f"Erro ao buscar logs: {e}")
             return pd.DataFrame()
@@ -311,4 +710,24 @@ class Database:
                 'timestamp': date.isoformat()
             })
         
-        return pd.DataFrame(data)
\ No newline at end of file
+        return pd.DataFrame(data)
+
+
+def get_snapshot_dir():
+    """Diretório de snapshots em uso ('' quando os dados vêm do Supabase)"""
+    return st.session_state.get('snapshot_dir') or st.secrets.get("SNAPSHOT_DIR", "")
+
+
+def get_database():
+    """Fonte de dados das páginas: Supabase ou, se configurado, um diretório de snapshots
+    
+    O modo snapshot (somente leitura) é ativado por SNAPSHOT_DIR nos secrets ou
+    pela opção em Configurações > Avançado (st.session_state['snapshot_dir']).
+    """
+    snapshot_dir = get_snapshot_dir()
+    
+    if snapshot_dir:
+        from utils.snapshots import abrir_snapshot
+        return abrir_snapshot(snapshot_dir)
+    
+    return Database()
@@ -1,16 +1,217 @@
 import pandas as pd
 import io
+import os
+import csv
+import json
+import math
+from itertools import chain
+import zlib
+import time
+import tempfile
 import base64
 from datetime import datetime
 import plotly.graph_objects as go
 import plotly.express as px
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.colors import HexColor
 
+# Diretório dos arquivos gerados pelos exports em streaming
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "dashboard_exports")
+# Arquivos mais antigos que isso são removidos no próximo export
+EXPORT_TTL = 3600
+
+def resumir_vendas(vendas):
+    """Agrega vendas por vendedor e status (total e quantidade)
+    
+    Aceita um DataFrame ou um iterável de páginas; cada página é agregada e
+    descartada, então o resultado tem no máximo vendedores x status linhas.
+    Mesmo formato de Database.get_vendas_resumo.
+    """
+    paginas = [vendas] if isinstance(vendas, pd.DataFrame) else vendas
+    parciais = []
+    
+    for pagina in paginas:
+        df = pagina if isinstance(pagina, pd.DataFrame) else pd.DataFrame(pagina)
+        if df.empty:
+            continue
+        parciais.append(df.groupby(['vendedor', 'status'])['valor'].agg(total='sum', quantidade='count'))
+    
+    if not parciais:
+        return pd.DataFrame(columns=['vendedor', 'status', 'total', 'quantidade'])
+    
+    return pd.concat(parciais).groupby(level=[0, 1]).sum().reset_index()
+
+
+def _valor_excel(valor):
+    """Converte valores de pandas/numpy para tipos aceitos pelos writers de Excel"""
+    if valor is None or valor is pd.NaT:
+        return None
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.tz_localize(None).to_pydatetime() if valor.tzinfo else valor.to_pydatetime()
+    if isinstance(valor, datetime) and valor.tzinfo:
+        return valor.replace(tzinfo=None)
+    if isinstance(valor, (list, dict)):
+        return json.dumps(valor, default=str, ensure_ascii=False)
+    if hasattr(valor, 'item'):
+        # Escalares numpy (int64, bool_, float64...)
+        return _valor_excel(valor.item())
+    return valor
+
+
+def _linhas_da_aba(data):
+    """Retorna (colunas, iterador de linhas) sem materializar fontes paginadas"""
+    if isinstance(data, dict):
+        if data and not any(isinstance(v, (list, tuple, pd.Series)) for v in data.values()):
+            # Dict de escalares (ex.: custos por categoria)
+            data = pd.DataFrame(list(data.items()), columns=['Item', 'Valor'])
+        else:
+            data = pd.DataFrame(data)
+    
+    if isinstance(data, pd.DataFrame):
+        return list(data.columns), data.itertuples(index=False, name=None)
+    
+    paginas = iter(data)
+    primeira = next(paginas, None)
+    while primeira is not None and len(primeira) == 0:
+        primeira = next(paginas, None)
+    if primeira is None:
+        return [], iter(())
+    
+    if isinstance(primeira, pd.DataFrame):
+        colunas = list(primeira.columns)
+    else:
+        colunas = list(primeira[0].keys())
+    
+    def linhas():
+        for pagina in chain([primeira], paginas):
+            if isinstance(pagina, pd.DataFrame):
+                yield from pagina.reindex(columns=colunas).itertuples(index=False, name=None)
+            else:
+                for row in pagina:
+                    yield tuple(row.get(c) for c in colunas)
+    
+    return colunas, linhas()
+
+
+def escrever_xlsx(abas, destino, engine=None):
+    """Grava as abas em destino, uma linha por vez
+    
+    Usa xlsxwriter em constant_memory (cada linha vai para disco ao ser
+    escrita); sem xlsxwriter, usa openpyxl em modo write_only.
+    """
+    if engine is None:
+        try:
+            import xlsxwriter  # noqa: F401
+            engine = 'xlsxwriter'
+        except ImportError:
+            engine = 'openpyxl'
+    
+    if engine == 'xlsxwriter':
+        import xlsxwriter
+        
+        workbook = xlsxwriter.Workbook(destino, {
+            'constant_memory': True,
+            'default_date_format': 'dd/mm/yyyy',
+            'strings_to_urls': False,
+            'strings_to_formulas': False
+        })
+        cabecalho = workbook.add_format({'bold': True, 'bg_color': '#9D4EDD', 'font_color': '#FFFFFF'})
+        try:
+            for nome, data in abas.items():
+                colunas, linhas = _linhas_da_aba(data)
+                worksheet = workbook.add_worksheet(str(nome)[:31])
+                worksheet.write_row(0, 0, [str(c) for c in colunas], cabecalho)
+                for i, linha in enumerate(linhas, start=1):
+                    worksheet.write_row(i, 0, [_valor_excel(v) for v in linha])
+        finally:
+            workbook.close()
+    else:
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        for nome, data in abas.items():
+            colunas, linhas = _linhas_da_aba(data)
+            worksheet = workbook.create_sheet(str(nome)[:31])
+            worksheet.append([str(c) for c in colunas])
+            for linha in linhas:
+                worksheet.append([_valor_excel(v) for v in linha])
+        workbook.save(destino)
+
+
+# Linhas por LongTable no detalhamento dos PDFs (limita o custo de layout de cada tabela)
+PDF_LINHAS_POR_TABELA = 500
+
+PDF_COLUNAS_VENDAS = ['Data', 'Cliente', 'Produto', 'Valor', 'Status']
+PDF_LARGURAS_VENDAS = [0.9*inch, 2.3*inch, 2.0*inch, 1.1*inch, 0.9*inch]
+
+
+def _formatar_vendas_pdf(vendas_df, valores):
+    """Converte as colunas exibidas no PDF para texto, uma coluna por vez"""
+    datas = pd.to_datetime(vendas_df['data_venda'], errors='coerce')
+    
+    detalhes = pd.DataFrame({
+        'vendedor': vendas_df['vendedor'].fillna('Sem vendedor').astype(str),
+        '_data': datas,
+        '_valor': valores,
+        'Data': datas.dt.strftime('%d/%m/%Y').fillna(''),
+        'Cliente': vendas_df['cliente_nome'].fillna('').astype(str).str.slice(0, 32),
+        'Produto': vendas_df['produto'].fillna('').astype(str).str.slice(0, 28),
+        'Valor': valores.map('R$ {:,.2f}'.format),
+        'Status': vendas_df['status'].fillna('').astype(str)
+    })
+    
+    return detalhes.sort_values(['vendedor', '_data'], ascending=[True, False])
+
+
+def _tabelas_vendas_pdf(grupo, subtotal):
+    """LongTables do detalhamento de um vendedor, com subtotal na última"""
+    linhas = grupo[PDF_COLUNAS_VENDAS].values.tolist()
+    tabelas = []
+    
+    for inicio in range(0, len(linhas), PDF_LINHAS_POR_TABELA):
+        bloco = [PDF_COLUNAS_VENDAS] + linhas[inicio:inicio + PDF_LINHAS_POR_TABELA]
+        ultimo = inicio + PDF_LINHAS_POR_TABELA >= len(linhas)
+        
+        estilo = [
+            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#06FFA5')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (1, 1), (2, -1), 'LEFT'),
+            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [HexColor('#F9F9F9'), colors.white]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ]
+        
+        if ultimo:
+            bloco.append(['', 'Subtotal', '', f"R$ {subtotal:,.2f}", ''])
+            estilo += [
+                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+                ('BACKGROUND', (0, -1), (-1, -1), HexColor('#F5F0FF'))
+            ]
+        
+        tabela = LongTable(bloco, colWidths=PDF_LARGURAS_VENDAS, repeatRows=1)
+        tabela.setStyle(TableStyle(estilo))
+        tabelas.append(tabela)
+    
+    return tabelas
+
+
+def _numerar_pagina(canvas, doc):
+    """Número da página no rodapé"""
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, doc.bottomMargin / 2, f"Página {doc.page}")
+    canvas.restoreState()
+
+
 class ExportManager:
     """Gerenciador de exports em diferentes formatos"""
     
@@ -34,31 +235,155 @@ class ExportManager:
         filename = f"{filename_prefix}_{self.timestamp}.csv"
         return csv_content, filename, "text/csv"
     
+    def stream_csv(self, pages, compactar=False, colunas=None):
+        """Gera o CSV em pedaços de bytes, uma página de linhas por vez
+        
+        `pages` é um iterável de listas de dicts (ex.: Database.iter_vendas).
+        Com `compactar`, os pedaços saem em gzip. Só a página atual fica em memória.
+        `colunas` fixa o cabeçalho (escrito mesmo sem nenhuma linha); sem ele,
+        vale a ordem das chaves da primeira página.
+        """
+        buffer = io.StringIO()
+        writer = None
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compactar else None  # wbits=31: formato gzip
+        
+        def novo_writer(fieldnames):
+            writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            return writer
+        
+        def drenar():
+            chunk = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return gz.compress(chunk) if gz is not None else chunk
+        
+        if colunas:
+            writer = novo_writer(list(colunas))
+        
+        for rows in pages:
+            if not rows:
+                continue
+            
+            if writer is None:
+                # Cabeçalho com as colunas da primeira página
+                writer = novo_writer(list(rows[0].keys()))
+            
+            writer.writerows(rows)
+            
+            chunk = drenar()
+            if chunk:
+                yield chunk
+        
+        # Só o cabeçalho (export sem linhas)
+        chunk = drenar()
+        if chunk:
+            yield chunk
+        
+        if gz is not None:
+            yield gz.flush()
+    
+    def export_csv_stream(self, pages, filename_prefix="export", compactar=False, colunas=None):
+        """Grava o CSV em streaming num arquivo temporário
+        
+        Retorna (caminho, filename, mime); abra o caminho em modo binário e
+        passe o arquivo ao st.download_button. Se a leitura das páginas
+        falhar no meio, o arquivo parcial é removido e a exceção propagada.
+        """
+        self._limpar_exports_antigos()
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        
+        extensao = "csv.gz" if compactar else "csv"
+        filename = f"{filename_prefix}_{self.timestamp}.{extensao}"
+        mime = "application/gzip" if compactar else "text/csv"
+        
+        fd, caminho = tempfile.mkstemp(suffix=f".{extensao}", dir=EXPORT_DIR)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self.stream_csv(pages, compactar=compactar, colunas=colunas):
+                    f.write(chunk)
+        except Exception:
+            os.remove(caminho)
+            raise
+        
+        return caminho, filename, mime
+    
+    def export_snapshot(self, tabela, pages, formato="parquet", filename_prefix=None):
+        """Exporta a tabela em formato colunar (Parquet ou Arrow IPC), página a página
+        
+        Retorna (caminho, filename, mime), como export_csv_stream.
+        """
+        from utils.snapshots import FORMATOS, escrever_snapshot
+        
+        self._limpar_exports_antigos()
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        
+        extensao, mime = FORMATOS[formato]
+        filename = f"{filename_prefix or tabela}_{self.timestamp}.{extensao}"
+        
+        fd, caminho = tempfile.mkstemp(suffix=f".{extensao}", dir=EXPORT_DIR)
+        os.close(fd)
+        try:
+            escrever_snapshot(tabela, pages, caminho, formato=formato)
+        except Exception:
+            # Sem arquivo parcial (nem o .tmp do escrever_snapshot)
+            for parcial in (caminho, f"{caminho}.tmp"):
+                if os.path.exists(parcial):
+                    os.remove(parcial)
+            raise
+        
+        return caminho, filename, mime
+    
+    def _limpar_exports_antigos(self):
+        """Remove arquivos de exports anteriores que já expiraram"""
+        if not os.path.isdir(EXPORT_DIR):
+            return
+        
+        limite = time.time() - EXPORT_TTL
+        for nome in os.listdir(EXPORT_DIR):
+            caminho = os.path.join(EXPORT_DIR, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
+    
     def export_to_excel(self, data_dict, filename_prefix="export"):
         """Exporta múltiplas planilhas para Excel"""
-        excel_buffer = io.BytesIO()
-        
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            for sheet_name, data in data_dict.items():
-                if isinstance(data, dict):
-                    df = pd.DataFrame(data)
-                elif isinstance(data, pd.DataFrame):
-                    df = data
-                else:
-                    continue
-                
-                # Limitar nome da aba a 31 caracteres
-                sheet_name = sheet_name[:31]
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        caminho, filename, mime = self.export_excel_stream(data_dict, filename_prefix)
+        
+        with open(caminho, "rb") as f:
+            excel_content = f.read()
+        os.remove(caminho)
+        
+        return excel_content, filename, mime
+    
+    def export_excel_stream(self, data_dict, filename_prefix="export"):
+        """Grava o Excel linha a linha num arquivo temporário (memória constante)
+        
+        Cada aba pode ser DataFrame, dict ou iterável de páginas (listas de
+        dicts ou DataFrames, ex.: Database.iter_vendas). Retorna (caminho, filename, mime).
+        """
+        self._limpar_exports_antigos()
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        
+        fd, caminho = tempfile.mkstemp(suffix=".xlsx", dir=EXPORT_DIR)
+        os.close(fd)
+        escrever_xlsx(data_dict, caminho)
         
-        excel_content = excel_buffer.getvalue()
         filename = f"{filename_prefix}_{self.timestamp}.xlsx"
-        return excel_content, filename, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        return caminho, filename, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     
     def create_sales_report_pdf(self, vendas_df, periodo=""):
-        """Cria relatório de vendas em PDF"""
+        """Cria relatório de vendas em PDF com todas as vendas do período
+        
+        Uma seção por vendedor com subtotal; o detalhamento é quebrado em
+        LongTables de PDF_LINHAS_POR_TABELA linhas (cabeçalho repetido em cada
+        página) e as células são formatadas por coluna, sem iterrows.
+        """
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=0.6*inch, rightMargin=0.6*inch,
+                                topMargin=0.7*inch, bottomMargin=0.7*inch)
         
         # Estilos
         styles = getSampleStyleSheet()
@@ -81,9 +406,10 @@ class ExportManager:
         
         # Resumo executivo
         if not vendas_df.empty:
+            valores = pd.to_numeric(vendas_df['valor'], errors='coerce').fillna(0)
             total_vendas = len(vendas_df)
-            total_faturamento = vendas_df['valor'].sum()
-            ticket_medio = vendas_df['valor'].mean()
+            total_faturamento = valores.sum()
+            ticket_medio = valores.mean()
             
             resumo_data = [
                 ['Métrica', 'Valor'],
@@ -107,38 +433,19 @@ class ExportManager:
             elements.append(resumo_table)
             elements.append(Spacer(1, 30))
             
-            # Tabela de vendas
-            vendas_para_pdf = vendas_df.head(20).copy()  # Limitar a 20 vendas
-            vendas_para_pdf['valor'] = vendas_para_pdf['valor'].apply(lambda x: f"R$ {x:,.2f}")
-            vendas_para_pdf['data_venda'] = pd.to_datetime(vendas_para_pdf['data_venda']).dt.strftime('%d/%m/%Y')
-            
-            # Preparar dados da tabela
-            table_data = [['Cliente', 'Vendedor', 'Valor', 'Data']]
-            
-            for _, row in vendas_para_pdf.iterrows():
-                table_data.append([
-                    row['cliente_nome'][:20],  # Limitar tamanho
-                    row['vendedor'],
-                    row['valor'],
-                    row['data_venda']
-                ])
-            
-            vendas_table = Table(table_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            vendas_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), HexColor('#06FFA5')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), HexColor('#F9F9F9')),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 9)
-            ]))
-            
+            # Detalhamento por vendedor
             elements.append(Paragraph("Detalhamento das Vendas", styles['Heading2']))
             elements.append(Spacer(1, 12))
-            elements.append(vendas_table)
+            
+            detalhes = _formatar_vendas_pdf(vendas_df, valores)
+            
+            for vendedor, grupo in detalhes.groupby('vendedor', sort=True):
+                subtotal = grupo['_valor'].sum()
+                elements.append(Paragraph(
+                    f"{vendedor} - {len(grupo)} vendas - R$ {subtotal:,.2f}", styles['Heading3']
+                ))
+                elements.extend(_tabelas_vendas_pdf(grupo, subtotal))
+                elements.append(Spacer(1, 18))
         
         else:
             elements.append(Paragraph("Nenhuma venda encontrada no período.", styles['Normal']))
@@ -149,8 +456,7 @@ class ExportManager:
         footer = Paragraph(footer_text, styles['Normal'])
         elements.append(footer)
         
-        # Gerar PDF
-        doc.build(elements)
+        doc.build(elements, onFirstPage=_numerar_pagina, onLaterPages=_numerar_pagina)
         pdf_content = buffer.getvalue()
         buffer.close()
         
@@ -247,24 +553,30 @@ class ExportManager:
         filename = f"relatorio_leads_{self.timestamp}.pdf"
         return pdf_content, filename, "application/pdf"
     
-    def export_financial_report(self, vendas_df, custos_data=None):
-        """Cria relatório financeiro completo"""
+    def export_financial_report(self, vendas_df=None, custos_data=None, resumo=None, detalhes=None):
+        """Cria relatório financeiro completo
         
-        # Calcular métricas financeiras
-        if not vendas_df.empty:
-            vendas_confirmadas = vendas_df[vendas_df['status'] == 'confirmada']
-            receita_total = vendas_confirmadas['valor'].sum()
-            total_vendas = len(vendas_confirmadas)
-            ticket_medio = vendas_confirmadas['valor'].mean()
-            
-            # Custos simulados se não fornecidos
-            if custos_data is None:
-                custos_data = {
-                    'Marketing': 15000.00,
-                    'Operacional': 8000.00,
-                    'Pessoal': 25000.00,
-                    'Outros': 5000.00
-                }
+        Usa o resumo pré-agregado (Database.get_vendas_resumo ou resumir_vendas)
+        em vez de reagrupar todas as vendas; `detalhes` pode ser um iterável de
+        páginas para a aba de vendas detalhadas.
+        """
+        if resumo is None:
+            resumo = resumir_vendas(vendas_df if vendas_df is not None else pd.DataFrame())
+        
+        if detalhes is None:
+            detalhes = vendas_df.head(100) if vendas_df is not None and not vendas_df.empty else {}
+        
+        # Custos por categoria (Database.get_custos_resumo); sem custos, DRE só com receita
+        if custos_data is None:
+            custos_data = {}
+        
+        confirmadas = resumo[resumo['status'] == 'confirmada'] if not resumo.empty else resumo
+        
+        if not confirmadas.empty:
+            # Calcular métricas financeiras
+            receita_total = float(confirmadas['total'].sum())
+            total_vendas = int(confirmadas['quantidade'].sum())
+            ticket_medio = receita_total / total_vendas if total_vendas else 0
             
             custo_total = sum(custos_data.values())
             lucro_bruto = receita_total - custo_total
@@ -290,12 +602,9 @@ class ExportManager:
             }
             
             # Dados por vendedor
-            vendas_por_vendedor = vendas_confirmadas.groupby('vendedor').agg({
-                'valor': ['sum', 'count', 'mean']
-            }).round(2)
-            
-            vendas_por_vendedor.columns = ['Total', 'Quantidade', 'Ticket_Medio']
-            vendas_por_vendedor = vendas_por_vendedor.reset_index()
+            vendas_por_vendedor = confirmadas.groupby('vendedor')[['total', 'quantidade']].sum().reset_index()
+            vendas_por_vendedor['Ticket_Medio'] = (vendas_por_vendedor['total'] / vendas_por_vendedor['quantidade']).round(2)
+            vendas_por_vendedor = vendas_por_vendedor.rename(columns={'total': 'Total', 'quantidade': 'Quantidade'})
             
         else:
             dre_data = {'Item': ['Sem dados'], 'Valor': ['R$ 0,00']}
@@ -305,8 +614,8 @@ class ExportManager:
         excel_data = {
             'DRE': dre_data,
             'Vendas_Vendedor': vendas_por_vendedor,
-            'Custos': custos_data if isinstance(custos_data, dict) else {},
-            'Vendas_Detalhadas': vendas_df.head(100) if not vendas_df.empty else {}
+            'Custos': pd.DataFrame(list(custos_data.items()), columns=['Categoria', 'Valor']) if isinstance(custos_data, dict) else {},
+            'Vendas_Detalhadas': detalhes
         }
         
         return self.export_to_excel(excel_data, "relatorio_financeiro")
@@ -0,0 +1,71 @@
+"""
+📞 Classificação de Follow-up
+Dias sem contato e faixa de urgência dos leads calculados de forma vetorizada
+(datetime64 + np.select), sem apply linha a linha e sem alterar o DataFrame
+recebido.
+"""
+
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Faixas por dias sem contato: urgente > 3, atenção 2-3, ok 0-1
+LIMITE_URGENTE = 3
+LIMITE_ATENCAO = 1
+
+# Dias atribuídos a leads sem data de interação (sempre urgentes)
+SEM_CONTATO = 999
+
+FAIXAS = ('urgente', 'atencao', 'ok')
+
+
+def dias_sem_contato(ultima_interacao: pd.Series, hoje: Optional[date] = None) -> pd.Series:
+    """Dias desde a última interação (SEM_CONTATO quando vazia ou inválida)"""
+    datas = pd.to_datetime(ultima_interacao, errors='coerce')
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+
+    referencia = pd.Timestamp(hoje or date.today()).normalize()
+    dias = (referencia - datas.dt.normalize()).dt.days
+    return dias.fillna(SEM_CONTATO).astype('int64')
+
+
+def faixa_followup(dias: pd.Series) -> np.ndarray:
+    """Faixa de urgência ('urgente', 'atencao', 'ok') para cada valor de dias"""
+    return np.select(
+        [dias > LIMITE_URGENTE, dias > LIMITE_ATENCAO],
+        ['urgente', 'atencao'],
+        default='ok'
+    )
+
+
+def resumo_followup(leads_df: pd.DataFrame, top_n: int = 10,
+                    hoje: Optional[date] = None) -> Tuple[Dict[str, int], pd.DataFrame]:
+    """Quantidade de leads por faixa e os top_n urgentes
+
+    Os urgentes vêm ordenados por score (maior primeiro) e, no empate, pelos
+    mais tempo sem contato, com as colunas `dias_sem_contato` e
+    `ultima_interacao_date` acrescentadas apenas a eles.
+    """
+    contagens = {faixa: 0 for faixa in FAIXAS}
+    if leads_df.empty:
+        return contagens, leads_df
+
+    ultima = leads_df.get('ultima_interacao', pd.Series(None, index=leads_df.index, dtype=object))
+    dias = dias_sem_contato(ultima, hoje)
+    faixas = faixa_followup(dias)
+
+    valores, quantidades = np.unique(faixas, return_counts=True)
+    contagens.update({str(v): int(q) for v, q in zip(valores, quantidades)})
+
+    urgentes = leads_df[faixas == 'urgente'].assign(
+        dias_sem_contato=dias[faixas == 'urgente']
+    )
+    urgentes = urgentes.sort_values(['score', 'dias_sem_contato'], ascending=False,
+                                    kind='stable', na_position='last').head(top_n)
+
+    return contagens, urgentes.assign(
+        ultima_interacao_date=pd.to_datetime(ultima.loc[urgentes.index], errors='coerce')
+    )
@@ -0,0 +1,124 @@
+"""
+📈 Projeção de Receita
+Ajusta tendência linear e sazonalidade semanal na série diária real de
+receita e projeta o horizonte pedido por Monte Carlo (reamostragem dos
+resíduos do ajuste), tudo em arrays NumPy. Os cenários Conservador,
+Realista e Otimista são os percentis 10, 50 e 90 dos caminhos simulados,
+calculados numa única simulação e reproduzíveis pela seed.
+"""
+
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Caminhos simulados por projeção
+CAMINHOS_PADRAO = 10000
+
+# Seed fixa: a mesma base histórica gera sempre a mesma projeção
+SEED_PADRAO = 42
+
+# Percentil de cada cenário
+CENARIOS = {"Conservador": 10, "Realista": 50, "Otimista": 90}
+
+# Histórico mínimo (dias) para estimar a sazonalidade por dia da semana
+MIN_DIAS_SAZONALIDADE = 14
+
+
+def receita_diaria(vendas_df: pd.DataFrame, fim: Optional[date] = None) -> pd.Series:
+    """Receita por dia (dias sem venda = 0) do primeiro dia com venda até `fim` (padrão: hoje)"""
+    if vendas_df.empty:
+        return pd.Series(dtype=float)
+
+    datas = pd.to_datetime(vendas_df['data_venda'], errors='coerce').dt.normalize()
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+
+    valores = pd.to_numeric(vendas_df['valor'], errors='coerce').fillna(0.0)
+    por_dia = valores.groupby(datas).sum()
+    if por_dia.empty:
+        return pd.Series(dtype=float)
+
+    ultimo = max(por_dia.index.max(), pd.Timestamp(fim or date.today()))
+    dias = pd.date_range(por_dia.index.min(), ultimo, freq='D')
+    return por_dia.reindex(dias, fill_value=0.0).astype(float)
+
+
+class ModeloReceita:
+    """Tendência linear + fatores por dia da semana ajustados numa série diária"""
+
+    def __init__(self, serie: pd.Series):
+        self.dias_historico = len(serie)
+        self.fim_historico = serie.index[-1] if len(serie) else pd.Timestamp(date.today())
+
+        y = serie.to_numpy(dtype=np.float64)
+        t = np.arange(len(y), dtype=np.float64)
+        dia_semana = serie.index.dayofweek.to_numpy() if len(serie) else np.array([], dtype=int)
+
+        # Sazonalidade semanal multiplicativa (média 1); neutra com pouco histórico
+        self.sazonalidade = np.ones(7)
+        media = y.mean() if len(y) else 0.0
+        if len(y) >= MIN_DIAS_SAZONALIDADE and media > 0:
+            soma = np.bincount(dia_semana, weights=y, minlength=7)
+            contagem = np.bincount(dia_semana, minlength=7)
+            fatores = np.divide(soma, contagem, out=np.zeros(7), where=contagem > 0) / media
+            if fatores.mean() > 0:
+                self.sazonalidade = fatores / fatores.mean()
+
+        fator = self.sazonalidade[dia_semana]
+        dessazonalizada = np.divide(y, fator, out=y.copy(), where=fator > 0)
+
+        if len(y) >= 2:
+            self.tendencia, self.intercepto = np.polyfit(t, dessazonalizada, 1)
+        else:
+            self.tendencia, self.intercepto = 0.0, media
+
+        ajuste = np.maximum(self.intercepto + self.tendencia * t, 0.0) * fator
+        self.residuos = y - ajuste if len(y) else np.zeros(1)
+
+    def base(self, datas: pd.DatetimeIndex) -> np.ndarray:
+        """Receita esperada (sem ruído) em cada data"""
+        t = (datas - self.fim_historico).days.to_numpy(dtype=np.float64) + self.dias_historico - 1
+        nivel = np.maximum(self.intercepto + self.tendencia * t, 0.0)
+        return nivel * self.sazonalidade[datas.dayofweek.to_numpy()]
+
+
+def ajustar_modelo(vendas_df: pd.DataFrame) -> ModeloReceita:
+    """Modelo ajustado na receita diária das vendas informadas"""
+    return ModeloReceita(receita_diaria(vendas_df))
+
+
+def simular(modelo: ModeloReceita, dias: int, caminhos: int = CAMINHOS_PADRAO,
+            seed: int = SEED_PADRAO, inicio: Optional[date] = None) -> np.ndarray:
+    """Matriz (caminhos x dias) de receitas diárias simuladas"""
+    datas = pd.date_range(inicio or date.today(), periods=dias, freq='D')
+    base = modelo.base(datas)
+
+    rng = np.random.default_rng(seed)
+    ruido = rng.choice(modelo.residuos, size=(caminhos, dias), replace=True)
+    return np.maximum(base + ruido, 0.0)
+
+
+def projetar(modelo: ModeloReceita, dias: int, caminhos: int = CAMINHOS_PADRAO,
+             seed: int = SEED_PADRAO, inicio: Optional[date] = None) -> pd.DataFrame:
+    """Projeção diária com os três cenários
+
+    Colunas: Data, Base (sem ruído) e, para cada cenário, a receita diária
+    e a acumulada (`<Cenário>_Acumulada`). Os percentis da acumulada são
+    tirados dos caminhos acumulados, não da soma dos percentis diários.
+    """
+    datas = pd.date_range(inicio or date.today(), periods=dias, freq='D')
+    caminhos_diarios = simular(modelo, dias, caminhos, seed, inicio)
+    acumulados = np.cumsum(caminhos_diarios, axis=1)
+
+    percentis = list(CENARIOS.values())
+    diarios = np.percentile(caminhos_diarios, percentis, axis=0)
+    acumulados_pct = np.percentile(acumulados, percentis, axis=0)
+
+    colunas: Dict[str, np.ndarray] = {'Data': datas, 'Base': modelo.base(datas)}
+    for i, cenario in enumerate(CENARIOS):
+        colunas[cenario] = diarios[i]
+        colunas[f"{cenario}_Acumulada"] = acumulados_pct[i]
+
+    return pd.DataFrame(colunas)
@@ -0,0 +1,174 @@
+"""
+🗄️ Job de Retenção de Logs
+Arquiva partições mensais frias de activity_logs e webhooks em Parquet
+comprimido e depois remove a partição do banco.
+
+Requer logs_partitioning.sql aplicado no Supabase e a service role key.
+
+Uso (cron mensal, GitHub Actions etc.):
+    python -m utils.log_retention --meses 6 --destino arquivo_logs/
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+# Tabelas particionadas por mês (logs_partitioning.sql)
+TABELAS = ('activity_logs', 'webhooks')
+
+# Linhas buscadas por requisição ao copiar uma partição
+PAGE_SIZE = 5000
+
+
+def _criar_cliente():
+    """Cria cliente Supabase com a service role (necessária para as funções de partição)"""
+    load_dotenv()
+    url = os.environ.get("SUPABASE_URL", "")
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY", "")
+
+    if not url or not key:
+        raise RuntimeError("Configure SUPABASE_URL e SUPABASE_SERVICE_ROLE_KEY no ambiente (.env)")
+
+    return create_client(url, key)
+
+
+def _schema(tabela: str):
+    """Schema Parquet fixo por tabela (evita tipos inferidos diferentes entre páginas)"""
+    import pyarrow as pa
+
+    ts = pa.timestamp('us', tz='UTC')
+    if tabela == 'activity_logs':
+        return pa.schema([
+            ('id', pa.string()), ('user_id', pa.string()), ('action', pa.string()),
+            ('details', pa.string()), ('ip_address', pa.string()), ('user_agent', pa.string()),
+            ('timestamp', ts)
+        ])
+    return pa.schema([
+        ('id', pa.string()), ('source', pa.string()), ('event_type', pa.string()),
+        ('webhook_id', pa.string()), ('object_id', pa.string()), ('data', pa.string()),
+        ('signature', pa.string()), ('verified', pa.bool_()), ('processed', pa.bool_()),
+        ('processed_at', ts), ('error_message', pa.string()), ('retry_count', pa.int32()),
+        ('status', pa.string()), ('created_at', ts), ('updated_at', ts)
+    ])
+
+
+def _preparar_lote(rows: List[Dict[str, Any]], schema):
+    """Converte uma página de linhas em tabela Arrow no schema da tabela"""
+    import pandas as pd
+    import pyarrow as pa
+
+    df = pd.DataFrame(rows).reindex(columns=schema.names)
+
+    for campo in schema:
+        coluna = campo.name
+        if pa.types.is_timestamp(campo.type):
+            df[coluna] = pd.to_datetime(df[coluna], utc=True, errors='coerce')
+        elif pa.types.is_string(campo.type):
+            # Colunas JSONB (webhooks.data) chegam como dict/list
+            df[coluna] = df[coluna].map(
+                lambda v: json.dumps(v, default=str) if isinstance(v, (dict, list)) else (None if v is None else str(v))
+            )
+
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def arquivar_particao(client, tabela: str, particao: str, destino: str, compressao: str = "zstd") -> int:
+    """Copia a partição para um arquivo Parquet, página a página (keyset por id)"""
+    import pyarrow.parquet as pq
+
+    schema = _schema(tabela)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp_path = f"{destino}.tmp"
+
+    writer = None
+    total = 0
+    ultimo_id = None
+
+    try:
+        while True:
+            query = client.table(particao).select('*').order('id').limit(PAGE_SIZE)
+            if ultimo_id is not None:
+                query = query.gt('id', ultimo_id)
+
+            rows = query.execute().data
+            if not rows:
+                break
+
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema, compression=compressao)
+
+            writer.write_table(_preparar_lote(rows, schema))
+            total += len(rows)
+            ultimo_id = rows[-1]['id']
+
+            if len(rows) < PAGE_SIZE:
+                break
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        os.replace(tmp_path, destino)
+
+    return total
+
+
+def executar_retencao(meses_retencao: int, destino_dir: str, remover: bool = True) -> List[Dict[str, Any]]:
+    """Arquiva e remove todas as partições mais antigas que a janela de retenção"""
+    client = _criar_cliente()
+
+    # Garantir partições futuras antes de mexer nas antigas
+    client.rpc('manter_particoes_futuras', {'p_meses_frente': 3}).execute()
+
+    resultados = []
+
+    for tabela in TABELAS:
+        frias = client.rpc('listar_particoes_frias', {
+            'p_tabela': tabela,
+            'p_meses_retencao': meses_retencao
+        }).execute().data or []
+
+        for info in frias:
+            particao = info['particao']
+            destino = os.path.join(destino_dir, tabela, f"{particao}.parquet")
+
+            arquivadas = arquivar_particao(client, tabela, particao, destino) if info['linhas'] else 0
+
+            # Só remove se o arquivo tem todas as linhas contadas pelo banco
+            ok = arquivadas == info['linhas']
+            if ok and remover:
+                client.rpc('descartar_particao', {'p_particao': particao}).execute()
+
+            resultados.append({
+                'tabela': tabela,
+                'particao': particao,
+                'linhas': info['linhas'],
+                'arquivadas': arquivadas,
+                'arquivo': destino if arquivadas else None,
+                'removida': ok and remover
+            })
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arquiva partições antigas de logs em Parquet")
+    parser.add_argument("--meses", type=int, default=int(os.environ.get("LOG_RETENTION_MONTHS", 6)),
+                        help="Meses mantidos no banco (padrão: 6)")
+    parser.add_argument("--destino", default=os.environ.get("LOG_ARCHIVE_DIR", "arquivo_logs"),
+                        help="Diretório dos arquivos Parquet")
+    parser.add_argument("--manter", action="store_true",
+                        help="Apenas arquivar, sem remover as partições")
+    args = parser.parse_args()
+
+    for r in executar_retencao(args.meses, args.destino, remover=not args.manter):
+        status = "removida" if r['removida'] else "mantida"
+        print(f"{r['particao']}: {r['arquivadas']}/{r['linhas']} linhas -> {r['arquivo'] or '-'} ({status})")
+
+
+if __name__ == "__main__":
+    main()
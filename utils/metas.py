@@ -0,0 +1,76 @@
+"""
+🎯 Metas
+Metas mensais por vendedor (tabela metas) e progresso lido da tabela de
+totais corrente metas_progresso (metas.sql), mantida por trigger a cada
+venda: os cards consultam uma linha por vendedor em vez de somar as vendas.
+A notificação de meta atingida é reservada no banco antes do webhook, então
+dispara uma única vez por vendedor e mês.
+"""
+
+from datetime import date, datetime
+from typing import Dict
+
+import pandas as pd
+
+# Vendedores da equipe (chave em minúsculas, como na tabela metas)
+VENDEDORES = {'ana': 'Ana', 'fernando': 'Fernando'}
+
+# Meta mensal de faturamento quando o mês não tem meta cadastrada
+# (mesmos valores iniciais do schema.sql e padrão de marcar_meta_notificada, metas.sql)
+METAS_PADRAO = {'ana': 50000.0, 'fernando': 50000.0}
+META_LEADS_PADRAO = 100
+
+COLUNAS_PROGRESSO = ['vendedor', 'ano', 'mes', 'meta_vendas', 'meta_leads', 'faturado', 'vendas',
+                     'percentual', 'notificada_em']
+
+
+def progresso_mes(db, ano: int, mes: int) -> pd.DataFrame:
+    """Meta e faturamento do mês para cada vendedor da equipe
+
+    Vendedores sem meta cadastrada recebem METAS_PADRAO; sem vendas, faturado 0.
+    """
+    progresso = db.get_metas_progresso(ano, mes)
+    progresso = progresso.assign(vendedor=progresso['vendedor'].str.lower()).set_index('vendedor')
+
+    equipe = pd.DataFrame(index=pd.Index(list(VENDEDORES), name='vendedor'))
+    progresso = equipe.join(progresso, how='outer')
+
+    progresso['ano'], progresso['mes'] = ano, mes
+    padrao = pd.Series(METAS_PADRAO, dtype=float)
+    progresso['meta_vendas'] = pd.to_numeric(progresso['meta_vendas']).fillna(padrao).fillna(0.0)
+    progresso['faturado'] = pd.to_numeric(progresso['faturado']).fillna(0.0)
+    progresso['vendas'] = pd.to_numeric(progresso['vendas']).fillna(0).astype(int)
+    progresso['percentual'] = (progresso['faturado'] / progresso['meta_vendas'].where(progresso['meta_vendas'] > 0) * 100).fillna(0.0)
+    return progresso.reset_index()[COLUNAS_PROGRESSO]
+
+
+def metas_vendas(db, ano: int, mes: int) -> Dict[str, float]:
+    """Meta de faturamento do mês por vendedor (usada pelo motor de comissões)"""
+    progresso = progresso_mes(db, ano, mes)
+    return dict(zip(progresso['vendedor'], progresso['meta_vendas']))
+
+
+def verificar_meta_atingida(db, vendedor: str, data_venda: date, webhooks=None) -> bool:
+    """Notifica `meta_atingida` se a venda fez o vendedor bater a meta do mês
+
+    A reserva (marcar_meta_notificada) só devolve True na primeira vez, mesmo
+    com várias sessões registrando vendas ao mesmo tempo.
+    """
+    if not db.marcar_meta_notificada(vendedor, data_venda.year, data_venda.month):
+        return False
+
+    linha = progresso_mes(db, data_venda.year, data_venda.month)
+    linha = linha[linha['vendedor'] == vendedor.lower()].iloc[0]
+
+    if webhooks is None:
+        from utils.webhooks import WebhookManager
+        webhooks = WebhookManager()
+
+    webhooks.notify_goal_achieved({
+        'vendedor': VENDEDORES.get(vendedor.lower(), vendedor),
+        'tipo_meta': 'faturamento_mensal',
+        'valor_meta': float(linha['meta_vendas']),
+        'valor_atingido': float(linha['faturado']),
+        'data_conclusao': datetime.now().isoformat()
+    })
+    return True
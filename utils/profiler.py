@@ -0,0 +1,132 @@
+"""
+⏱️ Profiler de Renderização
+Mede o tempo de cada rerun por página, dividido em fases (dados, cálculo, gráficos)
+"""
+
+import cProfile
+import io
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import streamlit as st
+
+# Fases medidas explicitamente; "calculo" é o tempo restante do rerun
+FASES = ('dados', 'calculo', 'graficos')
+
+# Quantidade máxima de perfis guardados por sessão
+MAX_PERFIS = 30
+
+# Linhas do relatório cProfile guardadas por rerun
+CPROFILE_LINHAS = 25
+
+
+def _pilha_fases():
+    """Retorna a pilha de fases abertas do rerun atual (ou None fora de um perfil)"""
+    try:
+        perfil = st.session_state.get('_perfil_atual')
+    except Exception:
+        return None
+    return perfil['pilha'] if perfil else None
+
+
+@contextmanager
+def medir_fase(fase: str):
+    """Soma o tempo do bloco na fase informada do perfil atual"""
+    pilha = _pilha_fases()
+    if pilha is None:
+        yield
+        return
+
+    # [fase, inicio, tempo gasto em fases aninhadas]
+    frame = [fase, time.perf_counter(), 0.0]
+    pilha.append(frame)
+    try:
+        yield
+    finally:
+        pilha.pop()
+        decorrido = time.perf_counter() - frame[1]
+        perfil = st.session_state['_perfil_atual']
+        perfil['fases'][fase] = perfil['fases'].get(fase, 0.0) + decorrido - frame[2]
+        perfil['chamadas'][fase] = perfil['chamadas'].get(fase, 0) + 1
+
+        # Evitar contar duas vezes o tempo de fases aninhadas
+        if pilha:
+            pilha[-1][2] += decorrido
+
+
+def medido(fase: str):
+    """Decorator que atribui o tempo da função a uma fase do perfil"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with medir_fase(fase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def perfilar_pagina(pagina: str):
+    """Mede um rerun completo da página e guarda o resultado na sessão"""
+    usar_cprofile = st.session_state.get('debug_mode', False) and st.session_state.get('debug_cprofile', False)
+
+    st.session_state['_perfil_atual'] = {'pilha': [], 'fases': {}, 'chamadas': {}}
+
+    profiler = None
+    if usar_cprofile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outro profiler já está ativo neste processo
+            profiler = None
+
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - inicio
+        if profiler:
+            profiler.disable()
+
+        perfil = st.session_state.pop('_perfil_atual', None) or {'fases': {}, 'chamadas': {}}
+        fases = perfil['fases']
+        dados = fases.get('dados', 0.0)
+        graficos = fases.get('graficos', 0.0)
+
+        registro = {
+            'pagina': pagina,
+            'inicio': datetime.now().strftime('%H:%M:%S'),
+            'total_ms': round(total * 1000, 1),
+            'dados_ms': round(dados * 1000, 1),
+            'calculo_ms': round(max(total - dados - graficos, 0.0) * 1000, 1),
+            'graficos_ms': round(graficos * 1000, 1),
+            'consultas': perfil['chamadas'].get('dados', 0),
+            'graficos': perfil['chamadas'].get('graficos', 0),
+            'cprofile': _formatar_cprofile(profiler) if profiler else None
+        }
+
+        perfis = st.session_state.setdefault('page_profiles', [])
+        perfis.append(registro)
+        del perfis[:-MAX_PERFIS]
+
+
+def _formatar_cprofile(profiler) -> str:
+    """Gera o relatório texto do cProfile ordenado por tempo acumulado"""
+    buffer = io.StringIO()
+    stats = pstats.Stats(profiler, stream=buffer)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(CPROFILE_LINHAS)
+    return buffer.getvalue()
+
+
+def get_perfis():
+    """Retorna os perfis de renderização da sessão (mais recente por último)"""
+    return list(st.session_state.get('page_profiles', []))
+
+
+def limpar_perfis():
+    """Remove os perfis guardados na sessão"""
+    st.session_state['page_profiles'] = []
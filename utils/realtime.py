@@ -0,0 +1,323 @@
+"""
+⚡ Atualizações em Tempo Real
+Assina inserts/updates/deletes de vendas, leads e notificacoes via Supabase Realtime
+e aplica os deltas nos DataFrames guardados na sessão, sem refazer as consultas.
+Sem Realtime, os painéis conferem periodicamente a versão de cada tabela
+(contadores de table_versions, versoes.sql) e só refazem as consultas das
+tabelas que mudaram; os mesmos contadores servem de chave para os caches.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from utils.database import get_snapshot_dir
+
+TABELAS_REALTIME = ('vendas', 'leads', 'notificacoes')
+
+# Eventos guardados por tabela; sessões mais atrasadas que isso recarregam o frame
+MAX_EVENTOS = 2000
+
+# Intervalo em que os fragmentos ao vivo conferem se chegaram eventos
+INTERVALO_PADRAO = "10s"
+
+# Intervalo da atualização automática sem Realtime (conferência de versões);
+# "off" desliga
+AUTO_REFRESH_PADRAO = "60s"
+
+# Por quanto tempo as versões consultadas valem para todas as sessões (segundos)
+TTL_VERSOES = 15
+
+# Frames guardados por sessão (LRU): cada período aberto é um DataFrame inteiro
+MAX_FRAMES_SESSAO = 6
+
+# Resultados de memo_versao guardados por sessão (LRU; inclui frames por período)
+MAX_MEMO_SESSAO = 24
+
+# Espera entre tentativas de reconexão (segundos)
+RECONEXAO_INICIAL = 2
+RECONEXAO_MAXIMA = 60
+
+
+class RealtimeHub:
+    """Conexão Realtime única por processo, compartilhada por todas as sessões"""
+
+    def __init__(self, url: str, key: str, tabelas=TABELAS_REALTIME):
+        self.url = url
+        self.key = key
+        self.tabelas = tabelas
+        self.ativo = False
+        self.erro: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._eventos = {t: deque(maxlen=MAX_EVENTOS) for t in tabelas}
+        self._seq = {t: 0 for t in tabelas}
+
+        self._thread = threading.Thread(target=self._run, name="supabase-realtime", daemon=True)
+        self._thread.start()
+
+    def seq(self, tabela: str) -> int:
+        """Número de eventos já recebidos para a tabela (cresce sempre)"""
+        with self._lock:
+            return self._seq.get(tabela, 0)
+
+    def eventos_desde(self, tabela: str, seq: int) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        """Eventos posteriores a seq; retorna None se parte deles já foi descartada"""
+        with self._lock:
+            atual = self._seq[tabela]
+            faltando = atual - seq
+            if faltando <= 0:
+                return [], atual
+            if faltando > len(self._eventos[tabela]):
+                return None, atual
+            return list(self._eventos[tabela])[-faltando:], atual
+
+    def _registrar(self, tabela: str, payload: Dict[str, Any]):
+        """Callback do Realtime: normaliza o payload e guarda o evento"""
+        # realtime-py >= 2 envia {'data': {'type', 'record', 'old_record'}};
+        # versões antigas enviam {'eventType', 'new', 'old'}
+        dados = payload.get('data', payload)
+        evento = {
+            'tipo': (dados.get('type') or dados.get('eventType') or '').upper(),
+            'novo': dados.get('record') or dados.get('new') or {},
+            'antigo': dados.get('old_record') or dados.get('old') or {}
+        }
+
+        with self._lock:
+            self._eventos[tabela].append(evento)
+            self._seq[tabela] += 1
+
+    def _run(self):
+        asyncio.run(self._manter_conexao())
+
+    async def _manter_conexao(self):
+        """Conecta e reconecta com backoff exponencial"""
+        espera = RECONEXAO_INICIAL
+        while True:
+            try:
+                await self._conectar()
+                espera = RECONEXAO_INICIAL
+            except Exception as e:
+                self.erro = str(e)
+            self.ativo = False
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, RECONEXAO_MAXIMA)
+
+    async def _conectar(self):
+        from supabase import acreate_client
+
+        client = await acreate_client(self.url, self.key)
+        channel = client.channel('dashboard-changes')
+
+        for tabela in self.tabelas:
+            channel.on_postgres_changes(
+                '*', schema='public', table=tabela,
+                callback=partial(self._registrar, tabela)
+            )
+
+        await channel.subscribe()
+        self.ativo = True
+        self.erro = None
+
+        # Mantém a conexão viva até o socket cair
+        listen = getattr(client.realtime, 'listen', None)
+        if listen is not None:
+            await listen()
+
+        # Versões novas do realtime-py escutam numa task própria
+        while getattr(client.realtime, 'is_connected', False):
+            await asyncio.sleep(RECONEXAO_MAXIMA)
+
+
+@st.cache_resource
+def get_realtime_hub() -> Optional[RealtimeHub]:
+    """Hub do processo (None se o Supabase não estiver configurado ou o Realtime estiver desligado)"""
+    url = st.secrets.get("SUPABASE_URL", "")
+    key = st.secrets.get("SUPABASE_ANON_KEY", "")
+    habilitado = str(st.secrets.get("REALTIME_ENABLED", "true")).lower() == "true"
+
+    if not url or not key or not habilitado:
+        return None
+
+    return RealtimeHub(url, key)
+
+
+def realtime_ativo() -> bool:
+    """Indica se os frames da sessão estão sendo atualizados por push"""
+    hub = get_realtime_hub()
+    return hub is not None and hub.ativo
+
+
+def aplicar_eventos(df: pd.DataFrame, eventos: List[Dict[str, Any]],
+                    filtro: Optional[Callable[[Dict[str, Any]], bool]] = None) -> pd.DataFrame:
+    """Aplica inserts/updates/deletes ao DataFrame (chave: id)"""
+    if not eventos:
+        return df
+
+    # Estado final de cada id alterado (None = removido ou fora do filtro)
+    ultimos: Dict[Any, Optional[Dict[str, Any]]] = {}
+    for evento in eventos:
+        if evento['tipo'] == 'DELETE':
+            ultimos[evento['antigo'].get('id')] = None
+        else:
+            registro = evento['novo']
+            incluir = filtro(registro) if filtro else True
+            ultimos[registro.get('id')] = registro if incluir else None
+
+    if not df.empty and 'id' in df.columns:
+        df = df[~df['id'].isin(list(ultimos))]
+
+    novos = [r for r in ultimos.values() if r is not None]
+    if novos:
+        # Mais recentes primeiro, como nas consultas do Database
+        df = pd.concat([pd.DataFrame(novos[::-1]), df], ignore_index=True)
+
+    return df.reset_index(drop=True)
+
+
+def get_live_frame(tabela: str, loader: Callable[[], pd.DataFrame], *chave,
+                   filtro: Optional[Callable[[Dict[str, Any]], bool]] = None) -> pd.DataFrame:
+    """DataFrame da sessão mantido em dia pelos eventos do Realtime
+
+    Sem Realtime ativo, chama o loader só quando a versão da tabela muda.
+    `chave` diferencia consultas da mesma tabela (ex.: período); `filtro`
+    decide se um registro recebido pertence a essa consulta.
+    """
+    hub = get_realtime_hub()
+    if hub is None or not hub.ativo or get_snapshot_dir():
+        return memo_versao((tabela,) + chave, (tabela,), loader)
+
+    frames = st.session_state.setdefault('_live_frames', {})
+    cache_key = (tabela,) + chave
+    entrada = frames.get(cache_key)
+
+    if entrada is not None:
+        eventos, seq = hub.eventos_desde(tabela, entrada['seq'])
+        if eventos is not None:
+            if eventos:
+                entrada['df'] = aplicar_eventos(entrada['df'], eventos, filtro)
+                entrada['seq'] = seq
+            _lembrar(frames, cache_key, entrada, MAX_FRAMES_SESSAO)
+            return entrada['df']
+
+    # Primeira carga (ou sessão atrasada demais): capturar seq antes da consulta
+    # para não perder eventos que cheguem durante ela
+    seq = hub.seq(tabela)
+    df = loader()
+    _lembrar(frames, cache_key, {'df': df, 'seq': seq}, MAX_FRAMES_SESSAO)
+    return df
+
+
+def _lembrar(cache: Dict, chave, entrada, limite: int):
+    """Guarda a entrada como a mais recente e descarta as mais antigas acima do limite (LRU)"""
+    cache.pop(chave, None)
+    cache[chave] = entrada
+    while len(cache) > limite:
+        del cache[next(iter(cache))]
+
+
+@st.cache_data(ttl=TTL_VERSOES, show_spinner=False)
+def _versoes_banco() -> Dict[str, int]:
+    """Versões do Supabase, consultadas no máximo uma vez a cada TTL_VERSOES pelo processo todo"""
+    from utils.database import Database
+    return Database().get_data_versions()
+
+
+def versoes_dados() -> Dict[str, int]:
+    """Contador de versão de cada tabela (table_versions; {} se indisponível)"""
+    snapshot_dir = get_snapshot_dir()
+    if snapshot_dir:
+        from utils.snapshots import SnapshotDatabase
+        return SnapshotDatabase(snapshot_dir).get_data_versions()
+    return _versoes_banco()
+
+
+def versao_de(*tabelas) -> Optional[Tuple[int, ...]]:
+    """Origem dos dados e contadores das tabelas, para chaves de cache (None se indisponível)"""
+    versoes = versoes_dados()
+    versao = tuple(versoes.get(t) for t in tabelas)
+    return None if None in versao else (get_snapshot_dir(),) + versao
+
+
+def memo_versao(chave: tuple, tabelas, loader: Callable[[], Any]) -> Any:
+    """Resultado do loader guardado na sessão enquanto as `tabelas` não mudarem
+
+    A versão é lida antes da consulta: uma alteração feita durante ela só
+    faz a próxima conferência recarregar.
+    """
+    versao = versao_de(*tabelas)
+    if versao is None:
+        return loader()
+
+    memo = st.session_state.setdefault('_memo_versoes', {})
+    entrada = memo.get(chave)
+    if entrada is not None and entrada['versao'] == versao:
+        _lembrar(memo, chave, entrada, MAX_MEMO_SESSAO)
+        return entrada['valor']
+
+    valor = loader()
+    _lembrar(memo, chave, {'valor': valor, 'versao': versao, 'tabelas': tuple(tabelas)}, MAX_MEMO_SESSAO)
+    return valor
+
+
+def invalidar_frames(*tabelas):
+    """Descarta frames da sessão (ex.: após uma escrita feita pela própria sessão)"""
+    frames = st.session_state.get('_live_frames', {})
+    for chave in list(frames):
+        if not tabelas or chave[0] in tabelas:
+            del frames[chave]
+
+    memo = st.session_state.get('_memo_versoes', {})
+    for chave, entrada in list(memo.items()):
+        if not tabelas or set(entrada['tabelas']) & set(tabelas):
+            del memo[chave]
+
+    # A próxima conferência já enxerga a escrita
+    _versoes_banco.clear()
+
+
+def intervalo_auto_refresh() -> Optional[str]:
+    """Intervalo da atualização automática (secret AUTO_REFRESH) ou None se desligada"""
+    intervalo = str(st.secrets.get("AUTO_REFRESH", AUTO_REFRESH_PADRAO)).strip()
+    return None if intervalo.lower() in ('', '0', 'off', 'false') else intervalo
+
+
+def fragmento_ao_vivo(func):
+    """Executa func como fragmento que reroda sozinho
+
+    Com Realtime ativo, confere os eventos recebidos a cada REALTIME_REFRESH;
+    sem ele, a cada AUTO_REFRESH confere as versões das tabelas (uma consulta
+    compartilhada pelo processo) e só refaz as consultas das que mudaram.
+    """
+    if realtime_ativo():
+        intervalo = st.secrets.get("REALTIME_REFRESH", INTERVALO_PADRAO)
+    else:
+        intervalo = intervalo_auto_refresh()
+    return st.fragment(run_every=intervalo)(func)
+
+
+class ConsultaCompartilhada:
+    """Resultado do loader memorizado durante uma execução da página
+
+    Criada a cada execução completa e passada aos fragmentos, evita que cada
+    seção repita a mesma consulta. Num rerun de fragmento o Streamlit entrega
+    a mesma instância, então quem grava deve chamar `invalidar()` antes de
+    `st.rerun(scope="fragment")`.
+    """
+
+    def __init__(self, loader: Callable[[], pd.DataFrame]):
+        self.loader = loader
+        self._df: Optional[pd.DataFrame] = None
+
+    def __call__(self) -> pd.DataFrame:
+        if self._df is None:
+            self._df = self.loader()
+        return self._df
+
+    def invalidar(self):
+        self._df = None
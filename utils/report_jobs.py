@@ -0,0 +1,297 @@
+"""
+🧾 Relatórios em Segundo Plano
+Os relatórios (PDF/XLSX) são renderizados num pool de processos e guardados
+por endereço de conteúdo: a chave combina tipo, parâmetros e a impressão
+digital dos dados, então pedidos repetidos reaproveitam o arquivo pronto.
+
+Relatório mensal agendado (cron, GitHub Actions etc.):
+    python -m utils.report_jobs --mes 2024-06
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+# Variável vazia (como no .env.example) usa o padrão
+REPORTS_DIR = os.environ.get("REPORTS_DIR") or os.path.join(tempfile.gettempdir(), "dashboard_reports")
+
+# Artefatos mais antigos que isso são removidos (segundos)
+REPORTS_TTL = 7 * 24 * 3600
+
+# Processos renderizando relatórios ao mesmo tempo
+REPORT_WORKERS = 2
+
+# Intervalo de consulta do status na interface
+INTERVALO_STATUS = "2s"
+
+
+# ========== RENDERIZADORES ==========
+# Funções de módulo (precisam ser importáveis pelos processos do pool)
+
+def _render_vendas_pdf(dados, params):
+    from utils.exports import ExportManager
+    return ExportManager().create_sales_report_pdf(dados['vendas'], params.get('periodo', ''))
+
+
+def _render_leads_pdf(dados, params):
+    from utils.exports import ExportManager
+    return ExportManager().create_leads_report_pdf(dados['leads'], params.get('periodo', ''))
+
+
+def _render_financeiro_xlsx(dados, params):
+    from utils.exports import ExportManager
+    return ExportManager().export_financial_report(
+        custos_data=params.get('custos'),
+        resumo=dados.get('resumo'),
+        detalhes=dados.get('vendas')
+    )
+
+
+RELATORIOS = {
+    'vendas_pdf': _render_vendas_pdf,
+    'leads_pdf': _render_leads_pdf,
+    'financeiro_xlsx': _render_financeiro_xlsx,
+}
+
+
+# ========== ARTEFATOS ==========
+
+def impressao_digital(dados: Dict[str, pd.DataFrame]) -> str:
+    """Hash do conteúdo dos DataFrames (independe da ordem das chaves)"""
+    h = hashlib.sha256()
+    for nome in sorted(dados):
+        df = dados[nome]
+        h.update(nome.encode())
+        if df is None or len(df) == 0:
+            continue
+        h.update(json.dumps([str(c) for c in df.columns]).encode())
+        h.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def chave_relatorio(tipo: str, params: Dict[str, Any], dados: Dict[str, pd.DataFrame]) -> str:
+    """Endereço do artefato: tipo + parâmetros + conteúdo dos dados"""
+    base = json.dumps({'tipo': tipo, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{base}|{impressao_digital(dados)}".encode()).hexdigest()[:32]
+
+
+def _caminho_meta(chave: str) -> str:
+    return os.path.join(REPORTS_DIR, f"{chave}.json")
+
+
+def carregar_artefato(chave: str) -> Optional[Dict[str, Any]]:
+    """Metadados do artefato pronto ({'caminho', 'filename', 'mime', 'gerado_em'}) ou None"""
+    try:
+        with open(_caminho_meta(chave), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if os.path.exists(meta.get('caminho', '')) else None
+
+
+def gerar_relatorio(tipo: str, params: Dict[str, Any], dados: Dict[str, pd.DataFrame], chave: str) -> Dict[str, Any]:
+    """Renderiza e grava o artefato (executa dentro do processo do pool)"""
+    conteudo, filename, mime = RELATORIOS[tipo](dados, params)
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    extensao = os.path.splitext(filename)[1]
+    caminho = os.path.join(REPORTS_DIR, f"{chave}{extensao}")
+
+    # Gravar e renomear: quem lê nunca vê arquivo pela metade
+    with open(f"{caminho}.tmp", "wb") as f:
+        f.write(conteudo)
+    os.replace(f"{caminho}.tmp", caminho)
+
+    meta = {'caminho': caminho, 'filename': filename, 'mime': mime, 'gerado_em': datetime.now().isoformat()}
+    with open(f"{_caminho_meta(chave)}.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{_caminho_meta(chave)}.tmp", _caminho_meta(chave))
+
+    return meta
+
+
+def limpar_artefatos_antigos():
+    """Remove artefatos além do REPORTS_TTL"""
+    if not os.path.isdir(REPORTS_DIR):
+        return
+
+    limite = time.time() - REPORTS_TTL
+    for nome in os.listdir(REPORTS_DIR):
+        caminho = os.path.join(REPORTS_DIR, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+
+# ========== FILA ==========
+
+class ReportQueue:
+    """Fila de relatórios do processo: um pool compartilhado por todas as sessões"""
+
+    def __init__(self, max_workers: int = REPORT_WORKERS):
+        self._max_workers = max_workers
+        self._executor = self._novo_executor()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _novo_executor(self) -> ProcessPoolExecutor:
+        # spawn: o processo do Streamlit tem várias threads, fork não é seguro
+        return ProcessPoolExecutor(max_workers=self._max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _submeter(self, *args):
+        """Submete ao pool; um pool quebrado (worker morto, ex.: OOM) é recriado uma vez"""
+        try:
+            return self._executor.submit(*args)
+        except BrokenProcessPool:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._novo_executor()
+            return self._executor.submit(*args)
+
+    def enviar(self, tipo: str, params: Dict[str, Any], dados: Dict[str, pd.DataFrame]) -> str:
+        """Enfileira o relatório e retorna a chave; não reenvia se já existe ou está em andamento"""
+        if tipo not in RELATORIOS:
+            raise ValueError(f"Relatório desconhecido: {tipo}")
+
+        chave = chave_relatorio(tipo, params, dados)
+
+        with self._lock:
+            job = self._jobs.get(chave)
+            em_andamento = job is not None and not job.done()
+
+            if not em_andamento and carregar_artefato(chave) is None:
+                limpar_artefatos_antigos()
+                self._jobs[chave] = self._submeter(gerar_relatorio, tipo, params, dados, chave)
+
+        return chave
+
+    def status(self, chave: str) -> Tuple[str, Optional[str]]:
+        """('pronto' | 'processando' | 'erro' | 'desconhecido', mensagem de erro)"""
+        if carregar_artefato(chave) is not None:
+            return 'pronto', None
+
+        with self._lock:
+            job = self._jobs.get(chave)
+
+        if job is None:
+            return 'desconhecido', None
+        if not job.done():
+            return 'processando', None
+
+        erro = job.exception()
+        if erro is not None:
+            return 'erro', str(erro)
+        return 'pronto', None
+
+
+@st.cache_resource
+def get_report_queue() -> ReportQueue:
+    """Fila única do processo do Streamlit"""
+    return ReportQueue(int(st.secrets.get("REPORT_WORKERS", REPORT_WORKERS)))
+
+
+# ========== INTERFACE ==========
+
+def solicitar_relatorio(tipo: str, params: Dict[str, Any], dados: Dict[str, pd.DataFrame]) -> str:
+    """Enfileira o relatório e associa a chave à sessão (um relatório por tipo)"""
+    chave = get_report_queue().enviar(tipo, params, dados)
+    st.session_state.setdefault('report_jobs', {})[tipo] = chave
+    return chave
+
+
+def mostrar_relatorio(tipo: str, rotulo: str = "💾 Download"):
+    """Status do último relatório do tipo pedido nesta sessão; download quando pronto"""
+    chave = st.session_state.get('report_jobs', {}).get(tipo)
+    if not chave:
+        return
+
+    status, erro = get_report_queue().status(chave)
+
+    artefato = carregar_artefato(chave) if status == 'pronto' else None
+
+    if artefato is not None:
+        with open(artefato['caminho'], "rb") as arquivo:
+            st.download_button(label=rotulo, data=arquivo, file_name=artefato['filename'],
+                               mime=artefato['mime'], key=f"download_{tipo}")
+    elif status == 'processando':
+        _aguardar_relatorio(chave)
+    elif status == 'erro':
+        st.error(f"❌ Erro ao gerar relatório: {erro}")
+
+
+@st.fragment(run_every=INTERVALO_STATUS)
+def _aguardar_relatorio(chave: str):
+    """Consulta o status sem rerodar a página; rerun completo quando termina"""
+    status, _ = get_report_queue().status(chave)
+    if status != 'processando':
+        st.rerun()
+    st.info("⏳ Gerando relatório em segundo plano... você pode continuar usando o dashboard")
+
+
+# ========== RELATÓRIO MENSAL ==========
+
+def relatorio_mensal(client, ano: int, mes: int) -> Dict[str, Any]:
+    """Gera o PDF de vendas do mês pelo mesmo caminho (e cache) da interface"""
+    inicio = date(ano, mes, 1)
+    fim = date(ano + mes // 12, mes % 12 + 1, 1)
+
+    rows = []
+    ultimo_id = None
+    while True:
+        query = (client.table('vendas').select('*')
+                 .gte('data_venda', inicio.isoformat()).lt('data_venda', fim.isoformat())
+                 .order('id').limit(5000))
+        if ultimo_id is not None:
+            query = query.gt('id', ultimo_id)
+        pagina = query.execute().data
+        if not pagina:
+            break
+        rows.extend(pagina)
+        if len(pagina) < 5000:
+            break
+        ultimo_id = pagina[-1]['id']
+
+    vendas_df = pd.DataFrame(rows)
+    if not vendas_df.empty:
+        # Mesma ordem de Database.get_vendas
+        vendas_df = vendas_df.sort_values('data_venda', ascending=False, kind='stable').reset_index(drop=True)
+
+    params = {'periodo': inicio.strftime('%m/%Y')}
+    dados = {'vendas': vendas_df}
+    chave = chave_relatorio('vendas_pdf', params, dados)
+
+    return carregar_artefato(chave) or gerar_relatorio('vendas_pdf', params, dados, chave)
+
+
+def main():
+    from utils.log_retention import _criar_cliente
+
+    parser = argparse.ArgumentParser(description="Gera o relatório mensal de vendas")
+    parser.add_argument("--mes", default=None, help="Mês no formato AAAA-MM (padrão: mês anterior)")
+    args = parser.parse_args()
+
+    if args.mes:
+        ano, mes = (int(p) for p in args.mes.split("-"))
+    else:
+        hoje = date.today()
+        ano, mes = (hoje.year, hoje.month - 1) if hoje.month > 1 else (hoje.year - 1, 12)
+
+    meta = relatorio_mensal(_criar_cliente(), ano, mes)
+    print(f"{meta['filename']} -> {meta['caminho']}")
+
+
+if __name__ == "__main__":
+    main()
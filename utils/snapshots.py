@@ -0,0 +1,521 @@
+"""
+📦 Snapshots Colunares (Parquet / Arrow IPC)
+Exporta vendas, leads, activity_logs e mídia do Instagram com tipos fixos e
+compressão, e permite usar esses arquivos como fonte de dados somente leitura
+dos dashboards (SnapshotDatabase).
+
+Dump mensal pela linha de comando:
+    python -m utils.snapshots --destino snapshots/2024-06 --formato parquet
+"""
+
+import argparse
+import glob
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+TABELAS_SNAPSHOT = ('vendas', 'leads', 'activity_logs', 'instagram_media')
+
+# Tabelas que vêm do Supabase (instagram_media vem da API / página de analytics)
+TABELAS_BANCO = ('vendas', 'leads', 'activity_logs')
+
+FORMATOS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+COMPRESSAO_PADRAO = 'zstd'
+
+# Raiz dos diretórios de snapshot escolhidos em Configurações (relativa ao app)
+RAIZ_SNAPSHOTS_PADRAO = 'snapshots'
+
+
+def schema(tabela: str):
+    """Schema Arrow fixo por tabela (colunas de baixa cardinalidade como dicionário)"""
+    import pyarrow as pa
+
+    ts = pa.timestamp('us', tz='UTC')
+    categoria = pa.dictionary(pa.int32(), pa.string())
+
+    if tabela == 'vendas':
+        return pa.schema([
+            ('id', pa.string()), ('cliente_nome', pa.string()), ('cliente_instagram', pa.string()),
+            ('cliente_email', pa.string()), ('cliente_telefone', pa.string()), ('produto', categoria),
+            ('valor', pa.float64()), ('vendedor', categoria), ('data_venda', pa.date32()),
+            ('status', categoria), ('meio_pagamento', categoria), ('parcelas', pa.int16()), ('comissao_pct', pa.float64()),
+            ('comissao_valor', pa.float64()), ('observacoes', pa.string()),
+            ('created_at', ts), ('updated_at', ts)
+        ])
+    if tabela == 'leads':
+        return pa.schema([
+            ('id', pa.string()), ('nome', pa.string()), ('instagram', pa.string()),
+            ('telefone', pa.string()), ('email', pa.string()), ('status', categoria),
+            ('origem', categoria), ('vendedor', categoria), ('nota', pa.string()),
+            ('score', pa.int16()), ('ultima_interacao', pa.date32()), ('data_agendamento', ts),
+            ('valor_estimado', pa.float64()), ('tags', pa.list_(pa.string())),
+            ('created_at', ts), ('updated_at', ts)
+        ])
+    if tabela == 'activity_logs':
+        return pa.schema([
+            ('id', pa.string()), ('user_id', categoria), ('action', categoria),
+            ('details', pa.string()), ('ip_address', pa.string()), ('user_agent', pa.string()),
+            ('timestamp', ts)
+        ])
+    if tabela == 'instagram_media':
+        return pa.schema([
+            ('id', pa.string()), ('date', pa.timestamp('us')), ('type', categoria),
+            ('caption', pa.string()), ('likes', pa.int64()), ('comments', pa.int64()),
+            ('saves', pa.int64()), ('reach', pa.int64()), ('impressions', pa.int64()),
+            ('engagement_rate', pa.float64())
+        ])
+
+    raise ValueError(f"Tabela sem schema de snapshot: {tabela}")
+
+
+def para_arrow(tabela: str, dados):
+    """Converte DataFrame ou lista de dicts numa tabela Arrow no schema da tabela"""
+    import pyarrow as pa
+
+    sch = schema(tabela)
+    df = dados if isinstance(dados, pd.DataFrame) else pd.DataFrame(dados)
+    df = df.reindex(columns=sch.names)
+
+    colunas = []
+    for campo in sch:
+        serie = df[campo.name]
+        tipo = campo.type
+
+        if pa.types.is_timestamp(tipo):
+            serie = pd.to_datetime(serie, utc=tipo.tz is not None, errors='coerce')
+            if tipo.tz is None and getattr(serie.dt, 'tz', None) is not None:
+                serie = serie.dt.tz_localize(None)
+        elif pa.types.is_date32(tipo):
+            serie = pd.to_datetime(serie, errors='coerce').dt.date
+        elif pa.types.is_list(tipo):
+            # Coluna ausente (NaN após o reindex) ou valores soltos viram nulo
+            serie = serie.map(lambda v: list(v) if isinstance(v, (list, tuple, np.ndarray)) else None).astype(object)
+        elif pa.types.is_floating(tipo) or pa.types.is_integer(tipo):
+            serie = pd.to_numeric(serie, errors='coerce')
+        elif pa.types.is_string(tipo) or pa.types.is_dictionary(tipo):
+            serie = serie.map(
+                lambda v: json.dumps(v, default=str) if isinstance(v, dict)
+                else (None if v is None or (isinstance(v, float) and pd.isna(v)) else str(v))
+            )
+
+        if pa.types.is_dictionary(tipo):
+            colunas.append(pa.array(serie, type=pa.string(), from_pandas=True).dictionary_encode().cast(tipo))
+        else:
+            colunas.append(pa.array(serie, type=tipo, from_pandas=True))
+
+    return pa.Table.from_arrays(colunas, schema=sch)
+
+
+def escrever_snapshot(tabela: str, paginas: Iterable, destino: str, formato: str = 'parquet',
+                      compressao: str = COMPRESSAO_PADRAO) -> int:
+    """Grava o snapshot página a página (DataFrames ou listas de dicts); retorna o total de linhas"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}")
+
+    sch = schema(tabela)
+    pasta = os.path.dirname(destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    tmp_path = f"{destino}.tmp"
+
+    total = 0
+    if formato == 'parquet':
+        writer = pq.ParquetWriter(tmp_path, sch, compression=compressao)
+    else:
+        writer = pa.ipc.new_file(tmp_path, sch, options=pa.ipc.IpcWriteOptions(compression=compressao))
+
+    try:
+        for pagina in paginas:
+            if pagina is None or len(pagina) == 0:
+                continue
+            lote = para_arrow(tabela, pagina)
+            writer.write_table(lote)
+            total += lote.num_rows
+    finally:
+        writer.close()
+
+    os.replace(tmp_path, destino)
+    return total
+
+
+def ler_snapshot(caminho: str):
+    """Lê um arquivo de snapshot (Parquet ou Arrow IPC) como tabela Arrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if caminho.endswith('.arrow'):
+        with pa.memory_map(caminho, 'r') as origem:
+            return pa.ipc.open_file(origem).read_all()
+    return pq.read_table(caminho)
+
+
+def _para_pandas(tabela) -> pd.DataFrame:
+    """Converte para pandas no mesmo formato das respostas do Supabase (datas ISO em texto)"""
+    import pyarrow as pa
+
+    df = tabela.to_pandas()
+    for campo in tabela.schema:
+        coluna = campo.name
+        if pa.types.is_dictionary(campo.type):
+            df[coluna] = df[coluna].astype(object)
+        if pa.types.is_date32(campo.type) or pa.types.is_timestamp(campo.type):
+            df[coluna] = df[coluna].map(lambda v: v.isoformat() if pd.notna(v) else None)
+        elif pa.types.is_list(campo.type):
+            df[coluna] = df[coluna].map(lambda v: list(v) if v is not None else None)
+    return df
+
+
+def arquivos_snapshot(diretorio: str, tabela: str) -> List[str]:
+    """Arquivos da tabela no diretório, em ordem"""
+    encontrados = []
+    for extensao, _ in FORMATOS.values():
+        encontrados += glob.glob(os.path.join(diretorio, f"{tabela}*.{extensao}"))
+    return sorted(encontrados)
+
+
+def raiz_snapshots() -> str:
+    """Pasta sob a qual a interface pode escolher snapshots (secret SNAPSHOT_ROOT)"""
+    return os.path.realpath(st.secrets.get("SNAPSHOT_ROOT", RAIZ_SNAPSHOTS_PADRAO))
+
+
+def resolver_diretorio(diretorio: str) -> Optional[str]:
+    """Caminho real de uma subpasta da raiz de snapshots (None se sair da raiz ou não existir)"""
+    raiz = raiz_snapshots()
+    caminho = os.path.realpath(os.path.join(raiz, diretorio))
+    if os.path.commonpath([raiz, caminho]) != raiz or not os.path.isdir(caminho):
+        return None
+    return caminho
+
+
+class SnapshotDatabase:
+    """Fonte de dados somente leitura a partir de um diretório de snapshots
+
+    Implementa as leituras usadas pelas páginas com a mesma assinatura do
+    Database; escritas são recusadas com aviso.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._tabelas: Dict[str, Any] = {}
+
+    def is_connected(self):
+        return os.path.isdir(self.diretorio)
+
+    def arquivos(self, tabela: str) -> List[str]:
+        """Arquivos da tabela no diretório (ex.: vendas.parquet, vendas_2024_06.arrow)"""
+        return arquivos_snapshot(self.diretorio, tabela)
+
+    def _tabela(self, tabela: str):
+        """Tabela Arrow completa (todos os arquivos), lida uma vez por instância"""
+        import pyarrow as pa
+
+        if tabela not in self._tabelas:
+            partes = [ler_snapshot(c) for c in self.arquivos(tabela)]
+            if partes:
+                self._tabelas[tabela] = pa.concat_tables(partes, promote_options='permissive')
+            else:
+                self._tabelas[tabela] = schema(tabela).empty_table()
+        return self._tabelas[tabela]
+
+    def _somente_leitura(self, *args, **kwargs):
+        st.warning("🔒 Modo snapshot: dados somente leitura")
+        return False
+
+    add_venda = update_venda = delete_venda = _somente_leitura
+    add_lead = update_lead = _somente_leitura
+    add_custo = _somente_leitura
+    aplicar_comissoes = salvar_metas = _somente_leitura
+    marcar_notificacao_lida = _somente_leitura
+
+    def log_activity(self, user_id: str, action: str, details: str = ""):
+        """Sem registro de atividades em modo snapshot"""
+        return
+
+    def get_data_versions(self):
+        """Versão de cada tabela: mtime mais recente dos arquivos (cresce quando o snapshot é regravado)"""
+        # Tabelas fora dos snapshots nunca mudam
+        versoes = {'custos': 0, 'metas': 0, 'notificacoes': 0}
+        for tabela in TABELAS_SNAPSHOT:
+            versoes[tabela] = max((os.stat(c).st_mtime_ns for c in self.arquivos(tabela)), default=0)
+        return versoes
+
+    def get_vendas(self, start_date=None, end_date=None):
+        """Vendas do snapshot com os mesmos filtros de data do Database"""
+        import pyarrow.compute as pc
+
+        tabela = self._tabela('vendas')
+        if start_date:
+            tabela = tabela.filter(pc.field('data_venda') >= _como_data(start_date))
+        if end_date:
+            tabela = tabela.filter(pc.field('data_venda') <= _como_data(end_date))
+
+        tabela = tabela.sort_by([('data_venda', 'descending')])
+        return _para_pandas(tabela)
+
+    def iter_vendas(self, start_date=None, end_date=None, vendedor=None, status=None, page_size=1000):
+        """Vendas em páginas, como Database.iter_vendas"""
+        df = self.get_vendas(start_date, end_date)
+        if vendedor:
+            df = df[df['vendedor'] == vendedor]
+        if status:
+            df = df[df['status'] == status]
+
+        for inicio in range(0, len(df), page_size):
+            yield df.iloc[inicio:inicio + page_size].to_dict('records')
+
+    def get_vendas_resumo(self, start_date=None, end_date=None):
+        """Totais por vendedor e status, como Database.get_vendas_resumo"""
+        from utils.exports import resumir_vendas
+        return resumir_vendas(self.get_vendas(start_date, end_date))
+
+    def get_ranking_vendedores(self, start_date, end_date, limite=10):
+        """Top-N vendedores com variação contra a janela anterior, como Database.get_ranking_vendedores"""
+        colunas = ['posicao', 'vendedor', 'faturamento', 'vendas', 'faturamento_anterior', 'vendas_anterior', 'variacao']
+        inicio, fim = _como_data(start_date), _como_data(end_date)
+        inicio_anterior = inicio - (fim - inicio) - timedelta(days=1)
+
+        vendas = self.get_vendas(inicio_anterior, fim)
+        vendas = vendas[vendas['status'] == 'confirmada'] if not vendas.empty else vendas
+        if vendas.empty:
+            return pd.DataFrame(columns=colunas)
+
+        atual = pd.to_datetime(vendas['data_venda']).dt.date >= inicio
+        valor = vendas['valor'].astype(float)
+        janelas = pd.DataFrame({
+            'vendedor': vendas['vendedor'].astype(str),
+            'faturamento': valor.where(atual, 0.0), 'vendas': atual.astype(int),
+            'faturamento_anterior': valor.where(~atual, 0.0), 'vendas_anterior': (~atual).astype(int)
+        }).groupby('vendedor', as_index=False).sum()
+
+        ranking = janelas[janelas['vendas'] > 0].sort_values(['faturamento', 'vendedor'], ascending=[False, True])
+        ranking['posicao'] = ranking['faturamento'].rank(method='min', ascending=False).astype(int)
+        anterior = ranking['faturamento_anterior'].where(ranking['faturamento_anterior'] > 0)
+        ranking['variacao'] = ((ranking['faturamento'] - anterior) / anterior * 100).round(2)
+        return ranking.head(limite)[colunas].reset_index(drop=True)
+
+    def get_leads(self, status=None):
+        """Leads do snapshot, mais recentes primeiro"""
+        import pyarrow.compute as pc
+
+        tabela = self._tabela('leads')
+        if status:
+            tabela = tabela.filter(pc.field('status') == status)
+        return _para_pandas(tabela.sort_by([('created_at', 'descending')]))
+
+    def get_leads_pagina(self, status=None, vendedor=None, origem=None, pagina=0, por_pagina=50):
+        """Página de leads e total no filtro, como Database.get_leads_pagina"""
+        import pyarrow.compute as pc
+
+        tabela = self._tabela('leads')
+        for coluna, valor in (('status', status), ('vendedor', vendedor), ('origem', origem)):
+            if valor:
+                tabela = tabela.filter(pc.field(coluna) == valor)
+
+        tabela = tabela.sort_by([('created_at', 'descending'), ('id', 'descending')])
+        return _para_pandas(tabela.slice(pagina * por_pagina, por_pagina)), tabela.num_rows
+
+    def get_leads_funil(self):
+        """Quantidade e score médio por vendedor e status, como a view leads_funil"""
+        tabela = self._tabela('leads')
+        if not tabela.num_rows:
+            return pd.DataFrame()
+
+        funil = tabela.group_by(['vendedor', 'status']).aggregate([('id', 'count'), ('score', 'mean')])
+        return funil.to_pandas().rename(columns={'id_count': 'quantidade', 'score_mean': 'score_medio'})
+
+    def get_comissoes(self, start_date, end_date):
+        """Comissões gravadas no snapshot por vendedor, como Database.get_comissoes"""
+        colunas = ['vendedor', 'total_vendas', 'quantidade', 'comissao']
+        vendas = self.get_vendas(start_date, end_date)
+        confirmadas = vendas[vendas['status'] == 'confirmada'] if not vendas.empty else vendas
+        if confirmadas.empty:
+            return pd.DataFrame(columns=colunas)
+
+        return (confirmadas.assign(vendedor=confirmadas['vendedor'].astype(str))
+                .groupby('vendedor', as_index=False)
+                .agg(total_vendas=('valor', 'sum'), quantidade=('valor', 'size'), comissao=('comissao_valor', 'sum')))
+
+    def get_metas_progresso(self, ano, mes, vendedor=None):
+        """Faturamento confirmado do mês por vendedor (metas não fazem parte dos snapshots)"""
+        from calendar import monthrange
+        from utils.metas import COLUNAS_PROGRESSO
+
+        vendas = self.get_vendas(date(ano, mes, 1), date(ano, mes, monthrange(ano, mes)[1]))
+        confirmadas = vendas[vendas['status'] == 'confirmada'] if not vendas.empty else vendas
+        if confirmadas.empty:
+            return pd.DataFrame(columns=COLUNAS_PROGRESSO)
+
+        progresso = (confirmadas.assign(vendedor=confirmadas['vendedor'].astype(str).str.lower())
+                     .groupby('vendedor', as_index=False)
+                     .agg(faturado=('valor', 'sum'), vendas=('valor', 'size')))
+        if vendedor:
+            progresso = progresso[progresso['vendedor'] == vendedor.lower()]
+        return progresso.assign(ano=ano, mes=mes).reindex(columns=COLUNAS_PROGRESSO)
+
+    def marcar_meta_notificada(self, vendedor, ano, mes):
+        """Sem notificações em modo snapshot"""
+        return False
+
+    def get_custos(self, start_date, end_date, categoria=None, responsavel=None):
+        """Custos não fazem parte dos snapshots"""
+        from utils.database import COLUNAS_CUSTOS
+        return pd.DataFrame(columns=COLUNAS_CUSTOS)
+
+    def get_custos_resumo(self, start_date, end_date):
+        """Custos não fazem parte dos snapshots"""
+        return pd.DataFrame(columns=['mes', 'categoria', 'responsavel', 'recorrente', 'total', 'quantidade'])
+
+    def get_roi_diario(self, start_date, end_date, granularidade='day', categorias=None):
+        """Receita por período do snapshot no formato de Database.get_roi_diario (sem custos)"""
+        freq = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}.get(granularidade, 'D')
+        vendas = self.get_vendas(start_date, end_date)
+        confirmadas = vendas[vendas['status'] == 'confirmada'] if not vendas.empty else vendas
+
+        dias = pd.date_range(_como_data(start_date), _como_data(end_date), freq='D')
+        receita = pd.Series(0.0, index=dias)
+        if not confirmadas.empty:
+            por_dia = confirmadas.groupby(pd.to_datetime(confirmadas['data_venda']))['valor'].sum()
+            receita = receita.add(por_dia, fill_value=0.0).reindex(dias, fill_value=0.0)
+
+        receita = receita.resample(freq, label='left', closed='left').sum()
+        return pd.DataFrame({
+            'periodo': receita.index,
+            'receita': receita.values,
+            'custo': 0.0,
+            'receita_acumulada': receita.cumsum().values,
+            'custo_acumulado': 0.0,
+            'roi': None
+        })
+
+    def get_comparacao_periodos(self, start_date, end_date, categorias=None):
+        """Agregados do período e da janela anterior, como Database.get_comparacao_periodos (sem custos)"""
+        inicio, fim = _como_data(start_date), _como_data(end_date)
+        inicio_anterior = inicio - (fim - inicio) - timedelta(days=1)
+
+        vendas = self.get_vendas(inicio_anterior, fim)
+        vendas = vendas[vendas['status'] == 'confirmada'] if not vendas.empty else vendas
+        leads = self.get_leads()
+        if not leads.empty:
+            leads = leads.assign(data=pd.to_datetime(leads['created_at'], utc=True).dt.date)
+            leads = leads[(leads['data'] >= inicio_anterior) & (leads['data'] <= fim)]
+
+        def janelas(df, coluna_data):
+            if df.empty:
+                return df, df
+            datas = pd.to_datetime(df[coluna_data]).dt.date
+            return df[datas >= inicio], df[datas < inicio]
+
+        def soma(df, coluna):
+            return float(df[coluna].sum()) if not df.empty else 0.0
+
+        vendas_atual, vendas_anterior = janelas(vendas, 'data_venda')
+        leads_atual, leads_anterior = janelas(leads, 'data')
+        linhas = [
+            ('vendas', len(vendas_atual), len(vendas_anterior)),
+            ('faturamento', soma(vendas_atual, 'valor'), soma(vendas_anterior, 'valor')),
+            ('comissao', soma(vendas_atual, 'comissao_valor'), soma(vendas_anterior, 'comissao_valor')),
+            ('leads', len(leads_atual), len(leads_anterior)),
+        ]
+        for status in ('novo', 'contatado', 'interessado', 'fechado'):
+            linhas.append((f'leads_{status}',
+                           int((leads_atual['status'] == status).sum()) if not leads_atual.empty else 0,
+                           int((leads_anterior['status'] == status).sum()) if not leads_anterior.empty else 0))
+        linhas.append(('custos', 0.0, 0.0))
+        return pd.DataFrame(linhas, columns=['metrica', 'atual', 'anterior'])
+
+    def get_activity_logs(self, user_id=None, limit=50):
+        """Últimos logs de atividade do snapshot"""
+        import pyarrow.compute as pc
+
+        tabela = self._tabela('activity_logs')
+        if user_id:
+            tabela = tabela.filter(pc.field('user_id') == user_id)
+        return _para_pandas(tabela.sort_by([('timestamp', 'descending')]).slice(0, limit))
+
+    def get_notificacoes(self, user_id=None, apenas_nao_lidas=True, limit=50):
+        """Notificações não fazem parte dos snapshots"""
+        return pd.DataFrame()
+
+    def get_instagram_media(self):
+        """Posts do Instagram gravados no snapshot"""
+        tabela = self._tabela('instagram_media')
+        return tabela.sort_by([('date', 'descending')]).to_pandas() if tabela.num_rows else pd.DataFrame()
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _snapshot_compartilhado(diretorio: str, arquivos: tuple) -> SnapshotDatabase:
+    return SnapshotDatabase(diretorio)
+
+
+def abrir_snapshot(diretorio: str) -> SnapshotDatabase:
+    """SnapshotDatabase compartilhada pelas sessões (tabelas lidas uma vez)
+
+    A chave inclui os arquivos e seus mtimes: regravar ou acrescentar um
+    arquivo cria uma instância nova.
+    """
+    arquivos = tuple(
+        (caminho, os.stat(caminho).st_mtime_ns)
+        for tabela in TABELAS_SNAPSHOT for caminho in arquivos_snapshot(diretorio, tabela)
+    )
+    return _snapshot_compartilhado(diretorio, arquivos)
+
+
+def _como_data(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def main():
+    from utils.log_retention import _criar_cliente
+
+    parser = argparse.ArgumentParser(description="Exporta snapshots colunares das tabelas do dashboard")
+    parser.add_argument("--destino", default="snapshots", help="Diretório de saída")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="parquet")
+    parser.add_argument("--compressao", default=COMPRESSAO_PADRAO, help="zstd, lz4, snappy (Parquet) ou none")
+    parser.add_argument("--tabelas", nargs="+", choices=TABELAS_BANCO, default=list(TABELAS_BANCO))
+    args = parser.parse_args()
+
+    client = _criar_cliente()
+    compressao = None if args.compressao == 'none' else args.compressao
+
+    for tabela in args.tabelas:
+        destino = os.path.join(args.destino, f"{tabela}.{FORMATOS[args.formato][0]}")
+        total = escrever_snapshot(tabela, paginas_tabela(client, tabela), destino, args.formato, compressao)
+        print(f"{tabela}: {total} linhas -> {destino}")
+
+
+def paginas_tabela(client, tabela: str, page_size: int = 5000):
+    """Percorre a tabela inteira em páginas (keyset por id)"""
+    ultimo_id = None
+    while True:
+        query = client.table(tabela).select('*').order('id').limit(page_size)
+        if ultimo_id is not None:
+            query = query.gt('id', ultimo_id)
+
+        rows = query.execute().data
+        if not rows:
+            break
+
+        yield rows
+        if len(rows) < page_size:
+            break
+        ultimo_id = rows[-1]['id']
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+📉 Redução de Séries Temporais para Gráficos
+Recorta a série ao intervalo visível, reamostra (opcional) e aplica LTTB
+(Largest-Triangle-Three-Buckets) para limitar o número de pontos enviados
+ao Plotly, preservando picos e vales.
+"""
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Pontos por série a partir dos quais o LTTB entra em ação
+MAX_PONTOS = 1000
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_saida: int) -> np.ndarray:
+    """Índices dos pontos escolhidos pelo LTTB (sempre inclui o primeiro e o último)"""
+    total = len(x)
+    if n_saida >= total or n_saida < 3:
+        return np.arange(total)
+
+    indices = np.empty(n_saida, dtype=np.int64)
+    indices[0], indices[-1] = 0, total - 1
+
+    # n_saida - 2 baldes entre o primeiro e o último ponto
+    limites = np.linspace(1, total - 1, n_saida - 1).astype(np.int64)
+
+    anterior = 0
+    for i in range(n_saida - 2):
+        inicio, fim = limites[i], limites[i + 1]
+
+        # Média do próximo balde (ou o último ponto, no último balde)
+        prox_fim = limites[i + 2] if i + 2 < len(limites) else total
+        media_x = x[fim:prox_fim].mean()
+        media_y = y[fim:prox_fim].mean()
+
+        # Área do triângulo (anterior, candidato, média do próximo)
+        xs, ys = x[inicio:fim], y[inicio:fim]
+        areas = np.abs((x[anterior] - media_x) * (ys - y[anterior]) - (x[anterior] - xs) * (media_y - y[anterior]))
+
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+
+    return indices
+
+
+def _eixo_numerico(serie: pd.Series) -> np.ndarray:
+    """Eixo x como float (datas viram nanossegundos)"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype('int64').to_numpy(dtype=np.float64)
+    return pd.to_numeric(serie, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _limite(valor, serie: pd.Series) -> pd.Timestamp:
+    """`inicio`/`fim` no mesmo fuso da coluna x (comparar naive com tz-aware falha)"""
+    limite = pd.Timestamp(valor)
+    tz = serie.dt.tz if pd.api.types.is_datetime64_any_dtype(serie) else None
+    if tz is not None and limite.tzinfo is None:
+        return limite.tz_localize(tz)
+    if tz is None and limite.tzinfo is not None:
+        return limite.tz_localize(None)
+    return limite
+
+
+def reduzir_serie(df: pd.DataFrame, x: str, y: Union[str, Sequence[str]],
+                  max_pontos: int = MAX_PONTOS, inicio=None, fim=None,
+                  freq: Optional[str] = None, agg: str = 'sum') -> pd.DataFrame:
+    """Série pronta para o gráfico com no máximo ~max_pontos pontos por coluna y
+
+    - `inicio`/`fim`: recorta ao intervalo visível antes de qualquer cálculo
+    - `freq`: reamostra (ex.: 'D', 'W', 'H') com `agg` antes do LTTB
+    - Com várias colunas y, mantém a união dos pontos escolhidos para cada uma
+    """
+    if df.empty:
+        return df
+
+    colunas_y: List[str] = [y] if isinstance(y, str) else list(y)
+
+    dados = df.copy()
+    if not pd.api.types.is_numeric_dtype(dados[x]):
+        dados[x] = pd.to_datetime(dados[x], errors='coerce')
+    dados = dados.dropna(subset=[x]).sort_values(x)
+
+    if inicio is not None:
+        dados = dados[dados[x] >= _limite(inicio, dados[x])]
+    if fim is not None:
+        dados = dados[dados[x] <= _limite(fim, dados[x]) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)]
+
+    if freq is not None and pd.api.types.is_datetime64_any_dtype(dados[x]):
+        dados = dados.set_index(x)[colunas_y].resample(freq).agg(agg).reset_index()
+
+    if len(dados) <= max_pontos:
+        return dados.reset_index(drop=True)
+
+    eixo = _eixo_numerico(dados[x])
+    escolhidos = set()
+    for coluna in colunas_y:
+        valores = np.nan_to_num(pd.to_numeric(dados[coluna], errors='coerce').to_numpy(dtype=np.float64))
+        escolhidos.update(lttb_indices(eixo, valores, max_pontos).tolist())
+
+    return dados.iloc[sorted(escolhidos)].reset_index(drop=True)
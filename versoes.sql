@@ -0,0 +1,77 @@
+-- Versões dos dados para a atualização automática do dashboard
+-- Execute este script no SQL Editor do Supabase APÓS schema.sql
+--
+-- Cada tabela acompanhada tem um contador em table_versions, incrementado
+-- por trigger a cada comando que a altera (insert, update, delete ou
+-- truncate). Os painéis e caches do app comparam esses contadores para
+-- saber se precisam refazer uma consulta; a conferência é uma única leitura
+-- de poucas linhas, compartilhada por todas as sessões (utils/realtime.py).
+
+-- ========== TABELA ==========
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    tabela TEXT PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- ========== TRIGGERS ==========
+
+-- Um incremento por comando (FOR EACH STATEMENT): um insert em lote conta uma vez.
+-- Roda como dono da tabela: o app (anon) só lê table_versions
+CREATE OR REPLACE FUNCTION incrementar_versao_tabela()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO table_versions (tabela, versao) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (tabela) DO UPDATE
+    SET versao = table_versions.versao + 1, updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DO $$
+DECLARE
+    tabela TEXT;
+BEGIN
+    FOREACH tabela IN ARRAY ARRAY['vendas', 'leads', 'custos', 'metas', 'notificacoes', 'webhooks'] LOOP
+        -- webhooks só existe após webhook_schema.sql
+        IF to_regclass('public.' || tabela) IS NOT NULL THEN
+            INSERT INTO table_versions (tabela) VALUES (tabela) ON CONFLICT DO NOTHING;
+
+            EXECUTE FORMAT('DROP TRIGGER IF EXISTS %I ON public.%I', tabela || '_versao', tabela);
+            EXECUTE FORMAT(
+                'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.%I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_versao_tabela()',
+                tabela || '_versao', tabela
+            );
+        END IF;
+    END LOOP;
+END $$;
+
+-- Índices da conferência anterior (contagem + MAX(updated_at)), não mais usados
+DROP INDEX IF EXISTS idx_vendas_updated;
+DROP INDEX IF EXISTS idx_leads_updated;
+DROP INDEX IF EXISTS idx_custos_updated;
+DROP INDEX IF EXISTS idx_metas_updated;
+
+-- ========== VERSÕES ==========
+
+-- Contador atual de cada tabela (sempre crescente)
+DROP FUNCTION IF EXISTS versoes_dados();
+CREATE FUNCTION versoes_dados()
+RETURNS TABLE (tabela TEXT, versao BIGINT) AS $$
+    SELECT v.tabela, v.versao FROM table_versions v;
+$$ LANGUAGE sql STABLE;
+
+-- ========== PERMISSÕES ==========
+
+-- table_versions só muda pelo trigger (dono da tabela): pela API é somente leitura
+ALTER TABLE table_versions ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "table_versions_select_all" ON table_versions;
+CREATE POLICY "table_versions_select_all" ON table_versions
+    FOR SELECT USING (true);
+
+REVOKE INSERT, UPDATE, DELETE, TRUNCATE ON table_versions FROM anon, authenticated;
+
+GRANT SELECT ON table_versions TO anon, authenticated;
+GRANT EXECUTE ON FUNCTION versoes_dados() TO anon, authenticated;
@@ -4,6 +4,7 @@ import hmac
 import json
 from datetime import datetime
 from utils.database import Database
+from utils.profiler import medido
 
 def verify_webhook(request_data, signature):
     """Verifica se o webhook veio mesmo do Instagram"""
@@ -61,28 +62,32 @@ def save_webhook_event(data):
         return
     
     try:
-        # Cria uma entrada no log de atividades
-        db.log_activity(
-            user_id="system",
-            action="webhook_received",
-            details=json.dumps(data, default=str)
-        )
+        event_type = detect_event_type(data)
         
         # Salva na tabela de webhooks se existir
         webhook_data = {
             'source': 'instagram',
-            'event_type': detect_event_type(data),
+            'event_type': event_type,
             'data': json.dumps(data),
             'processed_at': datetime.now().isoformat(),
             'status': 'received'
         }
         
-        # Se tabela webhooks existir, insere lá
+        # Se tabela webhooks existir, insere lá e o log guarda só um resumo;
+        # caso contrário o payload completo vai para os logs (fallback de leitura)
         try:
-            db.supabase.table('webhooks').insert(webhook_data).execute()
+            result = db.supabase.table('webhooks').insert(webhook_data).execute()
+            webhook_id = result.data[0].get('id') if result.data else None
+            details = json.dumps({'event_type': event_type, 'webhook_id': webhook_id})
         except:
-            # Se não existir a tabela, salva nos logs
-            pass
+            details = json.dumps(data, default=str)
+        
+        # Cria uma entrada no log de atividades
+        db.log_activity(
+            user_id="system",
+            action="webhook_received",
+            details=details
+        )
             
     except Exception as e:
         st.error(f"Erro ao salvar webhook: {e}")
@@ -220,6 +225,7 @@ def get_webhook_url():
         # Fallback manual
         return "https://instagram-dashboard-8vfqbyyrmfbnpmsbl3mbts.streamlit.app/webhook/instagram"
 
+@medido('dados')
 def get_recent_webhook_events(limit=10):
     """Busca eventos recentes do webhook"""
     db = Database()